@@ -1,15 +1,27 @@
-from flask import Flask, request, jsonify
+from functools import wraps
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+from flask_socketio import SocketIO
 from services.user_accounts_service import UserAccountsService
-from services.presentations_service import PresentationsService
+from services.password_hasher import PasswordHasherBusy
+from services.auth_service import get_auth_service, AuthError
+from services.rate_limiter import get_rate_limiter, RateLimitExceeded
+from services.presentations_service import PresentationsService, PRESENTATION_PAGE_SIZE, SEARCH_PAGE_SIZE
+from services.db_pool import get_pool
+from services.collaboration_service import CollaborationService, CollaborationNamespace, GEOMETRY_FIELDS
+from services.live_session_service import LiveSessionService, LiveNamespace
+from services.job_handlers import register_job_handlers, ORPHAN_GRACE_SECONDS
+from services.presentation_export import PresentationExporter
+from services import image_processing, metrics
 from dotenv import load_dotenv
 import os
+import math
 import logging
-import uuid
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'DEBUG').upper())
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -18,15 +30,225 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Behind load balancers or reverse proxies, take the client address from the X-Forwarded-For
+# entries those TRUSTED_PROXY_COUNT hops added; rate limits key on it
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+if TRUSTED_PROXY_COUNT > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT, x_proto=TRUSTED_PROXY_COUNT)
+
+# Without SOCKETIO_MESSAGE_QUEUE events stay in this process; set it (e.g. redis://...)
+# so that broadcasts reach clients connected to other workers
+socketio = SocketIO(app, cors_allowed_origins='*', message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE'))
+
 # Initialize services
 user_service = UserAccountsService()
+auth_service = get_auth_service()
+auth_service.start()
+rate_limiter = get_rate_limiter()
 presentations_service = PresentationsService()
+job_queue = presentations_service.jobs
+register_job_handlers(job_queue, presentations_service)
+# Set JOB_WORKER_MODE=external to run jobs only in worker.py processes
+if os.getenv('JOB_WORKER_MODE', 'inline') == 'inline':
+    job_queue.start()
+presentation_exporter = PresentationExporter(presentations_service)
+collaboration_service = CollaborationService(presentations_service)
+collaboration_service.coalescer.start()
+socketio.on_namespace(CollaborationNamespace('/collab', collaboration_service, auth_service=auth_service))
+live_session_service = LiveSessionService(presentations_service)
+live_namespace = LiveNamespace('/live', live_session_service)
+live_namespace.broadcaster.start()
+socketio.on_namespace(live_namespace)
+
+# Figures the services already keep, exported with the request metrics
+metrics.registry.callback(
+    'db_pool_connections', 'Pooled database connections by state',
+    lambda: {(state,): get_pool().stats()[state] for state in ('in_use', 'idle', 'waiting')},
+    labelnames=('state',))
+metrics.registry.callback(
+    'db_pool_checkout_timeouts_total', 'Checkouts that timed out waiting for a connection',
+    lambda: {(): get_pool().stats()['timeouts']}, kind='counter')
+metrics.registry.callback(
+    'cache_events_total', 'Presentation cache lookups and writes by outcome',
+    lambda: {(event,): value for event, value in presentations_service.cache.stats().items()
+             if event in ('local_hits', 'shared_hits', 'misses', 'sets', 'invalidations', 'shared_errors')},
+    labelnames=('event',), kind='counter')
+metrics.registry.callback(
+    'rate_limit_requests_total', 'Rate limited requests by route, client scope and outcome',
+    lambda: {tuple(name.split(':', 1)) + (outcome,): value
+             for name, counters in rate_limiter.stats()['routes'].items()
+             for outcome, value in counters.items()},
+    labelnames=('route', 'scope', 'outcome'), kind='counter')
+
+@app.before_request
+def _start_request_metrics():
+    g.metrics_token = metrics.start_request()
+
+@app.after_request
+def _record_request_metrics(response):
+    # Route templates rather than paths, so IDs do not multiply the series
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.record_request(request.method, route, response.status_code)
+    return response
+
+@app.teardown_request
+def _end_request_metrics(error=None):
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        metrics.end_request(token)
+
+def _signed_etag(etag):
+    """Scope an ETag to the current URL signing window when image URLs are presigned."""
+    window = presentations_service.s3_service.signature_window()
+    return etag if window is None else f"{etag}-k{window}"
+
+def _not_modified(etag):
+    """Return a 304 response if the client's If-None-Match already covers etag, else None."""
+    etag = _signed_etag(etag) if etag else etag
+    if etag and request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+def _geometry_error(data):
+    """Return an error message if data is not a valid geometry update, else None."""
+    if not isinstance(data, dict):
+        return 'Geometry update must be an object'
+    fields = [field for field in GEOMETRY_FIELDS if data.get(field) is not None]
+    if not fields:
+        return f'At least one of {", ".join(GEOMETRY_FIELDS)} is required'
+    for field in fields:
+        if isinstance(data[field], bool) or not isinstance(data[field], (int, float)):
+            return f'{field} must be a number'
+    return None
+
+def _with_etag(response, etag):
+    """Tag a 200 response so clients can revalidate it with If-None-Match."""
+    response.set_etag(_signed_etag(etag))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _schedule_image_jobs(stored):
+    """Queue derivative generation for new images and the orphan check every upload gets."""
+    image_url = stored['image_url']
+    # Derivatives are generated in the background; clients use the original until they exist
+    if image_processing.is_available() and not stored['deduplicated']:
+        job_queue.enqueue('image_derivatives', {
+            'image_url': image_url,
+            'file_name': image_url.rsplit('/', 1)[-1]
+        })
+    job_queue.enqueue('orphan_cleanup', {'image_url': image_url}, delay=ORPHAN_GRACE_SECONDS)
+
+def _too_many_requests(error):
+    """Shed a request that is rate limited or that the password hashing pool has no room for."""
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(max(1, math.ceil(getattr(error, 'retry_after', 1))))
+    return response, 429
+
+def _image_extension(filename):
+    """Return the sanitized extension, including the dot, of an uploaded file name."""
+    return os.path.splitext(secure_filename(filename or ''))[1]
+
+def _access_token(query_token=False):
+    """Return the bearer token of the request, or the access_token query parameter if allowed."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token:
+        return token.strip()
+    return request.args.get('access_token') if query_token else None
+
+def require_auth(view=None, query_token=False):
+    """
+    Require a valid access token and expose its user as g.user_id.
+    
+    Tokens are verified from memory, so this adds no database query. query_token
+    also accepts ?access_token=, for links the browser follows without headers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                g.user_id = auth_service.verify_access(_access_token(query_token))['sub']
+            except AuthError as e:
+                return jsonify({'error': str(e)}), 401
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator(view) if view else decorator
+
+def require_owner(entity_type, arg, query_token=False):
+    """Require an access token whose user owns the presentation, slide or element named by the URL argument arg."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                owner = presentations_service.get_owner(entity_type, kwargs[arg])
+            except Exception as e:
+                logger.error(f"Error checking ownership: {str(e)}")
+                return jsonify({'error': str(e)}), 400
+            if owner is None:
+                return jsonify({'error': f'{entity_type.capitalize()} not found'}), 404
+            if owner != g.user_id:
+                return jsonify({'error': f'Not allowed to access this {entity_type}'}), 403
+            return view(*args, **kwargs)
+        return require_auth(wrapper, query_token=query_token)
+    return decorator
+
+def rate_limited(route):
+    """
+    Throttle a route per client IP and per submitted username.
+    
+    Runs before the view, so throttled requests never reach the database or
+    the password hasher. Limits are configured per route in services.rate_limiter.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True)
+            username = data.get('username') if isinstance(data, dict) else None
+            try:
+                rate_limiter.check(route, {
+                    'ip': request.remote_addr,
+                    'username': username if isinstance(username, str) else None
+                })
+            except RateLimitExceeded as e:
+                return _too_many_requests(e)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def require_user(view):
+    """Require an access token issued to the user named by the user_id URL argument."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if kwargs['user_id'] != g.user_id:
+            return jsonify({'error': 'Not allowed to access this user'}), 403
+        return view(*args, **kwargs)
+    return require_auth(wrapper)
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({
+        'success': True,
+        'db_pool': get_pool().stats(),
+        'cache': presentations_service.cache.stats(),
+        'collaboration': collaboration_service.coalescer.stats(),
+        'auth': auth_service.stats(),
+        'rate_limits': rate_limiter.stats(),
+        'jobs': job_queue.stats()
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return app.response_class(metrics.registry.render(), status=200,
+                              content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/api/auth/register', methods=['POST'])
+@rate_limited('register')
 def register():
     try:
         data = request.get_json()
-        logger.debug(f"Received registration data: {data}")
+        logger.debug(f"Received registration for username: {data.get('username')}")
         
         # Validate required fields
         required_fields = ['username', 'email', 'password']
@@ -52,11 +274,14 @@ def register():
             }
         }), 201
         
+    except PasswordHasherBusy as e:
+        return _too_many_requests(e)
     except Exception as e:
         logger.error(f"Registration error: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/auth/login', methods=['POST'])
+@rate_limited('login')
 def login():
     try:
         data = request.get_json()
@@ -80,20 +305,54 @@ def login():
                     'user_id': user['user_id'],
                     'username': user['username'],
                     'email': user['email']
-                }
+                },
+                **auth_service.issue_tokens(user['user_id'])
             }), 200
         else:
             return jsonify({'error': 'Invalid username or password'}), 401
             
+    except PasswordHasherBusy as e:
+        return _too_many_requests(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/auth/refresh', methods=['POST'])
+def refresh_tokens():
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('refresh_token'):
+            return jsonify({'error': 'Missing required field: refresh_token'}), 400
+        
+        return jsonify({
+            'success': True,
+            **auth_service.refresh(data['refresh_token'])
+        }), 200
+        
+    except AuthError as e:
+        return jsonify({'error': str(e)}), 401
+    except Exception as e:
+        logger.error(f"Token refresh error: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/auth/logout', methods=['POST'])
+@require_auth
+def logout():
+    try:
+        data = request.get_json(silent=True) or {}
+        auth_service.revoke('access', _access_token())
+        if data.get('refresh_token'):
+            auth_service.revoke('refresh', data['refresh_token'])
+        return jsonify({'success': True}), 200
+        
     except Exception as e:
+        logger.error(f"Logout error: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/presentations', methods=['POST'])
+@require_auth
 def create_presentation():
-    print("create_presentation!!!!")
     try:
         data = request.get_json()
-        print("data!!!!!!!!!!", data)
         logger.debug(f"Received presentation creation data: {data}")
         
         # Validate required fields
@@ -103,10 +362,11 @@ def create_presentation():
         #     error_msg = f'Missing required fields: {", ".join(missing_fields)}'
         #     logger.error(error_msg)
         #     return jsonify({'error': error_msg}), 400
-        print("missing_fields", data)
+        if str(data.get('user_id', g.user_id)) != str(g.user_id):
+            return jsonify({'error': 'Not allowed to create presentations for this user'}), 403
         # Create presentation
         presentation = presentations_service.create_presentation(
-            user_id=data['user_id'],
+            user_id=g.user_id,
             title=data['title'],
             description=data.get('description')
         )
@@ -121,14 +381,25 @@ def create_presentation():
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/presentations/<presentation_id>', methods=['GET'])
+@require_owner('presentation', 'presentation_id')
 def get_presentation(presentation_id):
     try:
-        presentation = presentations_service.get_presentation(presentation_id)
+        # Answer revalidations from the revision alone, without building the payload
+        revision = presentations_service.get_presentation_revision(presentation_id)
+        if revision is None:
+            return jsonify({'error': 'Presentation not found'}), 404
+        not_modified = _not_modified(f"p{presentation_id}-r{revision}")
+        if not_modified:
+            return not_modified
+        
+        # A cached copy written back by a reader that raced an edit is older than the revision looked up above
+        presentation = presentations_service.get_presentation(presentation_id, min_revision=revision)
         if presentation:
-            return jsonify({
+            response = jsonify({
                 'success': True,
                 'presentation': presentation
-            }), 200
+            })
+            return _with_etag(response, f"p{presentation_id}-r{presentation.get('revision', revision)}"), 200
         else:
             return jsonify({'error': 'Presentation not found'}), 404
             
@@ -136,29 +407,171 @@ def get_presentation(presentation_id):
         logger.error(f"Error retrieving presentation: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/user/<int:user_id>/presentations', methods=['GET'])
-def get_user_presentations(user_id):
+@app.route('/api/presentations/<int:presentation_id>/full', methods=['GET'])
+@require_owner('presentation', 'presentation_id')
+def get_full_presentation(presentation_id):
     try:
-        print("get_user_presentations!!!!33333")
-        presentations = presentations_service.get_user_presentations(user_id)
-        print("presentations", presentations)
+        slide_start = request.args.get('start', type=int)
+        slide_end = request.args.get('end', type=int)
+        if slide_start is not None and slide_end is not None and slide_start > slide_end:
+            return jsonify({'error': 'start must not be greater than end'}), 400
         
-        if presentations:
+        presentation = presentations_service.get_full_presentation(
+            presentation_id,
+            slide_start=slide_start,
+            slide_end=slide_end
+        )
+        if presentation:
             return jsonify({
                 'success': True,
-                'presentations': presentations
+                'presentation': presentation
             }), 200
         else:
+            return jsonify({'error': 'Presentation not found'}), 404
+            
+    except Exception as e:
+        logger.error(f"Error retrieving full presentation: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/presentations/<int:presentation_id>/export', methods=['GET'])
+@require_owner('presentation', 'presentation_id', query_token=True)
+def export_presentation(presentation_id):
+    try:
+        export = presentation_exporter.load(presentation_id)
+        if not export:
+            return jsonify({'error': 'Presentation not found'}), 404
+        
+        # The archive is generated while it is sent, so no Content-Length is known up front
+        file_name = secure_filename(export['deck'].get('title') or '') or f"presentation-{presentation_id}"
+        return Response(
+            stream_with_context(presentation_exporter.stream(export)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename="{file_name}.zip"'}
+        )
+        
+    except Exception as e:
+        logger.error(f"Error exporting presentation: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/presentations/<int:presentation_id>/live', methods=['POST'])
+@require_owner('presentation', 'presentation_id')
+def start_live_session(presentation_id):
+    try:
+        session = live_session_service.start_session(presentation_id)
+        if session:
             return jsonify({
                 'success': True,
-                'presentations': None
-            }), 200
+                'session': session.state(),
+                'presenter_key': session.presenter_key
+            }), 201
+        else:
+            return jsonify({'error': 'Presentation not found'}), 404
+            
+    except Exception as e:
+        logger.error(f"Error starting live session: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/live/<session_id>', methods=['GET'])
+def get_live_session(session_id):
+    try:
+        session = live_session_service.get_session(session_id)
+        deck_json = live_session_service.get_deck(session.session_id) if session else None
+        if not deck_json:
+            return jsonify({'error': 'Live session not found'}), 404
+        
+        # The deck was serialized when the session started; only the small state part is encoded here
+        body = b''.join([
+            b'{"success":true,"session":',
+            app.json.dumps(session.state()).encode('utf-8'),
+            b',"presentation":',
+            deck_json,
+            b'}'
+        ])
+        return app.response_class(body, status=200, mimetype='application/json')
+            
+    except Exception as e:
+        logger.error(f"Error retrieving live session: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/presentations/<int:presentation_id>/changes', methods=['GET'])
+@require_owner('presentation', 'presentation_id')
+def get_presentation_changes(presentation_id):
+    try:
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return jsonify({'error': 'Missing or invalid query parameter: since'}), 400
+        
+        delta = presentations_service.get_presentation_changes(presentation_id, since)
+        if delta is None:
+            return jsonify({'error': 'Presentation not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            **delta
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error retrieving presentation changes: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/user/<int:user_id>/presentations', methods=['GET'])
+@require_user
+def get_user_presentations(user_id):
+    try:
+        limit = request.args.get('limit', type=int) or PRESENTATION_PAGE_SIZE
+        cursor = request.args.get('cursor')
+        version = presentations_service.get_user_presentations_version(user_id)
+        etag = f"u{user_id}-{version}-l{limit}-c{cursor or ''}"
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        page = presentations_service.get_user_presentations(user_id, limit=limit, cursor=cursor)
+        
+        if page['presentations']:
+            response = jsonify({
+                'success': True,
+                'presentations': page['presentations'],
+                'next_cursor': page['next_cursor']
+            })
+        else:
+            response = jsonify({
+                'success': True,
+                'presentations': None,
+                'next_cursor': None
+            })
+        return _with_etag(response, etag), 200
         
     except Exception as e:
         logger.error(f"Error retrieving user presentations: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/user/<int:user_id>/search', methods=['GET'])
+@require_user
+def search_user_presentations(user_id):
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Missing required parameter: q'}), 400
+        
+        page = presentations_service.search_user_presentations(
+            user_id,
+            query,
+            limit=request.args.get('limit', type=int) or SEARCH_PAGE_SIZE,
+            offset=request.args.get('offset', type=int) or 0
+        )
+        return jsonify({
+            'success': True,
+            'results': page['results'],
+            'next_offset': page['next_offset']
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error searching presentations: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/presentations/<presentation_id>', methods=['PUT'])
+@require_owner('presentation', 'presentation_id')
 def update_presentation(presentation_id):
     try:
         data = request.get_json()
@@ -184,6 +597,7 @@ def update_presentation(presentation_id):
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/presentations/<presentation_id>', methods=['DELETE'])
+@require_owner('presentation', 'presentation_id')
 def delete_presentation(presentation_id):
     try:
         success = presentations_service.delete_presentation(presentation_id)
@@ -197,6 +611,7 @@ def delete_presentation(presentation_id):
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/presentations/<presentation_id>/slides', methods=['POST'])
+@require_owner('presentation', 'presentation_id')
 def create_slide(presentation_id):
     try:
         data = request.get_json()
@@ -226,7 +641,30 @@ def create_slide(presentation_id):
         logger.error(f"Slide creation error: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/presentations/<int:presentation_id>/slides/order', methods=['PUT'])
+@require_owner('presentation', 'presentation_id')
+def reorder_slides(presentation_id):
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('slide_ids'), list):
+            return jsonify({'error': 'Missing required field: slide_ids'}), 400
+        
+        slides = presentations_service.reorder_slides(
+            presentation_id=presentation_id,
+            slide_ids=data['slide_ids']
+        )
+        
+        return jsonify({
+            'success': True,
+            'slides': slides
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error reordering slides: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/slides/<slide_id>', methods=['PUT'])
+@require_owner('slide', 'slide_id')
 def update_slide(slide_id):
     try:
         data = request.get_json()
@@ -256,6 +694,7 @@ def update_slide(slide_id):
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/slides/<slide_id>', methods=['DELETE'])
+@require_owner('slide', 'slide_id')
 def delete_slide(slide_id):
     try:
         success = presentations_service.delete_slide(slide_id)
@@ -269,19 +708,34 @@ def delete_slide(slide_id):
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/slides/<int:slide_id>/elements', methods=['GET'])
+@require_owner('slide', 'slide_id')
 def get_slide_elements(slide_id):
     try:
-        elements = presentations_service.get_slide_elements(slide_id)
-        return jsonify({
+        slide_revision = presentations_service.get_slide_revision(slide_id)
+        if slide_revision is None:
+            return jsonify({'error': 'Slide not found'}), 404
+        etag = f"s{slide_id}-p{slide_revision['presentation_id']}-r{slide_revision['revision']}"
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        # Tagged with the revision the elements were read at, which a cached copy may lag behind
+        payload = presentations_service.get_slide_elements_with_revision(
+            slide_id, min_revision=slide_revision['revision'])
+        if payload is None:
+            return jsonify({'error': 'Slide not found'}), 404
+        response = jsonify({
             'success': True,
-            'elements': elements
-        }), 200
+            'elements': payload['elements']
+        })
+        return _with_etag(response, f"s{slide_id}-p{payload['presentation_id']}-r{payload['revision']}"), 200
         
     except Exception as e:
         logger.error(f"Error retrieving slide elements: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/slides/<int:slide_id>/elements/text', methods=['POST'])
+@require_owner('slide', 'slide_id')
 def create_text_element(slide_id):
     try:
         data = request.get_json()
@@ -322,7 +776,36 @@ def create_text_element(slide_id):
         logger.error(f"Text element creation error: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/slides/<int:slide_id>/elements/batch', methods=['POST'])
+@require_owner('slide', 'slide_id')
+def apply_element_batch(slide_id):
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('operations'), list):
+            return jsonify({'error': 'Missing required field: operations'}), 400
+        
+        # Write any queued drag updates first so they cannot land after this batch
+        collaboration_service.coalescer.flush()
+        results = presentations_service.apply_element_batch(
+            slide_id=slide_id,
+            operations=data['operations']
+        )
+        # Drags queued for deleted elements since the flush would only be written to rows that are gone
+        for result in results:
+            if result['op'] == 'delete' and result['success']:
+                collaboration_service.coalescer.discard(result['element_id'])
+        
+        return jsonify({
+            'success': True,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Element batch error: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/upload/image', methods=['POST'])
+@require_auth
 def upload_image():
     try:
         if 'file' not in request.files:
@@ -335,30 +818,69 @@ def upload_image():
         if not file.content_type.startswith('image/'):
             return jsonify({'error': 'File must be an image'}), 400
             
-        # Generate a unique filename
-        file_ext = os.path.splitext(secure_filename(file.filename))[1]
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
-        
-        # Upload to S3
-        success, image_url = presentations_service.s3_service.upload_image(
-            file_data=file.read(),
-            file_name=unique_filename,
-            content_type=file.content_type
-        )
-        
-        if not success:
-            return jsonify({'error': 'Failed to upload image'}), 500
+        # Uploads are stored under their content hash, so identical files share one object
+        stored = presentations_service.store_image(file.stream, _image_extension(file.filename), file.content_type)
+        _schedule_image_jobs(stored)
             
-        return jsonify({
+        return jsonify(presentations_service.s3_service.sign_urls({
             'success': True,
-            'image_url': image_url
-        }), 201
+            'image_url': stored['image_url'],
+            'deduplicated': stored['deduplicated']
+        })), 201
         
     except Exception as e:
         logger.error(f"Image upload error: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/upload/image/presign', methods=['POST'])
+@require_auth
+def presign_image_upload():
+    try:
+        data = request.get_json()
+        required_fields = ['sha256', 'size', 'content_type', 'filename']
+        missing_fields = [field for field in required_fields if data.get(field) is None]
+        if missing_fields:
+            return jsonify({'error': f'Missing required fields: {", ".join(missing_fields)}'}), 400
+        
+        result = presentations_service.presign_image_upload(
+            sha256=data['sha256'],
+            byte_size=data['size'],
+            file_extension=_image_extension(data['filename']),
+            content_type=data['content_type']
+        )
+        if result['deduplicated']:
+            # Nothing to upload; the image still needs an orphan check like any upload
+            _schedule_image_jobs(result)
+            result = presentations_service.s3_service.sign_urls(result)
+        return jsonify(result), 200
+        
+    except Exception as e:
+        logger.error(f"Presign image upload error: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/upload/image/complete', methods=['POST'])
+@require_auth
+def complete_image_upload():
+    try:
+        data = request.get_json()
+        if not data.get('sha256') or not data.get('filename'):
+            return jsonify({'error': 'Missing required fields: sha256, filename'}), 400
+        
+        stored = presentations_service.complete_image_upload(data['sha256'], _image_extension(data['filename']))
+        _schedule_image_jobs(stored)
+        
+        return jsonify(presentations_service.s3_service.sign_urls({
+            'success': True,
+            'image_url': stored['image_url'],
+            'deduplicated': stored['deduplicated']
+        })), 201
+        
+    except Exception as e:
+        logger.error(f"Complete image upload error: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/slides/<int:slide_id>/elements/image', methods=['POST'])
+@require_owner('slide', 'slide_id')
 def create_image_element(slide_id):
     try:
         data = request.get_json()
@@ -394,12 +916,16 @@ def create_image_element(slide_id):
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/elements/<int:element_id>', methods=['PUT'])
+@require_owner('element', 'element_id')
 def update_element(element_id):
     try:
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided for update'}), 400
         
+        # Write any queued drag updates first so they cannot land after this one
+        collaboration_service.coalescer.flush()
+        
         # Update element based on its type
         if data.get('element_type') == 'text':
             element = presentations_service.update_text_element(
@@ -444,9 +970,66 @@ def update_element(element_id):
         logger.error(f"Error updating element: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/elements/<int:element_id>/geometry', methods=['PATCH'])
+@require_owner('element', 'element_id')
+def update_element_geometry(element_id):
+    try:
+        data = request.get_json()
+        error = _geometry_error(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        geometry = collaboration_service.queue_geometry(element_id, data)
+        return jsonify({
+            'success': True,
+            'element_id': element_id,
+            'geometry': geometry
+        }), 202
+            
+    except Exception as e:
+        logger.error(f"Error updating element geometry: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/elements/geometry', methods=['PATCH'])
+@require_auth
+def update_elements_geometry():
+    try:
+        data = request.get_json()
+        updates = data.get('updates') if data else None
+        if not isinstance(updates, list) or not updates:
+            return jsonify({'error': 'Missing required field: updates'}), 400
+        
+        for index, update in enumerate(updates):
+            error = _geometry_error(update)
+            if not error and not isinstance(update.get('element_id'), int):
+                error = 'element_id must be an integer'
+            if error:
+                return jsonify({'error': f'Update {index}: {error}'}), 400
+        
+        # Owners of elements seen before come from memory, so this stays cheap for drags
+        for index, update in enumerate(updates):
+            owner = presentations_service.get_owner('element', update['element_id'])
+            if owner is None:
+                return jsonify({'error': f'Update {index}: Element not found'}), 404
+            if owner != g.user_id:
+                return jsonify({'error': f'Update {index}: Not allowed to access this element'}), 403
+        
+        for update in updates:
+            collaboration_service.queue_geometry(update['element_id'], update)
+        return jsonify({
+            'success': True,
+            'queued': len(updates)
+        }), 202
+            
+    except Exception as e:
+        logger.error(f"Error updating elements geometry: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/elements/<int:element_id>', methods=['DELETE'])
+@require_owner('element', 'element_id')
 def delete_element(element_id):
     try:
+        collaboration_service.coalescer.discard(element_id)
         success = presentations_service.delete_element(element_id)
         if success:
             return jsonify({'success': True}), 200
@@ -458,4 +1041,4 @@ def delete_element(element_id):
         return jsonify({'error': str(e)}), 400
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True) 
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5001, debug=True) 
\ No newline at end of file
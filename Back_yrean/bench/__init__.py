@@ -0,0 +1,13 @@
+# Shared by the seed script and the load driver; the driver itself only needs the standard library
+
+# Every seeded user is bench_user_<n> with this password
+USERNAME_PREFIX = 'bench_user_'
+BENCH_PASSWORD = 'bench-password'
+
+# Titles and text are drawn from this vocabulary, so search queries built from it have matches
+WORDS = [
+    'quarterly', 'roadmap', 'revenue', 'growth', 'design', 'review', 'launch', 'customer', 'pipeline',
+    'strategy', 'hiring', 'budget', 'forecast', 'marketing', 'product', 'retention', 'platform', 'security',
+    'onboarding', 'research', 'metrics', 'latency', 'partners', 'pricing', 'summary', 'timeline', 'risks',
+    'architecture', 'migration', 'analytics', 'support', 'operations', 'feedback', 'vision', 'goals', 'team'
+]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import argparse
+from bench.report import diff
+
+
+def _format(value) -> str:
+    return '-' if value is None else f"{value:g}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark results; exits 1 on a regression.")
+    parser.add_argument('baseline', help="result JSON of the reference run")
+    parser.add_argument('current', help="result JSON of the run to check")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="percent a latency may grow or throughput drop before it counts as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = diff(baseline, current, args.threshold)
+    print(f"{'endpoint':<24} {'metric':<15} {'baseline':>12} {'current':>12} {'change':>9}")
+    for row in rows:
+        change = '-' if row['change_percent'] is None else f"{row['change_percent']:+.1f}%"
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['endpoint']:<24} {row['metric']:<15} {_format(row['baseline']):>12} "
+              f"{_format(row['current']):>12} {change:>9}{flag}")
+
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:g}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
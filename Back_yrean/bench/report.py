@@ -0,0 +1,88 @@
+import math
+from typing import Any, Dict, List, Optional
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    """
+    Summarize one endpoint's samples.
+
+    Args:
+        latencies: Response times in seconds of every request, failed ones included
+        errors: How many of the requests failed
+        seconds: Length of the measured period
+
+    Returns:
+        Dict with requests, errors, throughput_rps and latency_ms (p50, p95, p99, mean, max)
+    """
+    values = sorted(latencies)
+    latency = {f"p{p}": _ms(percentile(values, p)) for p in PERCENTILES}
+    latency['mean'] = _ms(sum(values) / len(values)) if values else None
+    latency['max'] = _ms(values[-1]) if values else None
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / seconds, 2) if seconds > 0 else None,
+        'latency_ms': latency
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def diff(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare two benchmark results endpoint by endpoint.
+
+    Latency percentiles that grew, and throughput that dropped, by more than
+    threshold percent are flagged as regressions. Endpoints present in only
+    one of the results are listed with None on the other side.
+
+    Returns:
+        One dict per endpoint and metric: endpoint, metric, baseline, current, change_percent, regression
+    """
+    rows = []
+    endpoints = list(baseline['endpoints']) + [name for name in current['endpoints'] if name not in baseline['endpoints']]
+    for endpoint in endpoints:
+        before = baseline['endpoints'].get(endpoint)
+        after = current['endpoints'].get(endpoint)
+        metrics = [('throughput_rps', False)] + [(f"p{p}", True) for p in PERCENTILES] + [('errors', True)]
+        for metric, lower_is_better in metrics:
+            old = _metric(before, metric)
+            new = _metric(after, metric)
+            change = None
+            if old is not None and new is not None and old != 0:
+                change = round((new - old) / old * 100, 1)
+            if metric == 'errors':
+                regression = (new or 0) > (old or 0)
+            elif change is None:
+                regression = False
+            else:
+                regression = change > threshold if lower_is_better else change < -threshold
+            rows.append({
+                'endpoint': endpoint,
+                'metric': metric,
+                'baseline': old,
+                'current': new,
+                'change_percent': change,
+                'regression': regression
+            })
+    return rows
+
+
+def _metric(result: Optional[Dict[str, Any]], metric: str) -> Optional[float]:
+    if result is None:
+        return None
+    if metric in result:
+        return result[metric]
+    return result['latency_ms'].get(metric)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+import json
+import time
+import random
+import socket
+import logging
+import argparse
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, quote
+from bench.report import summarize
+from bench import USERNAME_PREFIX, BENCH_PASSWORD, WORDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Relative frequency of each scenario in the request mix
+SCENARIO_WEIGHTS = {
+    'list_presentations': 15,
+    'get_presentation': 10,
+    'revalidate_presentation': 10,
+    'full_presentation_range': 10,
+    'slide_elements': 20,
+    'search': 10,
+    'changes': 5,
+    'update_text_element': 10,
+    'patch_geometry': 10
+}
+# Presentations each client opens during setup, and slides it loads per presentation
+DECKS_PER_CLIENT = 3
+SLIDES_PER_RANGE = 5
+
+
+class BenchError(Exception):
+    """Raised when a client cannot be set up against the server."""
+
+
+class Client:
+    """One simulated user with a keep-alive connection, driving the API from a single thread."""
+
+    def __init__(self, base_url: str, username: str, rng: random.Random, timeout: float = 30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.username = username
+        self.rng = rng
+        self.timeout = timeout
+        self.connection = None
+        self.token = None
+        self.user_id = None
+        self.presentations = {}
+        self.slides = []
+        self.text_elements = []
+        self.elements = []
+        self.etags = {}
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        """Send one request, reconnecting once if the kept-alive connection was dropped; returns (status, headers, body)."""
+        headers = dict(headers or {})
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.headers, response.read()
+            except (http.client.HTTPException, ConnectionError, socket.timeout):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def _json(self, method: str, path: str, body=None):
+        status, _, data = self.request(method, path, body)
+        if status >= 400:
+            raise BenchError(f"{method} {path} returned {status}: {data[:200]!r}")
+        return json.loads(data)
+
+    def setup(self) -> None:
+        """Log in and load the presentations, slides and elements the scenarios work on."""
+        login = self._json('POST', '/api/auth/login', {'username': self.username, 'password': BENCH_PASSWORD})
+        self.token = login['access_token']
+        self.user_id = login['user']['user_id']
+        page = self._json('GET', f"/api/user/{self.user_id}/presentations")
+        presentations = page['presentations'] or []
+        if not presentations:
+            raise BenchError(f"{self.username} has no presentations; run bench.seed first")
+        for presentation in presentations[:DECKS_PER_CLIENT]:
+            presentation_id = presentation['presentation_id']
+            full = self._json('GET', f"/api/presentations/{presentation_id}/full?start=1&end={SLIDES_PER_RANGE}")
+            self.presentations[presentation_id] = {
+                'revision': full['presentation'].get('revision') or 0,
+                'slide_count': presentation.get('slide_count') or SLIDES_PER_RANGE
+            }
+            for slide in full['presentation']['slides'] or []:
+                self.slides.append(slide['slide_id'])
+                for element in slide['elements']:
+                    self.elements.append(element['element_id'])
+                    if element['element_type'] == 'text':
+                        self.text_elements.append(element['element_id'])
+        if not self.slides or not self.text_elements:
+            raise BenchError(f"{self.username}'s presentations have no slides or text elements")
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+
+    # Scenarios; each sends one request and returns its status
+
+    def list_presentations(self) -> int:
+        return self.request('GET', f"/api/user/{self.user_id}/presentations")[0]
+
+    def get_presentation(self) -> int:
+        presentation_id = self.rng.choice(list(self.presentations))
+        status, headers, _ = self.request('GET', f"/api/presentations/{presentation_id}")
+        if headers.get('ETag'):
+            self.etags[presentation_id] = headers['ETag']
+        return status
+
+    def revalidate_presentation(self) -> int:
+        """Conditional GET, answered with 304 until the presentation changes."""
+        presentation_id = self.rng.choice(list(self.presentations))
+        headers = {'If-None-Match': self.etags[presentation_id]} if presentation_id in self.etags else {}
+        status, response_headers, _ = self.request('GET', f"/api/presentations/{presentation_id}", headers=headers)
+        if response_headers.get('ETag'):
+            self.etags[presentation_id] = response_headers['ETag']
+        return status
+
+    def full_presentation_range(self) -> int:
+        presentation_id = self.rng.choice(list(self.presentations))
+        slide_count = self.presentations[presentation_id]['slide_count']
+        start = self.rng.randint(1, max(1, slide_count - SLIDES_PER_RANGE + 1))
+        return self.request('GET', f"/api/presentations/{presentation_id}/full"
+                                   f"?start={start}&end={start + SLIDES_PER_RANGE - 1}")[0]
+
+    def slide_elements(self) -> int:
+        return self.request('GET', f"/api/slides/{self.rng.choice(self.slides)}/elements")[0]
+
+    def search(self) -> int:
+        query = quote(' '.join(self.rng.sample(WORDS, 2)))
+        return self.request('GET', f"/api/user/{self.user_id}/search?q={query}")[0]
+
+    def changes(self) -> int:
+        presentation_id = self.rng.choice(list(self.presentations))
+        since = self.presentations[presentation_id]['revision']
+        status, _, data = self.request('GET', f"/api/presentations/{presentation_id}/changes?since={since}")
+        if status == 200:
+            self.presentations[presentation_id]['revision'] = json.loads(data).get('revision', since)
+        return status
+
+    def update_text_element(self) -> int:
+        element_id = self.rng.choice(self.text_elements)
+        content = ' '.join(self.rng.choice(WORDS) for _ in range(8))
+        return self.request('PUT', f"/api/elements/{element_id}", {'element_type': 'text', 'content': content})[0]
+
+    def patch_geometry(self) -> int:
+        element_id = self.rng.choice(self.elements)
+        geometry = {'x_position': self.rng.randint(0, 1000), 'y_position': self.rng.randint(0, 600)}
+        return self.request('PATCH', f"/api/elements/{element_id}/geometry", geometry)[0]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(base_url: str, clients: int, users: int, duration: float, warmup: float, seed: int) -> dict:
+    """
+    Drive the server with concurrent clients and summarize every scenario.
+
+    Each client logs in as its own bench user, then sends requests back to
+    back, picking scenarios by SCENARIO_WEIGHTS, for warmup plus duration
+    seconds; only requests started after the warmup are measured.
+    """
+    setup_rng = random.Random(seed)
+    usernames = [f"{USERNAME_PREFIX}{n}" for n in setup_rng.sample(range(1, users + 1), min(clients, users))]
+    pool = [Client(base_url, usernames[index % len(usernames)], random.Random(seed + index))
+            for index in range(clients)]
+    for client in pool:
+        client.setup()
+    logger.info(f"{clients} clients ready; warming up for {warmup:g}s, measuring for {duration:g}s")
+
+    scenarios = list(SCENARIO_WEIGHTS)
+    weights = [SCENARIO_WEIGHTS[name] for name in scenarios]
+    samples = {name: [] for name in scenarios}
+    errors = {name: 0 for name in scenarios}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    def work(client: Client):
+        latencies = {name: [] for name in scenarios}
+        failed = {name: 0 for name in scenarios}
+        while True:
+            name = client.rng.choices(scenarios, weights)[0]
+            request_started = time.perf_counter()
+            if request_started >= deadline:
+                break
+            try:
+                ok = getattr(client, name)() < 400
+            except Exception as e:
+                logger.warning(f"{name} failed: {str(e)}")
+                ok = False
+            if request_started >= measure_from:
+                latencies[name].append(time.perf_counter() - request_started)
+                if not ok:
+                    failed[name] += 1
+        with lock:
+            for name in scenarios:
+                samples[name].extend(latencies[name])
+                errors[name] += failed[name]
+
+    threads = [threading.Thread(target=work, args=(client,), daemon=True) for client in pool]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for client in pool:
+        client.close()
+
+    return {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'git_commit': _git_commit(),
+            'base_url': base_url,
+            'clients': clients,
+            'duration_seconds': duration,
+            'warmup_seconds': warmup,
+            'seed': seed,
+            'scenario_weights': SCENARIO_WEIGHTS
+        },
+        'endpoints': {name: summarize(samples[name], errors[name], duration) for name in scenarios},
+        'total': summarize([value for name in scenarios for value in samples[name]],
+                           sum(errors.values()), duration)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the REST API and write per-endpoint latency percentiles.")
+    parser.add_argument('--base-url', default='http://localhost:5001')
+    parser.add_argument('--clients', type=int, default=32, help="concurrent clients, one thread each")
+    parser.add_argument('--users', type=int, default=1000, help="bench users seeded, clients log in as a sample of them")
+    parser.add_argument('--duration', type=float, default=60, help="measured seconds")
+    parser.add_argument('--warmup', type=float, default=5, help="unmeasured seconds before the measurement")
+    parser.add_argument('--seed', type=int, default=1, help="random seed, so runs replay the same request mix")
+    parser.add_argument('--output', help="write the result JSON here instead of stdout")
+    args = parser.parse_args()
+
+    result = run(args.base_url, args.clients, args.users, args.duration, args.warmup, args.seed)
+    for name, summary in list(result['endpoints'].items()) + [('total', result['total'])]:
+        latency = summary['latency_ms']
+        logger.info(f"{name:<24} {summary['throughput_rps']:>8} rps  p50 {latency['p50']} ms  "
+                    f"p95 {latency['p95']} ms  p99 {latency['p99']} ms  errors {summary['errors']}")
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
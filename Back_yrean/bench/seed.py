@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import time
+import logging
+import argparse
+from PIL import Image
+from services.db_pool import get_pool
+from services.password_hasher import get_password_hasher
+from services.s3_service import S3Service
+from services.presentations_service import SEARCH_CONFIG, SEARCH_DOCUMENTS_SELECT_SQL
+from bench import USERNAME_PREFIX, BENCH_PASSWORD, WORDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def word(expression: str, offset: int = 0) -> str:
+    """SQL picking a vocabulary word deterministically from an integer expression."""
+    return f"(%(words)s::text[])[1 + (({expression})::bigint * 2654435761 + {offset}) %% {len(WORDS)}]"
+
+
+def sentence(expression: str, length: int) -> str:
+    """SQL joining length vocabulary words picked from an integer expression."""
+    return " || ' ' || ".join(word(expression, offset * 7919) for offset in range(length))
+
+
+def reset_database(conn) -> None:
+    """Drop every table and apply all migrations from scratch."""
+    with conn.cursor() as cur:
+        cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    conn.commit()
+    # Imported here because migrate reads DATABASE_URL when it is imported
+    from migrate import run_migrations
+    run_migrations()
+
+
+def upload_images(s3_service: S3Service, count: int) -> list:
+    """Store count distinct PNGs in the bucket (creating it if needed) and return their URLs."""
+    client = s3_service.s3_client
+    try:
+        client.head_bucket(Bucket=s3_service.bucket_name)
+    except Exception:
+        client.create_bucket(Bucket=s3_service.bucket_name)
+    urls = []
+    for index in range(count):
+        image = Image.new('RGB', (1280, 720), ((index * 53) % 256, (index * 97) % 256, (index * 193) % 256))
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        file_name = f"bench_{index}.png"
+        client.put_object(Bucket=s3_service.bucket_name, Key=f"images/{file_name}",
+                          Body=buffer.getvalue(), ContentType='image/png')
+        urls.append(s3_service.image_url(file_name))
+    return urls
+
+
+def seed_users(cur, count: int) -> list:
+    """Create bench users (existing ones are kept) and return their IDs."""
+    password_hash = get_password_hasher().hash(BENCH_PASSWORD)
+    cur.execute("""
+        INSERT INTO users (username, email, password_hash)
+        SELECT %(prefix)s || g, %(prefix)s || g || '@bench.invalid', %(hash)s
+        FROM generate_series(1, %(count)s) g
+        ON CONFLICT (username) DO NOTHING
+    """, {'prefix': USERNAME_PREFIX, 'hash': password_hash, 'count': count})
+    cur.execute("""
+        SELECT user_id FROM users
+        WHERE username = ANY(ARRAY(SELECT %(prefix)s || g FROM generate_series(1, %(count)s) g))
+        ORDER BY user_id
+    """, {'prefix': USERNAME_PREFIX, 'count': count})
+    return [row['user_id'] for row in cur.fetchall()]
+
+
+def seed_presentations(cur, user_ids: list, count: int, slides: int) -> list:
+    """Create count presentations spread evenly over the users, updated over the past year."""
+    cur.execute(f"""
+        INSERT INTO presentations (user_id, title, description, revision, slide_count, created_at, updated_at)
+        SELECT (%(user_ids)s::int[])[1 + (g - 1) %% array_length(%(user_ids)s::int[], 1)],
+               {sentence('g', 3)},
+               {sentence('g + 1', 12)},
+               1, %(slides)s,
+               NOW() - (g %% 525600) * INTERVAL '1 minute',
+               NOW() - (g %% 525600) * INTERVAL '1 minute'
+        FROM generate_series(1, %(count)s) g
+        RETURNING presentation_id
+    """, {'user_ids': user_ids, 'count': count, 'slides': slides, 'words': WORDS})
+    return sorted(row['presentation_id'] for row in cur.fetchall())
+
+
+def seed_deck_contents(cur, presentation_ids: list, slides: int, elements: int, image_urls: list) -> int:
+    """Create slides, text and image elements and search entries for a batch of presentations."""
+    cur.execute(f"""
+        INSERT INTO slides (presentation_id, slide_number, title, background_color,
+                            background_image_fit, background_image_opacity)
+        SELECT p, n, {sentence('p * 131 + n', 2)}, '#FFFFFF', 'cover', 1
+        FROM unnest(%(presentation_ids)s::int[]) p
+        CROSS JOIN generate_series(1, %(slides)s) n
+    """, {'presentation_ids': presentation_ids, 'slides': slides, 'words': WORDS})
+    # Every fifth element is an image, the rest are text boxes spread over the 1280x720 canvas
+    cur.execute(f"""
+        WITH new_elements AS (
+            INSERT INTO slide_elements (slide_id, element_type, x_position, y_position, width, height, z_index)
+            SELECT s.slide_id,
+                   CASE WHEN e %% 5 = 0 THEN 'image' ELSE 'text' END,
+                   (s.slide_id * 37 + e * 61) %% 1000, (s.slide_id * 17 + e * 43) %% 600,
+                   240, 80, e
+            FROM slides s
+            CROSS JOIN generate_series(1, %(elements)s) e
+            WHERE s.presentation_id = ANY(%(presentation_ids)s)
+            RETURNING element_id, element_type
+        ), text_rows AS (
+            INSERT INTO text_elements (element_id, content)
+            SELECT element_id, {sentence('element_id', 8)}
+            FROM new_elements WHERE element_type = 'text'
+        )
+        INSERT INTO image_elements (element_id, image_url, alt_text)
+        SELECT element_id, (%(image_urls)s::text[])[1 + element_id %% array_length(%(image_urls)s::text[], 1)], 'Bench image'
+        FROM new_elements WHERE element_type = 'image'
+    """, {'presentation_ids': presentation_ids, 'elements': elements, 'image_urls': image_urls, 'words': WORDS})
+
+    cur.execute("""
+        SELECT ARRAY(SELECT slide_id FROM slides WHERE presentation_id = ANY(%(ids)s)) AS slide_ids,
+               ARRAY(SELECT se.element_id FROM slide_elements se
+                     JOIN slides s ON s.slide_id = se.slide_id
+                     WHERE s.presentation_id = ANY(%(ids)s) AND se.element_type = 'text') AS element_ids
+    """, {'ids': presentation_ids})
+    row = cur.fetchone()
+    cur.execute(f"""
+        INSERT INTO search_documents
+        (entity_type, entity_id, user_id, presentation_id, slide_id, element_id, body, document)
+        {SEARCH_DOCUMENTS_SELECT_SQL}
+    """, {
+        'config': SEARCH_CONFIG,
+        'presentation_ids': presentation_ids,
+        'slide_ids': row['slide_ids'],
+        'element_ids': row['element_ids']
+    })
+    return len(row['slide_ids'])
+
+
+def seed(users: int, decks: int, slides: int, elements: int, images: int, batch_size: int, reset: bool) -> dict:
+    """Seed the database and bucket; returns what was created."""
+    started = time.monotonic()
+    pool = get_pool()
+    if reset:
+        with pool.connection() as conn:
+            reset_database(conn)
+
+    image_urls = upload_images(S3Service(), images)
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            user_ids = seed_users(cur, users)
+            presentation_ids = seed_presentations(cur, user_ids, decks, slides)
+        conn.commit()
+    logger.info(f"Created {len(user_ids)} users and {len(presentation_ids)} presentations")
+
+    for start in range(0, len(presentation_ids), batch_size):
+        batch = presentation_ids[start:start + batch_size]
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                seed_deck_contents(cur, batch, slides, elements, image_urls)
+            conn.commit()
+        done = start + len(batch)
+        elapsed = time.monotonic() - started
+        logger.info(f"Seeded {done}/{len(presentation_ids)} presentations ({elapsed:.0f}s, "
+                    f"~{elapsed / done * (len(presentation_ids) - done):.0f}s left)")
+
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            # Reference counts as the services would have kept them
+            cur.execute("""
+                INSERT INTO image_blobs (image_url, ref_count)
+                SELECT image_url, COUNT(*) FROM image_elements
+                WHERE image_url = ANY(%s)
+                GROUP BY image_url
+                ON CONFLICT (image_url) DO UPDATE SET ref_count = EXCLUDED.ref_count
+            """, (image_urls,))
+        conn.commit()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+        conn.autocommit = False
+
+    return {
+        'users': len(user_ids),
+        'presentations': len(presentation_ids),
+        'slides': len(presentation_ids) * slides,
+        'elements': len(presentation_ids) * slides * elements,
+        'images': len(image_urls),
+        'seconds': round(time.monotonic() - started, 1)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed synthetic users, decks, slides and elements for benchmarks.")
+    parser.add_argument('--reset', action='store_true', help="drop all tables and re-apply the migrations first")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--decks', type=int, default=10000, help="presentations, spread evenly over the users")
+    parser.add_argument('--slides', type=int, default=50, help="slides per presentation")
+    parser.add_argument('--elements', type=int, default=20, help="elements per slide (every fifth is an image)")
+    parser.add_argument('--images', type=int, default=20, help="distinct images uploaded and shared by image elements")
+    parser.add_argument('--batch-size', type=int, default=50, help="presentations filled per transaction")
+    args = parser.parse_args()
+
+    print(json.dumps(seed(args.users, args.decks, args.slides, args.elements, args.images,
+                          args.batch_size, args.reset), indent=2))
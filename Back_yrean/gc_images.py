@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import argparse
+from services.presentations_service import PresentationsService
+from services.job_handlers import ORPHAN_GRACE_SECONDS
+from services.image_gc import ImageGarbageCollector
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def report_progress(report):
+    logger.info(
+        f"Page {report['pages']}: scanned {report['scanned']}, recent {report['recent']}, "
+        f"referenced {report['referenced']}, "
+        f"{'would delete' if report['dry_run'] else 'deleted'} "
+        f"{report['would_delete'] if report['dry_run'] else report['deleted']}, "
+        f"errors {report['errors']} ({report['elapsed_seconds']:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete images in the S3 bucket that nothing references.")
+    parser.add_argument('--dry-run', action='store_true', help="only report what would be deleted")
+    parser.add_argument('--grace-seconds', type=float, default=ORPHAN_GRACE_SECONDS,
+                        help="keep objects younger than this (defaults to JOB_ORPHAN_GRACE_SECONDS)")
+    parser.add_argument('--page-size', type=int, default=1000, help="keys listed and checked per batch")
+    args = parser.parse_args()
+
+    presentations_service = PresentationsService()
+    collector = ImageGarbageCollector(
+        presentations_service.s3_service,
+        presentations_service,
+        grace_seconds=args.grace_seconds,
+        dry_run=args.dry_run,
+        page_size=args.page_size,
+        progress=report_progress
+    )
+    print(json.dumps(collector.run(), indent=2))
@@ -0,0 +1,13 @@
+-- Migration: make_slide_number_unique_deferrable
+-- Created at: 2026-10-16T22:27:55.787331 UTC
+
+-- Unique constraints cannot be altered in place, so recreate it under the same
+-- name as DEFERRABLE. It stays immediate by default; reordering slides defers it
+-- for the duration of a single transaction.
+ALTER TABLE slides
+  DROP CONSTRAINT IF EXISTS slides_presentation_id_slide_number_key;
+
+ALTER TABLE slides
+  ADD CONSTRAINT slides_presentation_id_slide_number_key
+  UNIQUE (presentation_id, slide_number)
+  DEFERRABLE INITIALLY IMMEDIATE;
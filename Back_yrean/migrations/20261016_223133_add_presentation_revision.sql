@@ -0,0 +1,10 @@
+-- Migration: add_presentation_revision
+-- Created at: 2026-10-16T22:31:33.177933 UTC
+
+-- Monotonic counter bumped by every slide or element write, used as a cheap
+-- version marker for conditional GETs
+ALTER TABLE presentations
+ADD COLUMN revision BIGINT NOT NULL DEFAULT 0;
+
+-- Backs the per-user listing version check
+CREATE INDEX IF NOT EXISTS idx_presentations_user_id ON presentations (user_id);
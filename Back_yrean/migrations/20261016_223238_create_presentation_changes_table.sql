@@ -0,0 +1,18 @@
+-- Migration: create_presentation_changes_table
+-- Created at: 2026-10-16T22:32:38.685081 UTC
+
+-- Append-only log of slide and element writes, one row per changed entity per
+-- revision, used to answer "what changed since revision N"
+CREATE TABLE presentation_changes (
+    change_id BIGSERIAL PRIMARY KEY,
+    presentation_id INTEGER NOT NULL REFERENCES presentations(presentation_id) ON DELETE CASCADE,
+    revision BIGINT NOT NULL,
+    entity_type VARCHAR(20) NOT NULL CHECK (entity_type IN ('presentation', 'slide', 'element')),
+    entity_id INTEGER NOT NULL,
+    slide_id INTEGER,
+    operation VARCHAR(10) NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_presentation_changes_revision ON presentation_changes (presentation_id, revision);
+CREATE INDEX idx_presentation_changes_changed_at ON presentation_changes (changed_at);
@@ -0,0 +1,13 @@
+-- Migration: create_image_assets_table
+-- Created at: 2026-10-16T22:39:42.108974 UTC
+
+-- Derivatives generated for an uploaded image, keyed by the original's URL.
+-- variants holds one {width, height, format, content_type, url, bytes} object per file.
+CREATE TABLE image_assets (
+    image_url TEXT PRIMARY KEY,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    manifest_url TEXT NOT NULL,
+    variants JSONB NOT NULL DEFAULT '[]',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -0,0 +1,20 @@
+-- Migration: create_jobs_table
+-- Created at: 2026-10-16T22:41:54.949679 UTC
+
+-- Durable background jobs (S3 deletes, image derivatives, orphan cleanup).
+-- Finished jobs are deleted; jobs that exhaust max_attempts stay with status 'failed'.
+CREATE TABLE jobs (
+    job_id BIGSERIAL PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    locked_at TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_jobs_runnable ON jobs (status, run_at);
@@ -0,0 +1,6 @@
+-- Migration: add_image_url_indexes
+-- Created at: 2026-10-16T22:43:10.534592 UTC
+
+-- Reference checks before deleting an uploaded image look images up by URL
+CREATE INDEX idx_image_elements_image_url ON image_elements (image_url);
+CREATE INDEX idx_slides_background_image_url ON slides (background_image_url) WHERE background_image_url IS NOT NULL;
@@ -0,0 +1,28 @@
+-- Migration: create_image_blobs_table
+-- Created at: 2026-10-16T22:44:10.248537 UTC
+
+-- One row per stored image. Uploads are keyed by the SHA-256 of their content,
+-- so identical uploads share a row; ref_count counts the image elements and
+-- slide backgrounds using the image. Rows from before content addressing have
+-- no hash.
+CREATE TABLE image_blobs (
+    image_url TEXT PRIMARY KEY,
+    sha256 CHAR(64) UNIQUE,
+    byte_size BIGINT,
+    content_type VARCHAR(100),
+    ref_count INTEGER NOT NULL DEFAULT 0 CHECK (ref_count >= 0),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_image_blobs_unreferenced ON image_blobs (updated_at) WHERE ref_count = 0;
+
+-- Count the references that already exist
+INSERT INTO image_blobs (image_url, ref_count)
+SELECT image_url, COUNT(*)
+FROM (
+    SELECT image_url FROM image_elements WHERE image_url IS NOT NULL
+    UNION ALL
+    SELECT background_image_url FROM slides WHERE background_image_url IS NOT NULL
+) refs
+GROUP BY image_url;
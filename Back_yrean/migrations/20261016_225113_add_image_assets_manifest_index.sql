@@ -0,0 +1,5 @@
+-- Migration: add_image_assets_manifest_index
+-- Created at: 2026-10-16T22:51:13.372121 UTC
+
+-- The image garbage collector maps derivatives and manifests to their original through the manifest URL
+CREATE INDEX idx_image_assets_manifest_url ON image_assets (manifest_url);
@@ -0,0 +1,17 @@
+-- Migration: add_presentation_slide_count_and_listing_index
+-- Created at: 2026-10-16T22:52:30.084479 UTC
+
+-- Slide count maintained by slide inserts and deletes, so the listing needs no aggregate
+ALTER TABLE presentations
+ADD COLUMN slide_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE presentations p
+SET slide_count = (SELECT COUNT(*) FROM slides s WHERE s.presentation_id = p.presentation_id);
+
+-- The listing pages by (updated_at, presentation_id), which must never be NULL
+UPDATE presentations SET updated_at = COALESCE(created_at, NOW()) WHERE updated_at IS NULL;
+ALTER TABLE presentations ALTER COLUMN updated_at SET NOT NULL;
+
+-- Backs the keyset-paginated listing; its user_id prefix also serves the listing version check
+CREATE INDEX idx_presentations_user_updated ON presentations (user_id, updated_at DESC, presentation_id DESC);
+DROP INDEX IF EXISTS idx_presentations_user_id;
@@ -0,0 +1,16 @@
+-- Migration: add_presentation_thumbnails
+-- Created at: 2026-10-16T22:54:55.026772 UTC
+
+-- Thumbnail of each presentation's first slide, rendered in the background.
+-- thumbnail_revision is the revision it was rendered from; thumbnail_queued_at
+-- is set while a render job is waiting, so a burst of edits queues one job.
+ALTER TABLE presentations
+ADD COLUMN thumbnail_url TEXT,
+ADD COLUMN thumbnail_revision BIGINT,
+ADD COLUMN thumbnail_queued_at TIMESTAMP WITH TIME ZONE;
+
+-- Render thumbnails for the presentations that already exist
+UPDATE presentations SET thumbnail_queued_at = NOW();
+INSERT INTO jobs (job_type, payload)
+SELECT 'render_thumbnail', json_build_object('presentation_id', presentation_id)
+FROM presentations;
@@ -0,0 +1,45 @@
+-- Migration: create_search_documents_table
+-- Created at: 2026-10-16T22:59:01.136388 UTC
+
+-- btree_gin lets one GIN index cover (user_id, document), so a search only reads the user's own entries
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- One searchable entry per presentation (title and description), slide title and text element.
+-- Entries carry the owning user so searches never touch other users' rows.
+CREATE TABLE search_documents (
+    entity_type VARCHAR(20) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    presentation_id INTEGER NOT NULL REFERENCES presentations(presentation_id) ON DELETE CASCADE,
+    slide_id INTEGER REFERENCES slides(slide_id) ON DELETE CASCADE,
+    element_id INTEGER REFERENCES slide_elements(element_id) ON DELETE CASCADE,
+    body TEXT NOT NULL,
+    document TSVECTOR NOT NULL,
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+CREATE INDEX idx_search_documents_user_document ON search_documents USING GIN (user_id, document);
+CREATE INDEX idx_search_documents_slide_id ON search_documents (slide_id);
+CREATE INDEX idx_search_documents_element_id ON search_documents (element_id);
+
+-- Index everything that already exists
+INSERT INTO search_documents (entity_type, entity_id, user_id, presentation_id, slide_id, element_id, body, document)
+SELECT 'presentation', p.presentation_id, p.user_id, p.presentation_id, NULL, NULL,
+       concat_ws(E'\n', p.title, p.description),
+       setweight(to_tsvector('english', p.title), 'A') ||
+       setweight(to_tsvector('english', COALESCE(p.description, '')), 'B')
+FROM presentations p
+UNION ALL
+SELECT 'slide', s.slide_id, p.user_id, p.presentation_id, s.slide_id, NULL,
+       s.title, setweight(to_tsvector('english', s.title), 'B')
+FROM slides s
+JOIN presentations p ON p.presentation_id = s.presentation_id
+WHERE COALESCE(s.title, '') <> ''
+UNION ALL
+SELECT 'element', te.element_id, p.user_id, p.presentation_id, s.slide_id, te.element_id,
+       te.content, setweight(to_tsvector('english', te.content), 'C')
+FROM text_elements te
+JOIN slide_elements se ON se.element_id = te.element_id
+JOIN slides s ON s.slide_id = se.slide_id
+JOIN presentations p ON p.presentation_id = s.presentation_id
+WHERE te.content <> '';
@@ -0,0 +1,14 @@
+-- Migration: create_revoked_tokens_table
+-- Created at: 2026-10-16T23:08:49.425165 UTC
+
+-- Access and refresh tokens revoked before they expire (logout, used refresh
+-- tokens). Every process mirrors the unexpired rows into memory, so checking a
+-- token never queries this table; rows are pruned once the token has expired.
+CREATE TABLE revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_revoked_tokens_revoked_at ON revoked_tokens (revoked_at);
+CREATE INDEX idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
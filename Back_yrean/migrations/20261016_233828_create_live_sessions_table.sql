@@ -0,0 +1,19 @@
+-- Migration: create_live_sessions_table
+-- Created at: 2026-10-16T23:38:28.014548 UTC
+
+-- Presenter-led play sessions. Any worker may receive a session's requests and
+-- socket joins, so the state lives here rather than in the worker that started
+-- it; the deck is serialized once at start and never changes.
+CREATE TABLE live_sessions (
+    session_id VARCHAR(32) PRIMARY KEY,
+    presentation_id INTEGER NOT NULL REFERENCES presentations(presentation_id) ON DELETE CASCADE,
+    presenter_key VARCHAR(32) NOT NULL,
+    revision BIGINT NOT NULL,
+    total_slides INTEGER NOT NULL,
+    deck TEXT NOT NULL,
+    current_slide INTEGER NOT NULL DEFAULT 0,
+    viewers INTEGER NOT NULL DEFAULT 0,
+    last_activity TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_live_sessions_last_activity ON live_sessions (last_activity);
@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import hashlib
+import secrets
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from itsdangerous import URLSafeSerializer, BadSignature
+from dotenv import load_dotenv
+from services.cache import LRUCache
+from services.db_pool import get_pool
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_TTL = int(os.getenv('AUTH_ACCESS_TOKEN_TTL', '900'))
+REFRESH_TOKEN_TTL = int(os.getenv('AUTH_REFRESH_TOKEN_TTL', '86400'))
+CLAIMS_CACHE_ENTRIES = int(os.getenv('AUTH_CLAIMS_CACHE_ENTRIES', '10000'))
+# How often each process picks up tokens revoked by other processes
+REVOCATION_SYNC_INTERVAL = float(os.getenv('AUTH_REVOCATION_SYNC_INTERVAL', '5'))
+# Revocations are re-read with this much overlap, so rows committed out of order are not missed
+REVOCATION_SYNC_OVERLAP = 60
+REVOCATION_PRUNE_INTERVAL = 3600
+
+
+class AuthError(Exception):
+    """Raised when a token is missing, malformed, expired or revoked."""
+
+
+class PostgresRevocationStore:
+    """
+    Revoked token IDs in the revoked_tokens table, shared by every process.
+
+    The pool is looked up on every call, so a worker forked after the store
+    was built gets its own connections.
+    """
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        """Record a revocation; returns False if the token was already revoked."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO revoked_tokens (jti, expires_at)
+                    VALUES (%s, to_timestamp(%s))
+                    ON CONFLICT (jti) DO NOTHING
+                    RETURNING jti
+                """, (jti, expires_at))
+                inserted = cur.fetchone() is not None
+                conn.commit()
+                return inserted
+
+    def revoked_since(self, since: Optional[datetime]) -> Tuple[List[Tuple[str, float]], Optional[datetime]]:
+        """Return (jti, expires_at) of unexpired revocations made after since, and the new high-water mark."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT jti, EXTRACT(EPOCH FROM expires_at) as expires_at, revoked_at
+                    FROM revoked_tokens
+                    WHERE expires_at > NOW()
+                      AND (%s::timestamptz IS NULL OR revoked_at > %s::timestamptz - make_interval(secs => %s))
+                """, (since, since, REVOCATION_SYNC_OVERLAP))
+                rows = cur.fetchall()
+                latest = max([row['revoked_at'] for row in rows] + ([since] if since else []), default=None)
+                return [(row['jti'], float(row['expires_at'])) for row in rows], latest
+
+    def prune(self) -> int:
+        """Delete revocations of tokens that have expired anyway."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM revoked_tokens WHERE expires_at <= NOW()")
+                conn.commit()
+                return cur.rowcount
+
+
+class AuthService:
+    """
+    Issues and verifies signed, stateless access and refresh tokens.
+
+    Verifying an access token needs no database query: decoded claims are kept
+    in an LRU keyed by token, and revocations are mirrored into an in-memory
+    set that a background thread keeps in sync with the revoked_tokens table.
+    Refresh tokens are single use; refreshing revokes the presented token in
+    the same statement that checks it was not used before.
+    """
+
+    def __init__(self, secret_key: str, store=None, access_ttl: int = ACCESS_TOKEN_TTL,
+                 refresh_ttl: int = REFRESH_TOKEN_TTL, claims_cache_entries: int = CLAIMS_CACHE_ENTRIES,
+                 sync_interval: float = REVOCATION_SYNC_INTERVAL, clock=time.time):
+        """
+        Initialize the service.
+
+        Args:
+            secret_key: Key the tokens are signed with; every process must share it
+            store: Revocation store (defaults to PostgresRevocationStore)
+            access_ttl: Lifetime of access tokens in seconds
+            refresh_ttl: Lifetime of refresh tokens in seconds
+            claims_cache_entries: Decoded access tokens kept in memory
+            sync_interval: Seconds between revocation syncs
+            clock: Returns the current UNIX time (for tests)
+        """
+        signer_kwargs = {'digest_method': hashlib.sha256}
+        self._serializers = {
+            'access': URLSafeSerializer(secret_key, salt='access-token', signer_kwargs=signer_kwargs),
+            'refresh': URLSafeSerializer(secret_key, salt='refresh-token', signer_kwargs=signer_kwargs)
+        }
+        self.store = store or PostgresRevocationStore()
+        self.ttls = {'access': access_ttl, 'refresh': refresh_ttl}
+        self.sync_interval = sync_interval
+        self._clock = clock
+        self._claims = LRUCache(max_entries=claims_cache_entries, ttl=access_ttl)
+        self._revoked = {}
+        self._revoked_lock = threading.Lock()
+        self._synced_until = None
+        self._last_prune = 0
+        self._stop = threading.Event()
+        self._running = False
+        self._thread = None
+        self._thread_pid = None
+        self._thread_lock = threading.Lock()
+
+    def _issue(self, token_type: str, user_id: int) -> str:
+        return self._serializers[token_type].dumps({
+            'sub': user_id,
+            'jti': secrets.token_hex(16),
+            'exp': int(self._clock()) + self.ttls[token_type]
+        })
+
+    def _decode(self, token_type: str, token: Optional[str]) -> Dict[str, Any]:
+        if not token:
+            raise AuthError("Authentication required")
+        try:
+            claims = self._serializers[token_type].loads(token)
+        except BadSignature:
+            raise AuthError("Invalid token")
+        if claims['exp'] <= self._clock():
+            raise AuthError("Token expired")
+        return claims
+
+    def issue_tokens(self, user_id: int) -> Dict[str, Any]:
+        """
+        Issue an access token and a refresh token for a user.
+
+        Returns:
+            Dict with access_token, refresh_token, token_type and expires_in (seconds)
+        """
+        return {
+            'access_token': self._issue('access', user_id),
+            'refresh_token': self._issue('refresh', user_id),
+            'token_type': 'Bearer',
+            'expires_in': self.ttls['access']
+        }
+
+    def verify_access(self, token: Optional[str]) -> Dict[str, Any]:
+        """
+        Verify an access token without touching the database.
+
+        Returns:
+            The token's claims: sub (user ID), jti and exp
+
+        Raises:
+            AuthError: If the token is missing, invalid, expired or revoked
+        """
+        if self._running and self._thread_pid != os.getpid():
+            self._start_thread()
+        cached = self._claims.get(token) if token else None
+        if cached is not None:
+            claims = json.loads(cached)
+            if claims['exp'] <= self._clock():
+                raise AuthError("Token expired")
+        else:
+            claims = self._decode('access', token)
+            self._claims.set(token, json.dumps(claims).encode('utf-8'), ttl=claims['exp'] - self._clock())
+        if claims['jti'] in self._revoked:
+            raise AuthError("Token revoked")
+        return claims
+
+    def refresh(self, refresh_token: Optional[str]) -> Dict[str, Any]:
+        """
+        Exchange a refresh token for a new token pair; each refresh token works once.
+
+        Raises:
+            AuthError: If the token is invalid, expired, revoked or already used
+        """
+        claims = self._decode('refresh', refresh_token)
+        if not self.store.revoke(claims['jti'], claims['exp']):
+            raise AuthError("Token revoked")
+        self._remember(claims['jti'], claims['exp'])
+        return self.issue_tokens(claims['sub'])
+
+    def revoke(self, token_type: str, token: Optional[str]) -> None:
+        """Revoke a token of the given type ('access' or 'refresh'); invalid or expired tokens are ignored."""
+        try:
+            claims = self._decode(token_type, token)
+        except AuthError:
+            return
+        self.store.revoke(claims['jti'], claims['exp'])
+        self._remember(claims['jti'], claims['exp'])
+
+    def _remember(self, jti: str, expires_at: float) -> None:
+        with self._revoked_lock:
+            self._revoked[jti] = expires_at
+
+    def sync_revocations(self) -> None:
+        """Mirror revocations made by any process into this process and forget expired ones."""
+        revoked, self._synced_until = self.store.revoked_since(self._synced_until)
+        now = self._clock()
+        with self._revoked_lock:
+            self._revoked.update(revoked)
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[jti]
+        if now - self._last_prune >= REVOCATION_PRUNE_INTERVAL:
+            self._last_prune = now
+            self.store.prune()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync_revocations()
+            except Exception as e:
+                logger.error(f"Error syncing token revocations: {str(e)}")
+
+    def _start_thread(self) -> None:
+        # Threads do not survive a fork, so like get_pool() the sync loop is tied to the process that started it
+        with self._thread_lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='auth-revocations', daemon=True)
+            self._thread.start()
+
+    def start(self) -> None:
+        """
+        Load current revocations and keep them in sync from a background thread.
+
+        A process forked afterwards (e.g. a gunicorn --preload worker) starts its
+        own sync thread on its first verify_access().
+        """
+        if self._running:
+            return
+        self._running = True
+        try:
+            self.sync_revocations()
+        except Exception as e:
+            logger.error(f"Error loading token revocations: {str(e)}")
+        self._start_thread()
+
+    def stop(self) -> None:
+        self._running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._thread_pid = None
+
+    def stats(self) -> Dict[str, int]:
+        """Sizes of the claims cache and revocation set."""
+        return {'cached_tokens': len(self._claims), 'revoked_tokens': len(self._revoked)}
+
+
+_auth_service: Optional[AuthService] = None
+_auth_service_lock = threading.Lock()
+
+
+def get_auth_service() -> AuthService:
+    """Return the process-wide auth service, creating it on first use."""
+    global _auth_service
+    if _auth_service is not None:
+        return _auth_service
+
+    with _auth_service_lock:
+        if _auth_service is None:
+            secret_key = os.getenv('AUTH_SECRET_KEY')
+            if not secret_key:
+                if os.getenv('AUTH_ALLOW_RANDOM_SECRET', 'false').lower() not in ('1', 'true', 'yes'):
+                    raise ValueError("AUTH_SECRET_KEY must be set; every process has to sign tokens with the same key")
+                # Tokens then only verify in this process and stop working on restart
+                logger.warning("AUTH_SECRET_KEY is not set; using a random per-process key")
+                secret_key = secrets.token_hex(32)
+            _auth_service = AuthService(secret_key)
+        return _auth_service
@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value):
+    """JSON encoder hook that tags types psycopg2 returns but JSON cannot represent."""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not cacheable")
+
+
+def _decode(obj: Dict[str, Any]):
+    """JSON decoder hook reversing _encode."""
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return date.fromisoformat(obj['__date__'])
+        if '__decimal__' in obj:
+            return Decimal(obj['__decimal__'])
+    return obj
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a payload for storage in either cache tier."""
+    return json.dumps(value, default=_encode, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize a payload produced by dumps()."""
+    return json.loads(data, object_hook=_decode)
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache of serialized values.
+
+    Entries expire after ttl seconds, and the least recently used entries are
+    evicted once either max_entries or max_bytes would be exceeded.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> None:
+        data, _ = self._entries.pop(key)
+        self._bytes -= len(data)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes, ttl: Optional[float] = None) -> None:
+        if len(data) > self.max_bytes:
+            return
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (data, expires_at)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class InMemorySharedCache:
+    """
+    Process-local stand-in for a Redis client.
+
+    Implements the subset of the redis-py interface used by TieredCache
+    (get, set with ex, delete), so tests and single-process development can
+    exercise the shared tier without a Redis server.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = (value, self._clock() + ex if ex else None)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+
+class TieredCache:
+    """
+    Two-tier read-through cache: an in-process LRU backed by an optional shared tier.
+
+    The shared tier can be any object with a redis-py compatible get/set/delete
+    interface. Local entries in other worker processes are not notified of
+    invalidations, so the local tier's TTL must stay short whenever several workers run.
+    """
+
+    def __init__(self, local: LRUCache, shared=None, shared_ttl: int = 300,
+                 key_prefix: str = 'empyre:'):
+        self.local = local
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._counters = {
+            'local_hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'invalidations': 0,
+            'shared_errors': 0
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        data = self.local.get(key)
+        if data is not None:
+            self._count('local_hits')
+            return loads(data)
+
+        if self.shared is not None:
+            try:
+                data = self.shared.get(self.key_prefix + key)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed: {str(e)}")
+                self._count('shared_errors')
+                data = None
+            if data is not None:
+                self._count('shared_hits')
+                self.local.set(key, data)
+                return loads(data)
+
+        self._count('misses')
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value in both tiers."""
+        data = dumps(value)
+        self.local.set(key, data)
+        self._count('sets')
+        if self.shared is not None:
+            try:
+                self.shared.set(self.key_prefix + key, data, ex=self.shared_ttl)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed: {str(e)}")
+                self._count('shared_errors')
+
+    def delete(self, keys: Iterable[str]) -> None:
+        """Remove keys from both tiers."""
+        keys = list(keys)
+        if not keys:
+            return
+        self.local.delete(*keys)
+        with self._lock:
+            self._counters['invalidations'] += len(keys)
+        if self.shared is not None:
+            try:
+                self.shared.delete(*[self.key_prefix + key for key in keys])
+            except Exception as e:
+                logger.warning(f"Shared cache invalidation failed: {str(e)}")
+                self._count('shared_errors')
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and local tier occupancy."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats.update({
+            'local_entries': len(self.local),
+            'local_bytes': self.local.size_bytes,
+            'local_evictions': self.local.evictions,
+            'local_expirations': self.local.expirations,
+            'shared_enabled': self.shared is not None
+        })
+        return stats
+
+
+class NullCache:
+    """Cache stand-in used when caching is disabled."""
+
+    def get(self, key: str) -> None:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def delete(self, keys: Iterable[str]) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'enabled': False}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _shared_from_env():
+    """Connect to the shared tier named by CACHE_REDIS_URL, if any."""
+    url = os.getenv('CACHE_REDIS_URL')
+    if not url:
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.warning("CACHE_REDIS_URL is set but the redis package is not installed; using local cache only")
+        return None
+    return redis.Redis.from_url(url)
+
+
+def get_cache():
+    """Return the process-wide presentation cache, creating it on first use."""
+    global _cache
+    if _cache is not None:
+        return _cache
+
+    with _cache_lock:
+        if _cache is None:
+            if os.getenv('CACHE_ENABLED', 'true').lower() in ('0', 'false', 'no'):
+                _cache = NullCache()
+            else:
+                shared = _shared_from_env()
+                _cache = TieredCache(
+                    local=LRUCache(
+                        max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '1000')),
+                        max_bytes=int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+                        # Invalidations only reach this process's local tier, so other workers
+                        # may serve entries this many seconds old after a write
+                        ttl=float(os.getenv('CACHE_LOCAL_TTL', '1'))
+                    ),
+                    shared=shared,
+                    shared_ttl=int(os.getenv('CACHE_SHARED_TTL', '300'))
+                )
+        return _cache
@@ -0,0 +1,349 @@
+import os
+import threading
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional
+from flask import request
+from flask_socketio import Namespace, emit, join_room, leave_room, rooms
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Fields a drag/resize gesture may change; these are coalesced before reaching the database
+GEOMETRY_FIELDS = ('x_position', 'y_position', 'width', 'height', 'z_index')
+TEXT_FIELDS = ('content', 'font_family', 'font_size', 'font_color', 'bold', 'italic', 'underline', 'text_align')
+IMAGE_FIELDS = ('image_url', 'alt_text')
+SLIDE_FIELDS = ('background_color', 'background_image_url', 'title',
+                'background_image_opacity', 'background_image_fit')
+
+
+class UpdateCoalescer:
+    """
+    Buffers high-frequency updates and flushes only the latest value per key.
+
+    Updates submitted for the same key within one interval are merged field by
+    field (latest value wins), so a burst of drag events turns into a single
+    write. Pending updates are handed to flush_callback as a {key: fields} dict.
+    """
+
+    def __init__(self, flush_callback: Callable[[Dict[Hashable, Dict[str, Any]]], None],
+                 interval: float = 0.04):
+        self.interval = interval
+        self._flush_callback = flush_callback
+        self._lock = threading.Lock()
+        # Held from taking the pending updates until they are written, so a flush waits for one in flight
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._stop = threading.Event()
+        self._running = False
+        self._thread = None
+        self._thread_pid = None
+        self.submitted = 0
+        self.coalesced = 0
+        self.flushed = 0
+
+    def submit(self, key: Hashable, fields: Dict[str, Any]) -> None:
+        """Queue fields for key, merging them into any pending update."""
+        with self._lock:
+            if self._running and self._thread_pid != os.getpid():
+                self._start_thread()
+            self.submitted += 1
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = dict(fields)
+            else:
+                pending.update(fields)
+                self.coalesced += 1
+
+    def discard(self, key: Hashable) -> None:
+        """Drop any pending update for key."""
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self) -> int:
+        """
+        Hand every pending update to the flush callback and return how many there were.
+
+        If another thread is flushing, this waits until its updates are written,
+        so callers can rely on everything submitted before the call being stored.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                self._flush_callback(pending)
+            except Exception as e:
+                # Later updates for the same keys will carry newer values, so nothing is retried
+                logger.error(f"Error flushing coalesced updates: {str(e)}")
+        with self._lock:
+            self.flushed += len(pending)
+        return len(pending)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def _start_thread(self) -> None:
+        # Threads do not survive a fork, so like get_pool() the loop is tied to the process that started it
+        self._thread_pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='update-coalescer', daemon=True)
+        self._thread.start()
+
+    def start(self) -> None:
+        """
+        Start the background flush loop.
+
+        A process forked afterwards (e.g. a gunicorn --preload worker) starts its
+        own loop on its first submit().
+        """
+        with self._lock:
+            self._running = True
+            if self._thread_pid != os.getpid():
+                self._start_thread()
+
+    def stop(self) -> None:
+        """Stop the background loop and flush whatever is still pending."""
+        with self._lock:
+            self._running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._thread_pid = None
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'flushed': self.flushed,
+                'pending': len(self._pending)
+            }
+
+
+def presentation_room(presentation_id) -> str:
+    return f"presentation:{presentation_id}"
+
+
+class CollaborationService:
+    """Applies collaborative and REST geometry edits, coalescing geometry writes per element."""
+
+    def __init__(self, presentations_service, interval: Optional[float] = None):
+        """
+        Initialize the service.
+
+        Args:
+            presentations_service: PresentationsService used to persist edits
+            interval: Coalescing window in seconds (defaults to COLLAB_COALESCE_MS)
+        """
+        if interval is None:
+            interval = float(os.getenv('COLLAB_COALESCE_MS', '40')) / 1000
+        self.presentations_service = presentations_service
+        self.coalescer = UpdateCoalescer(self._flush_geometry, interval=interval)
+        # Slides never move between presentations, so their owner can be memoized
+        self._slide_presentations = {}
+
+    def slide_presentation_id(self, slide_id: int) -> Optional[int]:
+        """Return the presentation a slide belongs to, or None if the slide does not exist."""
+        presentation_id = self._slide_presentations.get(slide_id)
+        if presentation_id is None:
+            slide = self.presentations_service.get_slide_revision(slide_id)
+            if not slide:
+                return None
+            presentation_id = slide['presentation_id']
+            self._slide_presentations[slide_id] = presentation_id
+        return presentation_id
+
+    def _flush_geometry(self, pending: Dict[Hashable, Dict[str, Any]]) -> None:
+        """Write the latest geometry of every pending element with one statement."""
+        self.presentations_service.update_element_geometry([
+            {'element_id': element_id, **fields} for element_id, fields in pending.items()
+        ])
+
+    def queue_geometry(self, element_id: int, fields: Dict[str, Any],
+                       slide_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Queue a geometry change for an element; at most one write per element reaches the database per interval.
+
+        Args:
+            element_id: The ID of the element to move or resize
+            fields: Any of the geometry fields; other keys are ignored
+            slide_id: The slide the element must belong to (optional)
+
+        Returns:
+            The geometry fields that were accepted
+        """
+        geometry = {field: fields[field] for field in GEOMETRY_FIELDS if field in fields}
+        if geometry:
+            scope = {'slide_id': slide_id} if slide_id is not None else {}
+            self.coalescer.submit(element_id, {**scope, **geometry})
+        return geometry
+
+    def move_element(self, slide_id: int, element_id: int, element_type: str,
+                     fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a geometry change for an element of a slide.
+
+        Returns:
+            The geometry fields that were accepted
+        """
+        return self.queue_geometry(element_id, fields, slide_id=slide_id)
+
+    def update_element(self, slide_id: int, element_id: int, element_type: str,
+                       fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply an element edit. Geometry goes through the coalescer, everything else is written immediately.
+
+        Returns:
+            The fields that were accepted
+        """
+        content_fields = TEXT_FIELDS if element_type == 'text' else IMAGE_FIELDS
+        content = {field: fields[field] for field in content_fields if field in fields}
+        if content:
+            results = self.presentations_service.apply_element_batch(slide_id, [
+                {'op': 'update', 'element_id': element_id, 'element_type': element_type, **content}
+            ])
+            if not results[0]['success']:
+                raise Exception(results[0]['error'])
+        geometry = self.move_element(slide_id, element_id, element_type, fields)
+        return {**content, **geometry}
+
+    def update_slide(self, slide_id: int, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply a slide property edit.
+
+        Returns:
+            The fields that were accepted
+        """
+        changes = {field: fields[field] for field in SLIDE_FIELDS if field in fields}
+        if changes:
+            slide = self.presentations_service.update_slide(slide_id=slide_id, **changes)
+            if not slide:
+                raise Exception("Slide not found")
+        return changes
+
+
+class CollaborationNamespace(Namespace):
+    """
+    Socket.IO namespace for live editing.
+
+    Clients join a presentation room and send element/slide edits; every edit is
+    broadcast to the other members of the room as a compact diff containing only
+    the changed fields.
+
+    When an auth service is given, clients connect with {'token': <access
+    token>} as their auth payload and may only join presentations they own.
+
+    Client events: join, leave, element:move, element:update, slide:update
+    Server events: element:changed, slide:changed
+    """
+
+    def __init__(self, namespace: str, collaboration_service: CollaborationService, auth_service=None):
+        super().__init__(namespace)
+        self.collaboration_service = collaboration_service
+        self.auth_service = auth_service
+        self._users = {}
+
+    def on_connect(self, auth=None):
+        if self.auth_service is None:
+            return True
+        token = auth.get('token') if isinstance(auth, dict) else None
+        try:
+            self._users[request.sid] = self.auth_service.verify_access(token)['sub']
+        except Exception as e:
+            logger.info(f"Rejected collaboration connection: {str(e)}")
+            return False
+        return True
+
+    def on_disconnect(self):
+        self._users.pop(request.sid, None)
+
+    def _joined(self, data: Dict[str, Any]) -> Optional[str]:
+        """Return the room for the payload's presentation if this client has joined it."""
+        room = presentation_room(data.get('presentation_id'))
+        return room if room in rooms() else None
+
+    def _owns_slide(self, data: Dict[str, Any]) -> bool:
+        """Check that the payload's slide belongs to the payload's presentation."""
+        presentation_id = self.collaboration_service.slide_presentation_id(int(data['slide_id']))
+        return presentation_id is not None and str(presentation_id) == str(data.get('presentation_id'))
+
+    def on_join(self, data):
+        presentation_id = data.get('presentation_id')
+        if presentation_id is None:
+            return {'error': 'Missing required field: presentation_id'}
+        presentations_service = self.collaboration_service.presentations_service
+        if self.auth_service is not None:
+            owner = presentations_service.get_owner('presentation', presentation_id)
+            if owner is None:
+                return {'error': 'Presentation not found'}
+            if owner != self._users.get(request.sid):
+                return {'error': 'Not allowed to edit this presentation'}
+        revision = presentations_service.get_presentation_revision(presentation_id)
+        if revision is None:
+            return {'error': 'Presentation not found'}
+        join_room(presentation_room(presentation_id))
+        return {'success': True, 'revision': revision}
+
+    def on_leave(self, data):
+        leave_room(presentation_room(data.get('presentation_id')))
+        return {'success': True}
+
+    def _element_event(self, data, apply):
+        room = self._joined(data)
+        if room is None:
+            return {'error': 'Join the presentation before editing it'}
+        missing_fields = [field for field in ('slide_id', 'element_id', 'element_type') if data.get(field) is None]
+        if missing_fields:
+            return {'error': f'Missing required fields: {", ".join(missing_fields)}'}
+        if data['element_type'] not in ('text', 'image'):
+            return {'error': 'Unsupported element type'}
+        try:
+            if not self._owns_slide(data):
+                return {'error': 'Slide not found'}
+            changes = apply(int(data['slide_id']), int(data['element_id']), data['element_type'], data)
+        except Exception as e:
+            logger.error(f"Collaborative element edit error: {str(e)}")
+            return {'error': str(e)}
+        if changes:
+            emit('element:changed', {
+                'slide_id': int(data['slide_id']),
+                'element_id': int(data['element_id']),
+                'changes': changes
+            }, to=room, skip_sid=request.sid)
+        return {'success': True}
+
+    def on_element_move(self, data):
+        return self._element_event(data, self.collaboration_service.move_element)
+
+    def on_element_update(self, data):
+        return self._element_event(data, self.collaboration_service.update_element)
+
+    def on_slide_update(self, data):
+        room = self._joined(data)
+        if room is None:
+            return {'error': 'Join the presentation before editing it'}
+        if data.get('slide_id') is None:
+            return {'error': 'Missing required field: slide_id'}
+        try:
+            if not self._owns_slide(data):
+                return {'error': 'Slide not found'}
+            changes = self.collaboration_service.update_slide(int(data['slide_id']), data)
+        except Exception as e:
+            logger.error(f"Collaborative slide edit error: {str(e)}")
+            return {'error': str(e)}
+        if changes:
+            emit('slide:changed', {
+                'slide_id': int(data['slide_id']),
+                'changes': changes
+            }, to=room, skip_sid=request.sid)
+        return {'success': True}
+
+    def trigger_event(self, event, *args):
+        # Client event names use ':' separators, which are not valid in handler names
+        return super().trigger_event(event.replace(':', '_'), *args)
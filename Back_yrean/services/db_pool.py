@@ -0,0 +1,349 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+from dotenv import load_dotenv
+from services.metrics import observe_query
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available before the checkout timeout."""
+
+
+class InstrumentedCursor(RealDictCursor):
+    """RealDictCursor that times every statement for the request metrics and the slow query log."""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            observe_query(query, vars, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            observe_query(query, vars_list, time.perf_counter() - started)
+
+
+class _PooledConnection:
+    """Bookkeeping wrapper for a connection owned by the pool."""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool.
+
+    Connections are opened lazily up to max_size, validated on checkout when they
+    have been idle for longer than health_check_interval, and retired once they
+    are older than max_age. A checkout blocks for at most timeout seconds.
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = 1, max_size: int = 10,
+                 max_age: float = 1800, timeout: float = 30,
+                 health_check_interval: float = 30):
+        """
+        Initialize the pool.
+
+        Args:
+            connect: Callable returning a new DB-API connection
+            min_size: Number of connections opened on first use and kept open
+            max_size: Maximum number of open connections
+            max_age: Seconds after which a connection is closed and replaced
+            timeout: Seconds to wait for a free connection before raising PoolTimeout
+            health_check_interval: Idle seconds after which a connection is pinged on checkout
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_age = max_age
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._prefilled = False
+
+        # Metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._failed_health_checks = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def _open(self) -> _PooledConnection:
+        """Open a new connection. The caller must already have reserved a slot."""
+        try:
+            entry = _PooledConnection(self._connect())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return entry
+
+    def _close_entry(self, entry: _PooledConnection) -> None:
+        """Close a connection and release its slot."""
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._discarded += 1
+            self._cond.notify()
+
+    def _is_expired(self, entry: _PooledConnection, now: float) -> bool:
+        return bool(self.max_age) and now - entry.created_at > self.max_age
+
+    def _is_healthy(self, entry: _PooledConnection, now: float) -> bool:
+        """Check a connection before handing it out."""
+        if entry.conn.closed:
+            return False
+        if now - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            with entry.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            entry.conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled connection: {str(e)}")
+            with self._cond:
+                self._failed_health_checks += 1
+            return False
+
+    def _prefill(self) -> None:
+        """Open min_size connections the first time the pool is used."""
+        with self._cond:
+            if self._prefilled:
+                return
+            self._prefilled = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                entry = self._open()
+            except Exception as e:
+                logger.warning(f"Could not prefill connection pool: {str(e)}")
+                continue
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        Check a connection out of the pool.
+
+        Args:
+            timeout: Seconds to wait for a free connection (defaults to the pool timeout)
+
+        Returns:
+            An open connection that must be returned with putconn()
+
+        Raises:
+            PoolTimeout: If no connection became available in time
+        """
+        if not self._prefilled:
+            self._prefill()
+
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            entry = None
+            with self._cond:
+                if self._closed:
+                    raise Exception("Connection pool is closed")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"Timed out after {timeout}s waiting for a database connection")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    # Reserve a slot and open the connection outside the lock
+                    self._size += 1
+
+            if entry is None:
+                entry = self._open()
+            else:
+                now = time.monotonic()
+                if self._is_expired(entry, now) or not self._is_healthy(entry, now):
+                    self._close_entry(entry)
+                    continue
+
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._in_use[id(entry.conn)] = entry
+                self._checkouts += 1
+                self._checkout_time_total += elapsed
+                self._checkout_time_max = max(self._checkout_time_max, elapsed)
+            return entry.conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """
+        Return a connection to the pool.
+
+        Args:
+            conn: A connection previously obtained from getconn()
+            discard: Close the connection instead of keeping it
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            raise Exception("Connection does not belong to this pool")
+
+        if not discard and not conn.closed:
+            try:
+                # Never hand out a connection with an open transaction
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        if discard or conn.closed or self._closed or self._is_expired(entry, now):
+            self._close_entry(entry)
+            return
+
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Context manager yielding a pooled connection.
+
+        The transaction is committed when the block exits normally and rolled back
+        if it raises, mirroring psycopg2's own connection context manager. The
+        connection is returned to the pool either way.
+        """
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+            if not conn.closed:
+                conn.commit()
+        except BaseException:
+            try:
+                if not conn.closed:
+                    conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the pool metrics."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'connections_created': self._created,
+                'connections_closed': self._discarded,
+                'failed_health_checks': self._failed_health_checks,
+                'checkout_time_avg_ms': (self._checkout_time_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                'checkout_time_max_ms': self._checkout_time_max * 1000
+            }
+
+    def close(self) -> None:
+        """Close idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_entry(entry)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def _db_params() -> Dict[str, Any]:
+    return {
+        'dbname': os.getenv('DB_NAME'),
+        'user': os.getenv('DB_USERNAME'),
+        'password': os.getenv('DB_PASSWORD'),
+        'host': os.getenv('DB_ENDPOINT'),
+        'port': os.getenv('DB_PORT')
+    }
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Return the process-wide connection pool, creating it on first use.
+
+    The pool is recreated after a fork so that forked workers never share sockets
+    with their parent.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            db_params = _db_params()
+            _pool = ConnectionPool(
+                connect=lambda: psycopg2.connect(**db_params, cursor_factory=InstrumentedCursor),
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                max_age=float(os.getenv('DB_POOL_MAX_AGE', '1800')),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+                health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))
+            )
+            _pool_pid = pid
+        return _pool
@@ -0,0 +1,145 @@
+import re
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from services.s3_service import DELETE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# images/<stem>_<width>.<format> derivatives and images/<stem>.manifest.json manifests
+# (original upload names never contain an underscore)
+DERIVED_KEY_PATTERN = re.compile(r'^images/(?P<stem>[^_/]+)(?:_\d+\.(?:webp|jpeg)|\.manifest\.json)$')
+
+
+def manifest_key(key: str) -> Optional[str]:
+    """Return the manifest key a derivative or manifest belongs to, or None for an original."""
+    match = DERIVED_KEY_PATTERN.match(key)
+    return f"images/{match.group('stem')}.manifest.json" if match else None
+
+
+class ImageGarbageCollector:
+    """
+    Deletes objects under images/ that nothing in the database references.
+
+    The bucket is listed one page at a time, each page is checked with a single
+    query, and deletions are sent in batches of up to 1000 keys, so memory use
+    does not grow with the size of the bucket. Objects younger than the grace
+    period are never deleted, which protects uploads that have not been
+    attached to an element yet.
+    """
+
+    def __init__(self, s3_service, presentations_service, grace_seconds: float,
+                 dry_run: bool = False, page_size: int = DELETE_BATCH_SIZE,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None, clock=None):
+        """
+        Initialize the collector.
+
+        Args:
+            s3_service: S3Service of the bucket to clean
+            presentations_service: PresentationsService used for reference checks
+            grace_seconds: Minimum age of a deleted object, and of an unreferenced upload's blob row
+            dry_run: Only report what would be deleted
+            page_size: Keys listed and checked per batch (at most 1000)
+            progress: Called with the running report after every page
+            clock: Returns the current UTC datetime (for tests)
+        """
+        self.s3_service = s3_service
+        self.presentations_service = presentations_service
+        self.grace_seconds = grace_seconds
+        self.dry_run = dry_run
+        self.page_size = min(page_size, DELETE_BATCH_SIZE)
+        self.progress = progress
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self._pending = []
+
+    def _flush(self, report: Dict[str, Any], force: bool = False) -> None:
+        """Delete buffered objects once a full batch has accumulated, or everything when forced."""
+        while self._pending and (force or len(self._pending) >= DELETE_BATCH_SIZE):
+            batch = self._pending[:DELETE_BATCH_SIZE]
+            self._pending = self._pending[DELETE_BATCH_SIZE:]
+            sizes = dict(batch)
+            try:
+                errors = self.s3_service.delete_objects(list(sizes))
+            except Exception as e:
+                logger.error(f"Error deleting {len(sizes)} images: {str(e)}")
+                report['errors'] += len(sizes)
+                continue
+            for error in errors:
+                logger.warning(f"Could not delete {error['Key']}: {error['Code']} {error['Message']}")
+                sizes.pop(error['Key'], None)
+            report['errors'] += len(errors)
+            report['deleted'] += len(sizes)
+            report['bytes_freed'] += sum(sizes.values())
+
+    def _collect_page(self, page: List[Dict[str, Any]], cutoff: datetime, report: Dict[str, Any]) -> None:
+        """Check one listing page and queue its unreferenced objects for deletion."""
+        report['scanned'] += len(page)
+        candidates = {}
+        for item in page:
+            if item['LastModified'] > cutoff:
+                report['recent'] += 1
+                continue
+            manifest = manifest_key(item['Key'])
+            candidates[self.s3_service.image_url(item['Key'][len('images/'):])] = (
+                item,
+                self.s3_service.image_url(manifest[len('images/'):]) if manifest else None
+            )
+        if not candidates:
+            return
+
+        unreferenced = set(self.presentations_service.find_unreferenced_images(
+            [(url, manifest_url) for url, (_, manifest_url) in candidates.items()], self.grace_seconds
+        ))
+        report['referenced'] += len(candidates) - len(unreferenced)
+        if not unreferenced:
+            return
+
+        if self.dry_run:
+            report['would_delete'] += len(unreferenced)
+            report['bytes_freed'] += sum(candidates[url][0]['Size'] for url in unreferenced)
+            return
+
+        # Originals lose their database rows first, so no new upload is deduplicated onto a deleted object
+        originals = [url for url in unreferenced if candidates[url][1] is None]
+        deletable = set(self.presentations_service.forget_images(originals, self.grace_seconds))
+        report['referenced'] += len(originals) - len(deletable)
+        for url in unreferenced:
+            if candidates[url][1] is not None or url in deletable:
+                item = candidates[url][0]
+                self._pending.append((item['Key'], item['Size']))
+        self._flush(report)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Scan the whole bucket once.
+
+        Returns:
+            Report with pages, scanned, recent (inside the grace period),
+            referenced, deleted (or would_delete on a dry run), bytes_freed,
+            errors and elapsed_seconds
+        """
+        started = time.monotonic()
+        cutoff = self.clock() - timedelta(seconds=self.grace_seconds)
+        report = {
+            'dry_run': self.dry_run,
+            'pages': 0,
+            'scanned': 0,
+            'recent': 0,
+            'referenced': 0,
+            'deleted': 0,
+            'would_delete': 0,
+            'bytes_freed': 0,
+            'errors': 0,
+            'elapsed_seconds': 0.0
+        }
+        self._pending = []
+        for page in self.s3_service.iter_image_pages(self.page_size):
+            report['pages'] += 1
+            self._collect_page(page, cutoff, report)
+            report['elapsed_seconds'] = time.monotonic() - started
+            if self.progress:
+                self.progress(dict(report))
+        self._flush(report, force=True)
+        report['elapsed_seconds'] = time.monotonic() - started
+        return report
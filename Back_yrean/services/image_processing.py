@@ -0,0 +1,126 @@
+import os
+import io
+import logging
+from typing import Any, BinaryIO, Dict, List, Optional
+from dotenv import load_dotenv
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it uploads are stored as-is
+    Image = None
+    ImageOps = None
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# (format passed to Pillow, format name and file extension, content type)
+DERIVATIVE_FORMATS = (
+    ('WEBP', 'webp', 'image/webp'),
+    ('JPEG', 'jpeg', 'image/jpeg')
+)
+
+
+def derivative_widths() -> List[int]:
+    """Return the configured derivative widths, largest first."""
+    widths = os.getenv('IMAGE_DERIVATIVE_WIDTHS', '320,960,1920')
+    return sorted({int(width) for width in widths.split(',') if width.strip()}, reverse=True)
+
+
+def is_available() -> bool:
+    """Return whether Pillow is installed and derivatives can be generated."""
+    return Image is not None
+
+
+def generate_derivatives(source: BinaryIO, widths: Optional[List[int]] = None,
+                         quality: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Decode an image once and encode it at several widths in WebP and JPEG.
+
+    Only widths smaller than the original are produced, so an image is never
+    upscaled. Each size is resized from the next larger one rather than from the
+    original, which keeps the cost of large uploads down.
+
+    Args:
+        source: Readable binary stream of the original image
+        widths: Target widths in pixels (defaults to IMAGE_DERIVATIVE_WIDTHS)
+        quality: Encoder quality from 1 to 100 (defaults to IMAGE_DERIVATIVE_QUALITY)
+
+    Returns:
+        Dict with the original width and height and a 'variants' list of dicts
+        holding width, height, format, content_type and data, or None
+        if Pillow is not installed or the image cannot be processed
+    """
+    if Image is None:
+        return None
+    widths = derivative_widths() if widths is None else sorted(set(widths), reverse=True)
+    quality = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', '82')) if quality is None else quality
+
+    try:
+        image = Image.open(source)
+        if getattr(image, 'is_animated', False):
+            # Re-encoding would drop every frame but the first
+            return None
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    except Exception as e:
+        logger.warning(f"Could not decode image for derivatives: {str(e)}")
+        return None
+
+    original_width, original_height = image.size
+    variants = []
+    current = image
+    for width in widths:
+        if width >= current.width:
+            continue
+        height = max(1, round(current.height * width / current.width))
+        current = current.resize((width, height), Image.LANCZOS)
+        flattened = None
+        for pil_format, image_format, content_type in DERIVATIVE_FORMATS:
+            frame = current
+            if pil_format == 'JPEG' and current.mode == 'RGBA':
+                # JPEG has no alpha channel; composite onto white once per size
+                if flattened is None:
+                    flattened = Image.new('RGB', current.size, (255, 255, 255))
+                    flattened.paste(current, mask=current.getchannel('A'))
+                frame = flattened
+            buffer = io.BytesIO()
+            frame.save(buffer, format=pil_format, quality=quality, optimize=True)
+            variants.append({
+                'width': width,
+                'height': height,
+                'format': image_format,
+                'content_type': content_type,
+                'data': buffer.getvalue()
+            })
+
+    return {
+        'width': original_width,
+        'height': original_height,
+        'variants': variants
+    }
+
+
+def best_fit(variants: Optional[List[Dict[str, Any]]], width: Optional[float],
+             image_format: str = 'webp') -> Optional[str]:
+    """
+    Pick the URL of the smallest variant at least as wide as the display width.
+
+    Args:
+        variants: Variant descriptors as stored in image_assets.variants
+        width: Width the image is displayed at, or None for the largest variant
+        image_format: Variant format to choose from
+
+    Returns:
+        The variant URL, or None if there is no variant in that format
+    """
+    candidates = sorted((variant for variant in variants or [] if variant['format'] == image_format),
+                        key=lambda variant: variant['width'])
+    if not candidates:
+        return None
+    if width:
+        for variant in candidates:
+            if variant['width'] >= width:
+                return variant['url']
+    return candidates[-1]['url']
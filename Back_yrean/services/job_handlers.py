@@ -0,0 +1,71 @@
+import os
+import logging
+from typing import Any, Dict
+from dotenv import load_dotenv
+from services import thumbnail_renderer
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Images left without any element or slide referencing them for this many seconds are deleted
+ORPHAN_GRACE_SECONDS = float(os.getenv('JOB_ORPHAN_GRACE_SECONDS', '86400'))
+
+
+def register_job_handlers(queue, presentations_service) -> None:
+    """
+    Register the handlers for every background job type.
+
+    Job types:
+        s3_delete: {'image_url'} - delete one object from S3
+        image_derivatives: {'image_url', 'file_name'} - generate and record resized copies
+        orphan_cleanup: {'image_url'} - delete an image, and its derivatives, once its reference count stays at zero
+        render_thumbnail: {'presentation_id'} - render the first slide and store it as the presentation's thumbnail
+    """
+    s3_service = presentations_service.s3_service
+
+    def s3_delete(payload: Dict[str, Any]) -> None:
+        if not s3_service.delete_image(payload['image_url']):
+            raise Exception(f"Could not delete {payload['image_url']}")
+
+    def image_derivatives(payload: Dict[str, Any]) -> None:
+        source = s3_service.download_image(payload['image_url'])
+        try:
+            manifest = s3_service.upload_derivatives(source, payload['file_name'])
+        finally:
+            source.close()
+        if manifest:
+            presentations_service.save_image_asset(payload['image_url'], manifest)
+
+    def orphan_cleanup(payload: Dict[str, Any]) -> None:
+        presentations_service.release_image(payload['image_url'], ORPHAN_GRACE_SECONDS)
+
+    def render_thumbnail(payload: Dict[str, Any]) -> None:
+        if not thumbnail_renderer.is_available():
+            return
+        presentation_id = payload['presentation_id']
+        source = presentations_service.get_thumbnail_source(presentation_id)
+        if source is None:
+            return
+        if source['slide'] is None:
+            presentations_service.save_thumbnail(presentation_id, None, source['revision'])
+            return
+
+        width, image_format = thumbnail_renderer.thumbnail_width(), thumbnail_renderer.thumbnail_format()
+        digest = thumbnail_renderer.fingerprint(source['slide'], source['elements'], width, image_format)
+        file_name = f"{presentation_id}/{digest}.{image_format}"
+        thumbnail_url = s3_service.thumbnail_url(file_name)
+        # Edits that did not change the first slide render the same thumbnail, so nothing is uploaded
+        if thumbnail_url != source['thumbnail_url']:
+            data = thumbnail_renderer.render_slide(source['slide'], source['elements'],
+                                                   thumbnail_renderer.image_loader(s3_service),
+                                                   width, image_format)
+            _, content_type = thumbnail_renderer.THUMBNAIL_FORMATS[image_format]
+            s3_service.upload_thumbnail(data, file_name, content_type)
+        presentations_service.save_thumbnail(presentation_id, thumbnail_url, source['revision'])
+
+    queue.register('s3_delete', s3_delete)
+    queue.register('image_derivatives', image_derivatives)
+    queue.register('orphan_cleanup', orphan_cleanup)
+    queue.register('render_thumbnail', render_thumbnail)
@@ -0,0 +1,363 @@
+import os
+import time
+import random
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from psycopg2.extras import Json, execute_values
+from dotenv import load_dotenv
+from services.db_pool import get_pool
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts: int, base: float = 5, cap: float = 3600) -> float:
+    """
+    Seconds to wait before retrying a job that has failed attempts times.
+
+    Exponential backoff with jitter over the upper half of the delay, so jobs
+    that failed together (e.g. during an S3 outage) do not all retry at once.
+    """
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class PostgresJobStore:
+    """
+    Durable job storage in the jobs table.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    worker threads and processes can poll the same table without handing out a
+    job twice. Jobs that stay 'running' for longer than lock_timeout (because
+    their worker died) are claimed again.
+    """
+
+    def __init__(self, pool=None, lock_timeout: float = 300):
+        # Without an explicit pool the process-wide one is looked up per call, so forked workers get their own
+        self._pool = pool
+        self.lock_timeout = lock_timeout
+
+    def _connection(self):
+        return (self._pool or get_pool()).connection()
+
+    def enqueue(self, jobs: List[tuple], cur=None) -> None:
+        """
+        Insert (job_type, payload, delay_seconds, max_attempts) tuples.
+
+        When cur is given the jobs are inserted in the caller's transaction and
+        only become visible if it commits.
+        """
+        sql = """
+            INSERT INTO jobs (job_type, payload, run_at, max_attempts)
+            VALUES %s
+        """
+        template = "(%s, %s, NOW() + make_interval(secs => %s), %s)"
+        rows = [(job_type, Json(payload), delay, max_attempts)
+                for job_type, payload, delay, max_attempts in jobs]
+        if cur is not None:
+            execute_values(cur, sql, rows, template=template)
+            return
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, sql, rows, template=template)
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Mark up to limit runnable jobs as running and return them."""
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE jobs
+                    SET status = 'running', attempts = attempts + 1,
+                        locked_at = NOW(), updated_at = NOW()
+                    WHERE job_id IN (
+                        SELECT job_id FROM jobs
+                        WHERE (status = 'pending' AND run_at <= NOW())
+                           OR (status = 'running' AND locked_at < NOW() - make_interval(secs => %s))
+                        ORDER BY run_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING job_id, job_type, payload, attempts, max_attempts
+                """, (self.lock_timeout, limit))
+                return [dict(row) for row in cur.fetchall()]
+
+    def complete(self, job_id: int) -> None:
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM jobs WHERE job_id = %s", (job_id,))
+
+    def retry(self, job_id: int, delay: float, error: str) -> None:
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE jobs
+                    SET status = 'pending', run_at = NOW() + make_interval(secs => %s),
+                        locked_at = NULL, last_error = %s, updated_at = NOW()
+                    WHERE job_id = %s
+                """, (delay, error, job_id))
+
+    def fail(self, job_id: int, error: str) -> None:
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE jobs
+                    SET status = 'failed', locked_at = NULL, last_error = %s, updated_at = NOW()
+                    WHERE job_id = %s
+                """, (error, job_id))
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of stored jobs per status."""
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT status, COUNT(*) as count FROM jobs GROUP BY status")
+                return {row['status']: row['count'] for row in cur.fetchall()}
+
+
+class JobQueue:
+    """
+    Background job runner for work that should not block a request.
+
+    Handlers are registered per job type and receive the job payload. A handler
+    that raises is retried with exponential backoff until max_attempts is
+    reached, after which the job is kept with status 'failed'.
+    """
+
+    def __init__(self, store, concurrency: int = 4, poll_interval: float = 1.0,
+                 backoff_base: float = 5, backoff_max: float = 3600, max_attempts: int = 5):
+        """
+        Initialize the queue.
+
+        Args:
+            store: Job storage (PostgresJobStore)
+            concurrency: Number of jobs run in parallel by start()
+            poll_interval: Seconds between polls when the queue is empty
+            backoff_base: Delay in seconds before the first retry
+            backoff_max: Maximum delay in seconds between retries
+            max_attempts: Default number of attempts per job
+        """
+        self.store = store
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_attempts = max_attempts
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._slots = threading.Semaphore(concurrency)
+        self._running = False
+        self._thread = None
+        self._thread_pid = None
+        self._executor = None
+        self._metrics = {
+            'enqueued': 0,
+            'claimed': 0,
+            'succeeded': 0,
+            'retried': 0,
+            'failed': 0,
+            'poll_errors': 0
+        }
+        self._durations = {}
+
+    def register(self, job_type: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """Register the handler for a job type."""
+        self._handlers[job_type] = handler
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._metrics[name] += amount
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], cur=None, delay: float = 0,
+                max_attempts: Optional[int] = None) -> None:
+        """
+        Add a job to the queue.
+
+        Args:
+            job_type: Registered job type
+            payload: JSON-serializable handler input
+            cur: Cursor of an open transaction to enqueue atomically with (optional)
+            delay: Seconds before the job becomes runnable
+            max_attempts: Attempts before the job is marked failed (defaults to the queue's)
+        """
+        self.enqueue_many(job_type, [payload], cur=cur, delay=delay, max_attempts=max_attempts)
+
+    def enqueue_many(self, job_type: str, payloads: List[Dict[str, Any]], cur=None, delay: float = 0,
+                     max_attempts: Optional[int] = None) -> None:
+        """Add several jobs of one type with a single insert."""
+        if not payloads:
+            return
+        max_attempts = max_attempts or self.max_attempts
+        with self._lock:
+            if self._running and self._thread_pid != os.getpid():
+                self._start_threads()
+        self.store.enqueue([(job_type, payload, delay, max_attempts) for payload in payloads], cur=cur)
+        self._count('enqueued', len(payloads))
+        if delay <= 0:
+            self._wakeup.set()
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        """Run one claimed job and record its outcome."""
+        started = time.monotonic()
+        try:
+            handler = self._handlers.get(job['job_type'])
+            if handler is None:
+                raise Exception(f"No handler registered for job type {job['job_type']}")
+            handler(job['payload'])
+        except Exception as e:
+            error = str(e)
+            logger.warning(f"Job {job['job_id']} ({job['job_type']}) attempt {job['attempts']} failed: {error}")
+            try:
+                if job['attempts'] >= job['max_attempts']:
+                    self.store.fail(job['job_id'], error)
+                    self._count('failed')
+                else:
+                    self.store.retry(job['job_id'], retry_delay(job['attempts'], self.backoff_base, self.backoff_max), error)
+                    self._count('retried')
+            except Exception as store_error:
+                # The job stays 'running' and is reclaimed once its lock times out
+                logger.error(f"Error recording failure of job {job['job_id']}: {str(store_error)}")
+            return
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                count, total, longest = self._durations.get(job['job_type'], (0, 0.0, 0.0))
+                self._durations[job['job_type']] = (count + 1, total + elapsed, max(longest, elapsed))
+
+        try:
+            self.store.complete(job['job_id'])
+            self._count('succeeded')
+        except Exception as e:
+            logger.error(f"Error completing job {job['job_id']}: {str(e)}")
+
+    def run_once(self, limit: Optional[int] = None) -> int:
+        """
+        Claim and run runnable jobs in the calling thread.
+
+        Returns:
+            The number of jobs run
+        """
+        jobs = self.store.claim(limit or self.concurrency)
+        self._count('claimed', len(jobs))
+        for job in jobs:
+            self._execute(job)
+        return len(jobs)
+
+    def _run_job(self, job: Dict[str, Any]) -> None:
+        try:
+            self._execute(job)
+        finally:
+            self._slots.release()
+
+    def _dispatch(self) -> None:
+        """Poll for jobs whenever a worker slot is free and hand them to the thread pool."""
+        while not self._stop.is_set():
+            self._slots.acquire()
+            free = 1
+            while free < self.concurrency and self._slots.acquire(blocking=False):
+                free += 1
+            try:
+                jobs = self.store.claim(free)
+            except Exception as e:
+                logger.error(f"Error polling job queue: {str(e)}")
+                self._count('poll_errors')
+                jobs = []
+            self._count('claimed', len(jobs))
+            for job in jobs:
+                self._executor.submit(self._run_job, job)
+            for _ in range(free - len(jobs)):
+                self._slots.release()
+            if len(jobs) < free:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _start_threads(self) -> None:
+        # Threads do not survive a fork, so like get_pool() the dispatcher, its thread pool
+        # and the slots its jobs hold are tied to the process that started them
+        self._thread_pid = os.getpid()
+        self._slots = threading.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job-worker')
+        self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+        self._thread.start()
+
+    def start(self) -> None:
+        """
+        Run jobs on a background thread pool until stop() is called.
+
+        A process forked afterwards (e.g. a gunicorn --preload worker) starts its
+        own dispatcher on its first enqueue().
+        """
+        with self._lock:
+            self._running = True
+            if self._thread_pid != os.getpid():
+                self._stop.clear()
+                self._start_threads()
+
+    def stop(self) -> None:
+        """Stop polling and wait for running jobs to finish."""
+        with self._lock:
+            self._running = False
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._thread_pid = None
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def run_forever(self) -> None:
+        """Run jobs in the foreground, for a dedicated worker process."""
+        self.start()
+        try:
+            while self._thread is not None and self._thread.is_alive():
+                self._thread.join(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return job counters and per-type handler durations."""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats['handlers'] = {
+                job_type: {
+                    'runs': count,
+                    'duration_avg_ms': total / count * 1000,
+                    'duration_max_ms': longest * 1000
+                }
+                for job_type, (count, total, longest) in self._durations.items()
+            }
+        try:
+            stats['stored'] = self.store.counts()
+        except Exception as e:
+            stats['stored'] = {'error': str(e)}
+        return stats
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, creating it on first use."""
+    global _queue
+    if _queue is not None:
+        return _queue
+
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                PostgresJobStore(lock_timeout=float(os.getenv('JOB_LOCK_TIMEOUT', '300'))),
+                concurrency=int(os.getenv('JOB_CONCURRENCY', '4')),
+                poll_interval=float(os.getenv('JOB_POLL_INTERVAL', '1')),
+                backoff_base=float(os.getenv('JOB_BACKOFF_BASE', '5')),
+                backoff_max=float(os.getenv('JOB_BACKOFF_MAX', '3600')),
+                max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+            )
+        return _queue
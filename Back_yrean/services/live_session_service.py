@@ -0,0 +1,301 @@
+import os
+import uuid
+import hmac
+import logging
+from typing import Any, Dict, Hashable, Optional
+from flask import json, request
+from flask_socketio import Namespace, join_room, leave_room
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+from services.cache import LRUCache
+from services.collaboration_service import UpdateCoalescer
+from services.db_pool import get_pool
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Serialized session decks each worker keeps after serving them once
+LIVE_DECK_CACHE_ENTRIES = int(os.getenv('LIVE_DECK_CACHE_ENTRIES', '100'))
+
+
+def live_room(session_id: str) -> str:
+    return f"live:{session_id}"
+
+
+class LiveSession:
+    """State of one presenter-led play session."""
+
+    def __init__(self, session_id: str, presentation_id: int, presenter_key: str, revision: int,
+                 total_slides: int, current_slide: int = 0, viewers: int = 0):
+        self.session_id = session_id
+        self.presentation_id = presentation_id
+        self.presenter_key = presenter_key
+        self.revision = revision
+        self.total_slides = total_slides
+        self.current_slide = current_slide
+        self.viewers = viewers
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'presentation_id': self.presentation_id,
+            'current_slide': self.current_slide,
+            'total_slides': self.total_slides,
+            'revision': self.revision,
+            'viewers': self.viewers
+        }
+
+
+class PostgresLiveSessionStore:
+    """
+    Live sessions in the live_sessions table, shared by every process.
+
+    The pool is looked up on every call, so a worker forked after the store
+    was built gets its own connections.
+    """
+
+    def create(self, session: LiveSession, deck_json: bytes, ttl: float) -> None:
+        """Store a new session and drop sessions idle for longer than ttl seconds."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM live_sessions
+                    WHERE last_activity < NOW() - make_interval(secs => %s)
+                """, (ttl,))
+                cur.execute("""
+                    INSERT INTO live_sessions
+                    (session_id, presentation_id, presenter_key, revision, total_slides, deck)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (session.session_id, session.presentation_id, session.presenter_key,
+                      session.revision, session.total_slides, deck_json.decode('utf-8')))
+                conn.commit()
+
+    def get(self, session_id: str, ttl: float) -> Optional[Dict[str, Any]]:
+        """Return a session's state (without its deck), or None if it does not exist or has been idle too long."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT session_id, presentation_id, presenter_key, revision, total_slides,
+                           current_slide, viewers
+                    FROM live_sessions
+                    WHERE session_id = %s AND last_activity >= NOW() - make_interval(secs => %s)
+                """, (session_id, ttl))
+                row = cur.fetchone()
+                return dict(row) if row else None
+
+    def get_deck(self, session_id: str) -> Optional[bytes]:
+        """Return the deck JSON a session was started with."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT deck FROM live_sessions WHERE session_id = %s", (session_id,))
+                row = cur.fetchone()
+                return row['deck'].encode('utf-8') if row else None
+
+    def set_slides(self, slides: Dict[str, int]) -> None:
+        """Record the current slide of several sessions with one statement."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    UPDATE live_sessions ls
+                    SET current_slide = v.current_slide, last_activity = NOW()
+                    FROM (VALUES %s) AS v(session_id, current_slide)
+                    WHERE ls.session_id = v.session_id
+                """, list(slides.items()))
+                conn.commit()
+
+    def add_viewer(self, session_id: str, delta: int) -> Optional[int]:
+        """Adjust a session's viewer count; returns the new count, or None if the session is gone."""
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE live_sessions SET viewers = GREATEST(0, viewers + %s)
+                    WHERE session_id = %s
+                    RETURNING viewers
+                """, (delta, session_id))
+                row = cur.fetchone()
+                conn.commit()
+                return row['viewers'] if row else None
+
+    def delete(self, session_id: str) -> bool:
+        with get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM live_sessions WHERE session_id = %s", (session_id,))
+                conn.commit()
+                return cur.rowcount > 0
+
+
+class LiveSessionService:
+    """
+    Registry of live play sessions, shared by every worker through the database.
+
+    The deck is loaded and serialized once when a session starts. Each worker
+    keeps the decks it has served in memory, so viewers only cost a primary key
+    lookup of the session's small state. Decks are stored with unsigned image
+    URLs; with a private bucket they are signed each time they are served, as
+    sessions outlive presigned URLs.
+    """
+
+    def __init__(self, presentations_service, store=None, ttl: Optional[float] = None):
+        """
+        Initialize the service.
+
+        Args:
+            presentations_service: PresentationsService used to build session decks
+            store: Session storage (defaults to PostgresLiveSessionStore)
+            ttl: Idle seconds after which a session is dropped (defaults to LIVE_SESSION_TTL)
+        """
+        self.presentations_service = presentations_service
+        self.store = store or PostgresLiveSessionStore()
+        self.ttl = float(os.getenv('LIVE_SESSION_TTL', '21600')) if ttl is None else ttl
+        self._decks = LRUCache(max_entries=LIVE_DECK_CACHE_ENTRIES, ttl=self.ttl)
+
+    def start_session(self, presentation_id: int) -> Optional[LiveSession]:
+        """
+        Start a live session for a presentation.
+
+        Args:
+            presentation_id: The ID of the presentation to present
+
+        Returns:
+            The new LiveSession, or None if the presentation does not exist
+        """
+        deck = self.presentations_service.get_full_presentation(presentation_id, sign=False)
+        if not deck:
+            return None
+        session = LiveSession(uuid.uuid4().hex, presentation_id, uuid.uuid4().hex,
+                              deck.get('revision', 0), len(deck['slides']))
+        deck_json = json.dumps(deck).encode('utf-8')
+        self.store.create(session, deck_json, self.ttl)
+        self._decks.set(session.session_id, deck_json)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[LiveSession]:
+        """Return a live session, or None if it does not exist or has expired."""
+        if not session_id:
+            return None
+        row = self.store.get(str(session_id), self.ttl)
+        return LiveSession(**row) if row else None
+
+    def get_deck(self, session_id: str) -> Optional[bytes]:
+        """Return the serialized deck of a session with image URLs signed for this response."""
+        deck_json = self._decks.get(session_id)
+        if deck_json is None:
+            deck_json = self.store.get_deck(session_id)
+            if deck_json is None:
+                return None
+            self._decks.set(session_id, deck_json)
+        s3_service = self.presentations_service.s3_service
+        if not s3_service.private:
+            return deck_json
+        # Signed URLs come from S3Service's cache, so this only re-encodes the deck
+        return json.dumps(s3_service.sign_urls(json.loads(deck_json))).encode('utf-8')
+
+    def authorize(self, session_id: str, presenter_key: Optional[str]) -> Optional[LiveSession]:
+        """Return the session if presenter_key is the session's presenter key."""
+        session = self.get_session(session_id)
+        if session is None or not presenter_key:
+            return None
+        if not hmac.compare_digest(session.presenter_key, str(presenter_key)):
+            return None
+        return session
+
+    def set_slides(self, slides: Dict[str, int]) -> None:
+        """Record the slide each of several sessions is showing."""
+        if slides:
+            self.store.set_slides(slides)
+
+    def end_session(self, session_id: str) -> bool:
+        self._decks.delete(session_id)
+        return self.store.delete(session_id)
+
+    def add_viewer(self, session_id: str, delta: int) -> Optional[int]:
+        return self.store.add_viewer(session_id, delta)
+
+
+class LiveNamespace(Namespace):
+    """
+    Socket.IO namespace broadcasting a presenter's position to viewers.
+
+    Slide changes are coalesced per session, so a presenter skipping through
+    several slides produces a single write and broadcast of the latest slide.
+
+    Client events: join, leave, presenter:slide, presenter:end
+    Server events: slide, ended
+    """
+
+    def __init__(self, namespace: str, live_session_service: LiveSessionService,
+                 interval: Optional[float] = None):
+        super().__init__(namespace)
+        if interval is None:
+            interval = float(os.getenv('LIVE_BROADCAST_MS', '50')) / 1000
+        self.live_session_service = live_session_service
+        self.broadcaster = UpdateCoalescer(self._broadcast, interval=interval)
+        self._viewer_sessions = {}
+
+    def _broadcast(self, pending: Dict[Hashable, Dict[str, Any]]) -> None:
+        # Stored first, so viewers joining through any worker start on the slide being broadcast
+        self.live_session_service.set_slides(
+            {session_id: state['current_slide'] for session_id, state in pending.items()})
+        for session_id, state in pending.items():
+            self.emit('slide', state, room=live_room(session_id))
+
+    def on_join(self, data):
+        session = self.live_session_service.get_session(data.get('session_id'))
+        if session is None:
+            return {'error': 'Live session not found'}
+        previous = self._viewer_sessions.get(request.sid)
+        if previous != session.session_id:
+            # A connection watches one session at a time
+            if previous is not None:
+                leave_room(live_room(previous))
+                self.live_session_service.add_viewer(previous, -1)
+            self._viewer_sessions[request.sid] = session.session_id
+            viewers = self.live_session_service.add_viewer(session.session_id, 1)
+            if viewers is not None:
+                session.viewers = viewers
+        join_room(live_room(session.session_id))
+        return {'success': True, **session.state()}
+
+    def on_leave(self, data):
+        session_id = self._viewer_sessions.pop(request.sid, None)
+        if session_id is not None:
+            leave_room(live_room(session_id))
+            self.live_session_service.add_viewer(session_id, -1)
+        return {'success': True}
+
+    def on_disconnect(self):
+        session_id = self._viewer_sessions.pop(request.sid, None)
+        if session_id is not None:
+            self.live_session_service.add_viewer(session_id, -1)
+
+    def on_presenter_slide(self, data):
+        session = self.live_session_service.authorize(data.get('session_id'), data.get('presenter_key'))
+        if session is None:
+            return {'error': 'Invalid session or presenter key'}
+        try:
+            slide_index = int(data.get('slide_index'))
+        except (TypeError, ValueError):
+            return {'error': 'Invalid slide_index'}
+        if not 0 <= slide_index < session.total_slides:
+            return {'error': 'slide_index out of range'}
+        self.broadcaster.submit(session.session_id, {
+            'current_slide': slide_index,
+            'revision': session.revision
+        })
+        return {'success': True}
+
+    def on_presenter_end(self, data):
+        session = self.live_session_service.authorize(data.get('session_id'), data.get('presenter_key'))
+        if session is None:
+            return {'error': 'Invalid session or presenter key'}
+        self.broadcaster.discard(session.session_id)
+        self.live_session_service.end_session(session.session_id)
+        self.emit('ended', {'session_id': session.session_id}, room=live_room(session.session_id))
+        self.close_room(live_room(session.session_id))
+        return {'success': True}
+
+    def trigger_event(self, event, *args):
+        # Client event names use ':' separators, which are not valid in handler names
+        return super().trigger_event(event.replace(':', '_'), *args)
@@ -0,0 +1,291 @@
+import os
+import re
+import time
+import threading
+import logging
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+# Separate logger, so slow queries can be routed to their own handler
+slow_query_logger = logging.getLogger('slow_queries')
+
+# Queries taking at least this long are written to the slow query log
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_MAX_SQL_CHARS = 2000
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...]) -> str:
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _format_labels(self.labelnames, labels), value) for labels, value in sorted(values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, in the Prometheus exposition layout."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            counts, total = self._values.get(labels, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[labels] = (counts, total + value)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        samples = []
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket",
+                                _format_labels(self.labelnames + ('le',), labels + (_format_value(bound),)),
+                                cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, labels), total))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative))
+        return samples
+
+
+class CallbackMetric:
+    """Gauge or counter whose values are read from a callback when metrics are scraped."""
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], Dict[Tuple, float]],
+                 labelnames: Iterable[str] = (), kind: str = 'gauge'):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning(f"Could not collect {self.name}: {str(e)}")
+            return []
+        return [(self.name, _format_labels(self.labelnames, labels), value)
+                for labels, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise Exception(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name: str, help_text: str, callback: Callable[[], Dict[Tuple, float]],
+                 labelnames: Iterable[str] = (), kind: str = 'gauge') -> CallbackMetric:
+        """Register values computed at scrape time, as {label values tuple: value}."""
+        return self._add(CallbackMetric(name, help_text, callback, labelnames, kind))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route and status',
+    ('method', 'route', 'status'))
+http_request_db_duration = registry.histogram(
+    'http_request_db_seconds', 'Time a request spent in database queries',
+    ('method', 'route'))
+http_request_db_queries = registry.histogram(
+    'http_request_db_queries', 'Database queries a request ran',
+    ('method', 'route'), buckets=QUERY_COUNT_BUCKETS)
+http_request_s3_duration = registry.histogram(
+    'http_request_s3_seconds', 'Time a request spent in S3 calls',
+    ('method', 'route'))
+db_query_duration = registry.histogram(
+    'db_query_duration_seconds', 'Duration of every database query, including background work')
+db_slow_queries = registry.counter(
+    'db_slow_queries_total', 'Queries slower than SLOW_QUERY_THRESHOLD_MS')
+s3_call_duration = registry.histogram(
+    's3_call_duration_seconds', 'Duration of S3 client calls, including background work',
+    ('operation',))
+
+
+class RequestStats:
+    """Database and S3 time accumulated by the request being handled."""
+
+    __slots__ = ('started', 'db_seconds', 'db_queries', 's3_seconds', 's3_calls')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.s3_seconds = 0.0
+        self.s3_calls = 0
+
+
+# Set for the duration of each HTTP request; background threads have none
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+
+def start_request() -> Any:
+    """Start accumulating stats for the current request; returns the token for end_request()."""
+    return _request_stats.set(RequestStats())
+
+
+def current_request() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def end_request(token: Any) -> None:
+    _request_stats.reset(token)
+
+
+def record_request(method: str, route: str, status: int) -> Optional[RequestStats]:
+    """Observe the current request's latency, DB and S3 figures under its route template."""
+    stats = _request_stats.get()
+    if stats is None:
+        return None
+    http_request_duration.observe(time.perf_counter() - stats.started, method, route, str(status))
+    http_request_db_duration.observe(stats.db_seconds, method, route)
+    http_request_db_queries.observe(stats.db_queries, method, route)
+    http_request_s3_duration.observe(stats.s3_seconds, method, route)
+    return stats
+
+
+def params_shape(params: Any) -> Any:
+    """Describe query parameters by type and size only, so values (e.g. password hashes) are never logged."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: params_shape(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        if len(params) > 10:
+            return f"{type(params).__name__}[{len(params)}]"
+        return [params_shape(value) for value in params]
+    if isinstance(params, (str, bytes)):
+        return f"{type(params).__name__}[{len(params)}]"
+    return type(params).__name__
+
+
+def observe_query(sql: Any, params: Any, seconds: float) -> None:
+    """Record one database query, and log it when it is slower than the threshold."""
+    db_query_duration.observe(seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_seconds += seconds
+        stats.db_queries += 1
+    if seconds * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        db_slow_queries.inc()
+        text = sql.decode('utf-8', 'replace') if isinstance(sql, bytes) else str(sql)
+        text = re.sub(r'\s+', ' ', text).strip()[:SLOW_QUERY_MAX_SQL_CHARS]
+        slow_query_logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {text} params={params_shape(params)}")
+
+
+def observe_s3(operation: str, seconds: float) -> None:
+    """Record one S3 client call."""
+    s3_call_duration.observe(seconds, operation)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.s3_seconds += seconds
+        stats.s3_calls += 1
+
+
+class InstrumentedS3Client:
+    """
+    Proxy for a boto3 client that times every API call.
+
+    Presigning happens locally and is passed through untimed. Calls made from
+    other threads (e.g. multipart part uploads) count towards the S3 histogram
+    but not towards the request that started them.
+    """
+
+    UNTIMED = frozenset({'generate_presigned_url', 'generate_presigned_post', 'get_paginator',
+                         'get_waiter', 'can_paginate'})
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if name in self.UNTIMED or name.startswith('_') or not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                observe_s3(name, time.perf_counter() - started)
+        return timed
@@ -0,0 +1,202 @@
+import os
+import threading
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from werkzeug.security import generate_password_hash, check_password_hash
+from dotenv import load_dotenv
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi is optional; only needed for PASSWORD_HASH_ALGORITHM=argon2
+    argon2 = None
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Cost parameters per algorithm; PASSWORD_HASH_COST overrides any of them
+DEFAULT_COSTS = {
+    'pbkdf2': {'iterations': 600000},
+    'scrypt': {'n': 32768, 'r': 8, 'p': 1},
+    'argon2': {'time_cost': 3, 'memory_cost': 65536, 'parallelism': 4}
+}
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool already has as many hashes queued as it accepts."""
+
+
+def _argon2_hasher(cost: Dict[str, int]):
+    if argon2 is None:
+        raise Exception("argon2-cffi is required for argon2 password hashes")
+    return argon2.PasswordHasher(**cost)
+
+
+def _hash_password(algorithm: str, cost: Dict[str, int], password: str) -> str:
+    """Hash a password; runs in a pool worker process."""
+    if algorithm == 'argon2':
+        return _argon2_hasher(cost).hash(password)
+    if algorithm == 'scrypt':
+        method = f"scrypt:{cost['n']}:{cost['r']}:{cost['p']}"
+    else:
+        method = f"pbkdf2:sha256:{cost['iterations']}"
+    return generate_password_hash(password, method=method)
+
+
+def _check_password(stored_hash: str, password: str) -> bool:
+    """Check a password against a hash of any supported algorithm; runs in a pool worker process."""
+    if stored_hash.startswith('$argon2'):
+        try:
+            return _argon2_hasher({}).verify(stored_hash, password)
+        except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+            return False
+    return check_password_hash(stored_hash, password)
+
+
+def parse_cost(value: Optional[str]) -> Dict[str, int]:
+    """Parse a PASSWORD_HASH_COST value such as 'n=65536,r=8,p=1'."""
+    cost = {}
+    for item in (value or '').split(','):
+        if item.strip():
+            key, _, number = item.partition('=')
+            cost[key.strip()] = int(number)
+    return cost
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords in a separate process pool.
+
+    Hashing is CPU-bound, so running it on request threads lets a burst of
+    logins starve every other request in the worker. Here it runs in a small
+    pool of processes, and at most max_pending hashes may be queued or running
+    at once; beyond that PasswordHasherBusy is raised immediately instead of
+    letting requests pile up.
+    """
+
+    def __init__(self, algorithm: str = 'pbkdf2', cost: Optional[Dict[str, int]] = None,
+                 workers: int = 2, max_pending: int = 16,
+                 executor_factory: Optional[Callable[[int], Executor]] = None):
+        """
+        Initialize the hasher.
+
+        Args:
+            algorithm: 'pbkdf2' (sha256), 'scrypt' or 'argon2' (requires argon2-cffi)
+            cost: Cost parameters overriding DEFAULT_COSTS for the algorithm
+            workers: Processes in the hashing pool
+            max_pending: Hashes queued or running before PasswordHasherBusy is raised
+            executor_factory: Builds the executor from the worker count (for tests)
+        """
+        if algorithm not in DEFAULT_COSTS:
+            raise Exception(f"Unsupported password hash algorithm: {algorithm}")
+        if algorithm == 'argon2' and argon2 is None:
+            raise Exception("argon2-cffi is required for PASSWORD_HASH_ALGORITHM=argon2")
+        self.algorithm = algorithm
+        self.cost = {**DEFAULT_COSTS[algorithm], **(cost or {})}
+        self.workers = workers
+        self.executor_factory = executor_factory or (lambda workers: ProcessPoolExecutor(max_workers=workers))
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._dummy_hash = None
+
+    def _get_executor(self) -> Executor:
+        """Return the pool, creating it on first use and again after a fork."""
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = self.executor_factory(self.workers)
+                    self._executor_pid = pid
+        return self._executor
+
+    def _replace_executor(self, broken: Executor) -> None:
+        """Drop a pool whose worker died (e.g. OOM-killed), unless another thread already replaced it."""
+        with self._executor_lock:
+            if self._executor is broken:
+                logger.warning("Password hashing pool broke, starting a new one")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, function: Callable, *args) -> Any:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many sign-in requests, please try again shortly")
+        try:
+            executor = self._get_executor()
+            try:
+                return executor.submit(function, *args).result()
+            except BrokenProcessPool:
+                # A broken pool fails every later call too, so rebuild it and retry once
+                self._replace_executor(executor)
+                return self._get_executor().submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured algorithm and cost.
+
+        Raises:
+            PasswordHasherBusy: If the pool is saturated
+        """
+        return self._run(_hash_password, self.algorithm, self.cost, password)
+
+    def verify(self, stored_hash: Optional[str], password: str) -> bool:
+        """
+        Check a password against a stored hash of any supported algorithm.
+
+        Without a stored hash (unknown user) a dummy hash is checked instead, so
+        the response takes as long as for a real account.
+
+        Raises:
+            PasswordHasherBusy: If the pool is saturated
+        """
+        if stored_hash is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash(os.urandom(16).hex())
+            self._run(_check_password, self._dummy_hash, password)
+            return False
+        return self._run(_check_password, stored_hash, password)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """Return whether a stored hash was made with another algorithm or cost than the configured one."""
+        if self.algorithm == 'argon2':
+            return not stored_hash.startswith('$argon2') or _argon2_hasher(self.cost).check_needs_rehash(stored_hash)
+        if self.algorithm == 'scrypt':
+            method = f"scrypt:{self.cost['n']}:{self.cost['r']}:{self.cost['p']}"
+        else:
+            method = f"pbkdf2:sha256:{self.cost['iterations']}"
+        return stored_hash.split('$', 1)[0] != method
+
+    def shutdown(self) -> None:
+        """Stop the pool's worker processes."""
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Return the process-wide password hasher, creating it on first use."""
+    global _hasher
+    if _hasher is not None:
+        return _hasher
+
+    with _hasher_lock:
+        if _hasher is None:
+            workers = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+            _hasher = PasswordHasher(
+                algorithm=os.getenv('PASSWORD_HASH_ALGORITHM', 'pbkdf2').lower(),
+                cost=parse_cost(os.getenv('PASSWORD_HASH_COST')),
+                workers=workers,
+                max_pending=int(os.getenv('PASSWORD_HASH_MAX_PENDING', str(workers * 8)))
+            )
+        return _hasher
@@ -0,0 +1,196 @@
+import os
+import json
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Images downloaded at once per export; each holds at most S3_MULTIPART_PART_SIZE bytes in memory
+EXPORT_CONCURRENCY = int(os.getenv('EXPORT_CONCURRENCY', '8'))
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# Fields holding an original image, rewritten to its path inside the archive
+IMAGE_FIELDS = ('image_url', 'background_image_url')
+
+# Fields holding resized copies or thumbnails, which the archive does not include
+DERIVED_FIELDS = ('display_url', 'display_url_jpeg', 'variants', 'manifest_url', 'background_image_display_url',
+                  'background_image_thumbnail_url', 'thumbnail_url', 'thumbnail_revision', 'thumbnail_queued_at')
+
+
+class _ZipStream:
+    """Write-only, unseekable file object that hands out whatever zipfile wrote since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class PresentationExporter:
+    """
+    Streams a presentation as a ZIP archive with deck.json and every image it uses.
+
+    The archive is produced while it is sent: deck.json goes out first, then
+    images are downloaded from S3 by a bounded thread pool and each is written
+    as soon as its download finishes. Nothing is staged beyond the downloads in
+    flight, so memory stays flat however large the deck is.
+    """
+
+    def __init__(self, presentations_service, max_workers: int = EXPORT_CONCURRENCY):
+        """
+        Initialize the exporter.
+
+        Args:
+            presentations_service: PresentationsService the deck is read from
+            max_workers: Images downloaded concurrently per export
+        """
+        self.presentations_service = presentations_service
+        self.s3_service = presentations_service.s3_service
+        self.max_workers = max(1, max_workers)
+
+    def load(self, presentation_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read a presentation for export and rewrite its images to archive paths.
+
+        Called before streaming starts, so a missing presentation can still be
+        answered with a 404.
+
+        Args:
+            presentation_id: The ID of the presentation to export
+
+        Returns:
+            Dict with the 'deck' to write as deck.json and the 'images' to include
+            as {archive path: image URL}, or None if the presentation does not exist
+        """
+        presentation = self.presentations_service.get_full_presentation(presentation_id)
+        if presentation is None:
+            return None
+        images = {}
+        return {'deck': self._rewrite(presentation, images), 'images': images}
+
+    def _rewrite(self, value: Any, images: Dict[str, str]) -> Any:
+        """Copy a payload with own images pointing into the archive and derived URLs removed."""
+        if isinstance(value, list):
+            return [self._rewrite(item, images) for item in value]
+        if not isinstance(value, dict):
+            return value
+        rewritten = {}
+        for key, item in value.items():
+            if key in DERIVED_FIELDS:
+                continue
+            if key in IMAGE_FIELDS and isinstance(item, str):
+                url = self.s3_service.canonical_url(item)
+                # Images outside the bucket are left as links rather than fetched
+                if self.s3_service.is_own_url(url):
+                    path = f"images/{url.rsplit('/', 1)[-1]}"
+                    images[path] = url
+                    item = path
+                rewritten[key] = item
+            else:
+                rewritten[key] = self._rewrite(item, images)
+        return rewritten
+
+    def _download(self, image_url: str):
+        return self.s3_service.download_image(image_url)
+
+    def stream(self, export: Dict[str, Any]) -> Iterator[bytes]:
+        """
+        Generate the ZIP archive of a loaded presentation chunk by chunk.
+
+        Images that cannot be downloaded are skipped and listed in
+        missing_images.json at the end of the archive.
+
+        Args:
+            export: Result of load()
+
+        Yields:
+            Consecutive chunks of the archive
+        """
+        output = _ZipStream()
+        archive = zipfile.ZipFile(output, 'w')
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='export')
+        pending = {}
+        try:
+            archive.writestr(
+                zipfile.ZipInfo('deck.json', date_time=datetime.now().timetuple()[:6]),
+                json.dumps(export['deck'], default=_json_default, indent=2),
+                compress_type=zipfile.ZIP_DEFLATED
+            )
+            yield output.drain()
+
+            queued = iter(export['images'].items())
+            missing = []
+            while True:
+                # Only max_workers downloads exist at any time, so memory does not grow with the deck
+                for path, url in queued:
+                    pending[executor.submit(self._download, url)] = (path, url)
+                    if len(pending) >= self.max_workers:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, url = pending.pop(future)
+                    try:
+                        source = future.result()
+                    except Exception as e:
+                        logger.warning(f"Could not export {url}: {str(e)}")
+                        missing.append(url)
+                        continue
+                    try:
+                        # Images are already compressed, so they are stored as-is
+                        with archive.open(zipfile.ZipInfo(path, date_time=datetime.now().timetuple()[:6]),
+                                          'w', force_zip64=True) as entry:
+                            while True:
+                                chunk = source.read(EXPORT_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                entry.write(chunk)
+                                yield output.drain()
+                    finally:
+                        source.close()
+                    yield output.drain()
+
+            if missing:
+                archive.writestr('missing_images.json', json.dumps(missing, indent=2))
+            archive.close()
+            yield output.drain()
+        finally:
+            # Reached early when the client disconnects: drop queued downloads and close finished ones
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+            for future in pending:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    future.result().close()
@@ -1,30 +1,338 @@
 import os
+import html
+import json
+import base64
+from collections import Counter
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import Json, execute_values
 from dotenv import load_dotenv
 import logging
+from services.db_pool import get_pool
+from services.cache import get_cache, LRUCache
 from services.s3_service import S3Service
+from services.image_processing import best_fit
+from services.job_queue import get_job_queue
+from services.job_handlers import ORPHAN_GRACE_SECONDS
+from services.thumbnail_renderer import THUMBNAIL_DELAY_SECONDS, is_available as thumbnails_available
 
 # Load environment variables
 load_dotenv()
 
+# Presentation listing page sizes, and how much of each description the listing returns
+PRESENTATION_PAGE_SIZE = int(os.getenv('PRESENTATION_PAGE_SIZE', '24'))
+MAX_PRESENTATION_PAGE_SIZE = 100
+LISTING_DESCRIPTION_CHARS = 280
+
+# Times an upload's image_blobs row is looked up again after racing a concurrent upload or delete
+REGISTER_IMAGE_ATTEMPTS = 3
+
+# Text search configuration, page sizes, and the markers ts_headline puts around matches
+# (control characters, so the excerpt can be HTML-escaped before they become <mark> tags)
+SEARCH_CONFIG = 'english'
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+SEARCH_HEADLINE_OPTIONS = 'StartSel="\x02", StopSel="\x03", MinWords=8, MaxWords=24, MaxFragments=2, FragmentDelimiter=" ... "'
+
+# Search entries for the given presentations, slide titles and text elements;
+# keep in line with the backfill in the create_search_documents_table migration
+SEARCH_DOCUMENTS_SELECT_SQL = """
+    SELECT 'presentation', p.presentation_id, p.user_id, p.presentation_id, NULL::int, NULL::int,
+           concat_ws(E'\\n', p.title, p.description),
+           setweight(to_tsvector(%(config)s::regconfig, p.title), 'A') ||
+           setweight(to_tsvector(%(config)s::regconfig, COALESCE(p.description, '')), 'B')
+    FROM presentations p
+    WHERE p.presentation_id = ANY(%(presentation_ids)s)
+    UNION ALL
+    SELECT 'slide', s.slide_id, p.user_id, p.presentation_id, s.slide_id, NULL::int,
+           s.title, setweight(to_tsvector(%(config)s::regconfig, s.title), 'B')
+    FROM slides s
+    JOIN presentations p ON p.presentation_id = s.presentation_id
+    WHERE s.slide_id = ANY(%(slide_ids)s) AND COALESCE(s.title, '') <> ''
+    UNION ALL
+    SELECT 'element', te.element_id, p.user_id, p.presentation_id, s.slide_id, te.element_id,
+           te.content, setweight(to_tsvector(%(config)s::regconfig, te.content), 'C')
+    FROM text_elements te
+    JOIN slide_elements se ON se.element_id = te.element_id
+    JOIN slides s ON s.slide_id = se.slide_id
+    JOIN presentations p ON p.presentation_id = s.presentation_id
+    WHERE te.element_id = ANY(%(element_ids)s) AND te.content <> ''
+"""
+
+# Owner lookup per entity type, and how many owners each process keeps in memory
+# (ownership never changes, so entries only leave the map when evicted or deleted)
+OWNER_SQL = {
+    'presentation': "SELECT user_id FROM presentations WHERE presentation_id = %s",
+    'slide': """
+        SELECT p.user_id FROM slides s
+        JOIN presentations p ON p.presentation_id = s.presentation_id
+        WHERE s.slide_id = %s
+    """,
+    'element': """
+        SELECT p.user_id FROM slide_elements se
+        JOIN slides s ON s.slide_id = se.slide_id
+        JOIN presentations p ON p.presentation_id = s.presentation_id
+        WHERE se.element_id = %s
+    """
+}
+OWNER_CACHE_ENTRIES = int(os.getenv('OWNER_CACHE_ENTRIES', '50000'))
+OWNER_CACHE_TTL = 24 * 3600
+
+# Columns returned for every slide embedded in a presentation payload
+SLIDE_JSON_SQL = """
+    json_build_object(
+        'slide_id', s.slide_id,
+        'slide_number', s.slide_number,
+        'background_color', s.background_color,
+        'background_image_url', s.background_image_url,
+        'title', s.title,
+        'background_image_opacity', s.background_image_opacity,
+        'background_image_fit', s.background_image_fit,
+        'background_image_display_url', (
+            SELECT v->>'url'
+            FROM image_assets ia, jsonb_array_elements(ia.variants) v
+            WHERE ia.image_url = s.background_image_url AND v->>'format' = 'webp'
+            ORDER BY (v->>'width')::int DESC LIMIT 1
+        ),
+        'background_image_thumbnail_url', (
+            SELECT v->>'url'
+            FROM image_assets ia, jsonb_array_elements(ia.variants) v
+            WHERE ia.image_url = s.background_image_url AND v->>'format' = 'webp'
+            ORDER BY (v->>'width')::int LIMIT 1
+        ),
+        'created_at', s.created_at,
+        'updated_at', s.updated_at
+    )
+"""
+
+# Element rows with their type-specific data folded into element_data
+SLIDE_ELEMENTS_SELECT_SQL = """
+    SELECT 
+        se.element_id,
+        se.slide_id,
+        se.element_type,
+        se.x_position,
+        se.y_position,
+        se.width,
+        se.height,
+        se.z_index,
+        CASE 
+            WHEN se.element_type = 'text' THEN 
+                json_build_object(
+                    'content', te.content,
+                    'font_family', te.font_family,
+                    'font_size', te.font_size,
+                    'font_color', te.font_color,
+                    'bold', te.bold,
+                    'italic', te.italic,
+                    'underline', te.underline,
+                    'text_align', te.text_align
+                )
+            WHEN se.element_type = 'image' THEN 
+                json_build_object(
+                    'image_url', ie.image_url,
+                    'alt_text', ie.alt_text,
+                    'variants', ia.variants
+                )
+            ELSE NULL
+        END as element_data
+    FROM slide_elements se
+    LEFT JOIN text_elements te ON se.element_id = te.element_id
+    LEFT JOIN image_elements ie ON se.element_id = ie.element_id
+    LEFT JOIN image_assets ia ON ie.image_url = ia.image_url
+"""
+
+def _presentation_cache_key(presentation_id) -> str:
+    return f"presentation:{presentation_id}"
+
+
+def _encode_listing_cursor(updated_at: datetime, presentation_id: int) -> str:
+    """Pack the sort key of the last listed presentation into an opaque cursor."""
+    raw = json.dumps([updated_at.isoformat(), presentation_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_listing_cursor(cursor: str) -> tuple:
+    """Unpack a listing cursor into (updated_at, presentation_id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        updated_at, presentation_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), int(presentation_id)
+    except Exception:
+        raise Exception("Invalid cursor")
+
+
+def _highlight(headline: str) -> str:
+    """HTML-escape a ts_headline excerpt and wrap its matches in <mark> tags."""
+    return html.escape(headline).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+def _slide_elements_cache_key(slide_id) -> str:
+    # v2 entries carry the revision they were read at
+    return f"slide_elements:v2:{slide_id}"
+
+
 class PresentationsService:
     def __init__(self):
-        """Initialize the service with database connection parameters."""
-        self.db_params = {
-            'dbname': os.getenv('DB_NAME'),
-            'user': os.getenv('DB_USERNAME'),
-            'password': os.getenv('DB_PASSWORD'),
-            'host': os.getenv('DB_ENDPOINT'),
-            'port': os.getenv('DB_PORT')
-        }
+        """Initialize the service with the payload cache and job queue."""
+        self.cache = get_cache()
         self.s3_service = S3Service()
+        self.jobs = get_job_queue()
+        self.owners = LRUCache(max_entries=OWNER_CACHE_ENTRIES, ttl=OWNER_CACHE_TTL)
 
     def _get_connection(self):
-        """Create and return a database connection."""
-        return psycopg2.connect(**self.db_params, cursor_factory=RealDictCursor)
+        """Check out a pooled database connection; it is returned to the pool when the block exits."""
+        # Looked up on every call, so a worker forked after this service was built gets its own pool
+        return get_pool().connection()
+
+    def _invalidate(self, presentation_ids: Optional[List[Any]] = None,
+                    slide_ids: Optional[List[Any]] = None) -> None:
+        """Drop cached payloads made stale by a committed write."""
+        self.cache.delete(
+            [_presentation_cache_key(presentation_id) for presentation_id in presentation_ids or []] +
+            [_slide_elements_cache_key(slide_id) for slide_id in slide_ids or []]
+        )
+
+    def _record_changes(self, cur, changes: List[tuple], presentation_id: Optional[Any] = None,
+                        slide_id: Optional[Any] = None) -> Optional[int]:
+        """
+        Advance a presentation's revision and log what changed, inside the caller's transaction.
+        
+        Args:
+            cur: Cursor of the transaction performing the write
+            changes: List of (entity_type, entity_id, slide_id, operation) tuples where
+                entity_type is 'presentation', 'slide' or 'element' and operation is
+                'insert', 'update' or 'delete'
+            presentation_id: The presentation that changed
+            slide_id: A slide of the presentation that changed, when the presentation ID is not at hand
+            
+        Returns:
+            The new revision, or None if the presentation does not exist
+        """
+        if not changes:
+            return None
+        
+        if presentation_id is not None:
+            target_sql, target_param = "presentation_id = %s", presentation_id
+        else:
+            target_sql, target_param = "presentation_id = (SELECT presentation_id FROM slides WHERE slide_id = %s)", slide_id
+        
+        entity_types, entity_ids, slide_ids, operations = (list(column) for column in zip(*changes))
+        thumbnails = thumbnails_available()
+        # thumbnail_queued_at is only set by the first write after a render, so a burst of
+        # edits queues a single thumbnail job. Whether this write set it is decided from the
+        # locked value before the update: comparing with NOW() would also match later writes
+        # of the same transaction, as NOW() is fixed per transaction.
+        cur.execute(f"""
+            WITH previous AS (
+                SELECT presentation_id, thumbnail_queued_at
+                FROM presentations
+                WHERE {target_sql}
+                FOR UPDATE
+            ),
+            bumped AS (
+                UPDATE presentations p
+                SET revision = p.revision + 1,
+                    thumbnail_queued_at = CASE WHEN %s THEN COALESCE(p.thumbnail_queued_at, NOW())
+                                               ELSE p.thumbnail_queued_at END
+                FROM previous
+                WHERE p.presentation_id = previous.presentation_id
+                RETURNING p.presentation_id, p.revision, previous.thumbnail_queued_at IS NULL AS thumbnail_due
+            ),
+            logged AS (
+                INSERT INTO presentation_changes
+                (presentation_id, revision, entity_type, entity_id, slide_id, operation)
+                SELECT b.presentation_id, b.revision, c.entity_type, c.entity_id, c.slide_id, c.operation
+                FROM bumped b,
+                     unnest(%s::varchar[], %s::int[], %s::int[], %s::varchar[])
+                         AS c(entity_type, entity_id, slide_id, operation)
+            )
+            SELECT presentation_id, revision, thumbnail_due FROM bumped
+        """, (target_param, thumbnails, entity_types, entity_ids, slide_ids, operations))
+        row = cur.fetchone()
+        if not row:
+            return None
+        self._index_search_documents(cur, changes)
+        if thumbnails and row['thumbnail_due']:
+            self.jobs.enqueue('render_thumbnail', {'presentation_id': row['presentation_id']},
+                              cur=cur, delay=THUMBNAIL_DELAY_SECONDS)
+        return row['revision']
+
+    def _index_search_documents(self, cur, changes: List[tuple]) -> None:
+        """
+        Rebuild the search entries of changed presentations, slides and text elements, inside the caller's transaction.
+        
+        Entries of deleted rows go with them through foreign keys; image elements
+        and empty titles have no entry.
+        
+        Args:
+            cur: Cursor of the transaction performing the write
+            changes: (entity_type, entity_id, slide_id, operation) tuples as passed to _record_changes
+        """
+        ids = {'presentation': set(), 'slide': set(), 'element': set()}
+        for entity_type, entity_id, _, operation in changes:
+            if operation != 'delete':
+                ids[entity_type].add(int(entity_id))
+        if not any(ids.values()):
+            return
+        
+        entity_types, entity_ids = [], []
+        for entity_type, entity_id_set in ids.items():
+            entity_types.extend([entity_type] * len(entity_id_set))
+            entity_ids.extend(sorted(entity_id_set))
+        cur.execute("""
+            DELETE FROM search_documents d
+            USING unnest(%s::varchar[], %s::int[]) AS c(entity_type, entity_id)
+            WHERE d.entity_type = c.entity_type AND d.entity_id = c.entity_id
+        """, (entity_types, entity_ids))
+        cur.execute(f"""
+            INSERT INTO search_documents
+            (entity_type, entity_id, user_id, presentation_id, slide_id, element_id, body, document)
+            {SEARCH_DOCUMENTS_SELECT_SQL}
+        """, {
+            'config': SEARCH_CONFIG,
+            'presentation_ids': sorted(ids['presentation']),
+            'slide_ids': sorted(ids['slide']),
+            'element_ids': sorted(ids['element'])
+        })
+
+    def _adjust_image_refs(self, cur, added: List[Optional[str]] = (), removed: List[Optional[str]] = ()) -> None:
+        """
+        Update image reference counts inside the caller's transaction.
+        
+        Images whose count drops to zero get a delayed orphan_cleanup job, which
+        deletes them only if they are still unreferenced when it runs.
+        
+        Args:
+            cur: Cursor of the transaction performing the write
+            added: Image URLs that gained a reference (None entries are ignored)
+            removed: Image URLs that lost a reference (None entries are ignored)
+        """
+        deltas = Counter(url for url in added if url)
+        deltas.subtract(url for url in removed if url)
+        # Sorted so concurrent writers lock image_blobs rows in the same order
+        image_urls = sorted(url for url, delta in deltas.items() if delta)
+        if not image_urls:
+            return
+        
+        cur.execute("""
+            WITH d AS (
+                SELECT * FROM unnest(%s::text[], %s::int[]) AS d(image_url, delta)
+            )
+            INSERT INTO image_blobs (image_url, ref_count)
+            SELECT image_url, GREATEST(delta, 0) FROM d
+            ORDER BY image_url
+            ON CONFLICT (image_url) DO UPDATE
+            SET ref_count = GREATEST(image_blobs.ref_count + (
+                    SELECT delta FROM d WHERE d.image_url = EXCLUDED.image_url
+                ), 0),
+                updated_at = NOW()
+            RETURNING image_url, ref_count
+        """, (image_urls, [deltas[url] for url in image_urls]))
+        released = [row['image_url'] for row in cur.fetchall() if row['ref_count'] == 0]
+        self.jobs.enqueue_many('orphan_cleanup', [{'image_url': url} for url in released],
+                               cur=cur, delay=ORPHAN_GRACE_SECONDS)
 
     def create_presentation(self, user_id: int, title: str, description: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -54,38 +362,37 @@ class PresentationsService:
                     """, (user_id, title, description))
                     
                     presentation = cur.fetchone()
+                    self._index_search_documents(cur, [('presentation', presentation['presentation_id'], None, 'insert')])
                     conn.commit()
+                    self.owners.set(f"presentation:{presentation['presentation_id']}", str(presentation['user_id']).encode('utf-8'))
                     return dict(presentation)
                     
         except Exception as e:
             raise Exception(f"Error creating presentation: {str(e)}")
 
-    def get_presentation(self, presentation_id: str) -> Optional[Dict[str, Any]]:
+    def get_presentation(self, presentation_id: str,
+                         min_revision: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
         Retrieve a presentation by its ID.
         
         Args:
             presentation_id: The UUID of the presentation to retrieve
+            min_revision: A cached copy older than this revision is reloaded (optional)
             
         Returns:
             Dict containing presentation information or None if not found
         """
         try:
+            cache_key = _presentation_cache_key(presentation_id)
+            cached = self.cache.get(cache_key)
+            if cached is not None and (min_revision is None or cached['revision'] >= min_revision):
+                return self.s3_service.sign_urls(cached)
+            
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute("""
+                    cur.execute(f"""
                         SELECT p.*, 
-                               json_agg(json_build_object(
-                                   'slide_id', s.slide_id,
-                                   'slide_number', s.slide_number,
-                                   'background_color', s.background_color,
-                                   'background_image_url', s.background_image_url,
-                                   'title', s.title,
-                                   'background_image_opacity', s.background_image_opacity,
-                                   'background_image_fit', s.background_image_fit,
-                                   'created_at', s.created_at,
-                                   'updated_at', s.updated_at
-                               ) ORDER BY s.slide_number) as slides
+                               json_agg({SLIDE_JSON_SQL} ORDER BY s.slide_number) as slides
                         FROM presentations p
                         LEFT JOIN slides s ON p.presentation_id = s.presentation_id
                         WHERE p.presentation_id = %s
@@ -93,46 +400,370 @@ class PresentationsService:
                     """, (presentation_id,))
                     
                     presentation = cur.fetchone()
-                    if presentation and presentation['slides'][0] is None:
+                    if not presentation:
+                        return None
+                    if presentation['slides'][0] is None:
                         presentation['slides'] = []
-                    return dict(presentation) if presentation else None
+                    presentation = dict(presentation)
+                    self.cache.set(cache_key, presentation)
+                    return self.s3_service.sign_urls(presentation)
                     
         except Exception as e:
             raise Exception(f"Error retrieving presentation: {str(e)}")
 
-    def get_user_presentations(self, user_id: int) -> List[Dict[str, Any]]:
-        print("get_user_presentations!!!!11111")
-        print("user_id", user_id)
+    def get_presentation_revision(self, presentation_id: str) -> Optional[int]:
         """
-        Retrieve all presentations for a user.
+        Retrieve a presentation's current revision without loading its slides.
         
         Args:
-            user_id: The ID of the user whose presentations to retrieve
+            presentation_id: The ID of the presentation
             
         Returns:
-            List of dictionaries containing presentation information
+            The revision number or None if the presentation does not exist
         """
-        print("get_user_presentations!!!!22222")
         try:
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute("""
-                        SELECT p.*, 
-                               COUNT(s.slide_id) as slide_count,
-                               MAX(s.updated_at) as last_updated
-                        FROM presentations p
-                        LEFT JOIN slides s ON p.presentation_id = s.presentation_id
-                        WHERE p.user_id = %s
-                        GROUP BY p.presentation_id
-                        ORDER BY p.updated_at DESC
+                        SELECT revision FROM presentations WHERE presentation_id = %s
+                    """, (presentation_id,))
+                    row = cur.fetchone()
+                    return row['revision'] if row else None
+                    
+        except Exception as e:
+            raise Exception(f"Error retrieving presentation revision: {str(e)}")
+
+    def get_owner(self, entity_type: str, entity_id: Any) -> Optional[int]:
+        """
+        Retrieve the user who owns a presentation, or the presentation a slide or element belongs to.
+        
+        Owners are kept in an in-process map, so ownership checks on hot paths
+        cost no query once an entity has been seen.
+        
+        Args:
+            entity_type: 'presentation', 'slide' or 'element'
+            entity_id: The ID of the entity
+            
+        Returns:
+            The owner's user ID or None if the entity does not exist
+        """
+        if entity_type not in OWNER_SQL:
+            raise Exception(f"Unsupported entity type: {entity_type}")
+        try:
+            entity_id = int(entity_id)
+        except (TypeError, ValueError):
+            return None
+        key = f"{entity_type}:{entity_id}"
+        cached = self.owners.get(key)
+        if cached is not None:
+            return int(cached)
+        
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(OWNER_SQL[entity_type], (entity_id,))
+                    row = cur.fetchone()
+                    
+        except Exception as e:
+            raise Exception(f"Error retrieving owner: {str(e)}")
+        
+        # Misses are not remembered, so an entity created right after is found
+        if row is None:
+            return None
+        self.owners.set(key, str(row['user_id']).encode('utf-8'))
+        return row['user_id']
+
+    def get_slide_revision(self, slide_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the revision of the presentation a slide belongs to.
+        
+        Args:
+            slide_id: The ID of the slide
+            
+        Returns:
+            Dict with presentation_id and revision, or None if the slide does not exist
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT p.presentation_id, p.revision
+                        FROM slides s
+                        JOIN presentations p ON p.presentation_id = s.presentation_id
+                        WHERE s.slide_id = %s
+                    """, (slide_id,))
+                    row = cur.fetchone()
+                    return dict(row) if row else None
+                    
+        except Exception as e:
+            raise Exception(f"Error retrieving slide revision: {str(e)}")
+
+    def get_presentation_changes(self, presentation_id: int, since_revision: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve everything that changed in a presentation after a given revision.
+        
+        Args:
+            presentation_id: The ID of the presentation
+            since_revision: The revision the client already holds
+            
+        Returns:
+            Dict with the current revision, the changed presentation fields (or None),
+            inserted/updated slides and elements, and the IDs of deleted slides and
+            elements. 'reset' is True when the change log no longer covers
+            since_revision and the client must refetch the whole presentation.
+            Returns None if the presentation does not exist.
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT revision FROM presentations WHERE presentation_id = %s
+                    """, (presentation_id,))
+                    row = cur.fetchone()
+                    if not row:
+                        return None
+                    revision = row['revision']
+                    
+                    delta = {
+                        'revision': revision,
+                        'reset': False,
+                        'presentation': None,
+                        'slides': [],
+                        'elements': [],
+                        'deleted_slide_ids': [],
+                        'deleted_element_ids': []
+                    }
+                    if since_revision >= revision:
+                        return delta
+                    
+                    # Every revision logs at least one change, so a missing row means the log was pruned
+                    cur.execute("""
+                        SELECT 1 FROM presentation_changes
+                        WHERE presentation_id = %s AND revision = %s
+                        LIMIT 1
+                    """, (presentation_id, since_revision + 1))
+                    if not cur.fetchone():
+                        delta['reset'] = True
+                        return delta
+                    
+                    # Only the latest operation per entity matters
+                    cur.execute("""
+                        SELECT DISTINCT ON (entity_type, entity_id) entity_type, entity_id, operation
+                        FROM presentation_changes
+                        WHERE presentation_id = %s AND revision > %s AND revision <= %s
+                        ORDER BY entity_type, entity_id, revision DESC, change_id DESC
+                    """, (presentation_id, since_revision, revision))
+                    
+                    changed = {'presentation': [], 'slide': [], 'element': []}
+                    for change in cur.fetchall():
+                        if change['operation'] == 'delete':
+                            delta[f"deleted_{change['entity_type']}_ids"].append(change['entity_id'])
+                        else:
+                            changed[change['entity_type']].append(change['entity_id'])
+                    
+                    if changed['presentation']:
+                        cur.execute("""
+                            SELECT presentation_id, user_id, title, description, created_at, updated_at
+                            FROM presentations WHERE presentation_id = %s
+                        """, (presentation_id,))
+                        delta['presentation'] = dict(cur.fetchone())
+                    
+                    if changed['slide']:
+                        cur.execute(f"""
+                            SELECT {SLIDE_JSON_SQL} as slide
+                            FROM slides s
+                            WHERE s.slide_id = ANY(%s)
+                            ORDER BY s.slide_number
+                        """, (changed['slide'],))
+                        delta['slides'] = [row['slide'] for row in cur.fetchall()]
+                    
+                    if changed['element']:
+                        cur.execute(f"""
+                            {SLIDE_ELEMENTS_SELECT_SQL}
+                            WHERE se.element_id = ANY(%s)
+                            ORDER BY se.slide_id, se.z_index
+                        """, (changed['element'],))
+                        delta['elements'] = [self._format_element(element) for element in cur.fetchall()]
+                        # Elements removed by a slide deletion cascade have no log row of their own
+                        found = {element['element_id'] for element in delta['elements']}
+                        delta['deleted_element_ids'].extend(
+                            element_id for element_id in changed['element'] if element_id not in found
+                        )
+                    
+                    return delta
+                    
+        except Exception as e:
+            raise Exception(f"Error retrieving presentation changes: {str(e)}")
+
+    def prune_presentation_changes(self, older_than_days: int = 30) -> int:
+        """
+        Delete change log rows older than the retention window.
+        
+        Clients holding a revision from before the window receive a reset from
+        get_presentation_changes and refetch the whole presentation.
+        
+        Args:
+            older_than_days: Retention window in days
+            
+        Returns:
+            Number of rows deleted
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        DELETE FROM presentation_changes
+                        WHERE changed_at < NOW() - make_interval(days => %s)
+                    """, (older_than_days,))
+                    deleted = cur.rowcount
+                    conn.commit()
+                    return deleted
+                    
+        except Exception as e:
+            raise Exception(f"Error pruning presentation changes: {str(e)}")
+
+    def get_user_presentations_version(self, user_id: int) -> str:
+        """
+        Compute a version marker that changes whenever a user's presentation listing changes.
+        
+        Args:
+            user_id: The ID of the user
+            
+        Returns:
+            Opaque version string
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT COUNT(*) as count,
+                               COALESCE(SUM(revision), 0) as revisions,
+                               COALESCE(MAX(presentation_id), 0) as max_id,
+                               MAX(updated_at) as updated_at,
+                               COALESCE(SUM(thumbnail_revision), 0) as thumbnails
+                        FROM presentations
+                        WHERE user_id = %s
                     """, (user_id,))
+                    row = cur.fetchone()
+                    updated_at = row['updated_at'].timestamp() if row['updated_at'] else 0
+                    return f"{row['count']}-{row['revisions']}-{row['max_id']}-{updated_at}-{row['thumbnails']}"
+                    
+        except Exception as e:
+            raise Exception(f"Error retrieving user presentations version: {str(e)}")
+
+    def get_user_presentations(self, user_id: int, limit: int = PRESENTATION_PAGE_SIZE,
+                               cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieve one page of a user's presentations, most recently updated first.
+        
+        Pages are fetched by keyset on (updated_at, presentation_id), so later pages
+        cost the same as the first one. Only the fields the listing shows are
+        selected, with descriptions cut to LISTING_DESCRIPTION_CHARS characters.
+        
+        Args:
+            user_id: The ID of the user whose presentations to retrieve
+            limit: Maximum number of presentations to return (capped at MAX_PRESENTATION_PAGE_SIZE)
+            cursor: The next_cursor of the previous page (optional)
+            
+        Returns:
+            Dict with the 'presentations' list and 'next_cursor', which is None on the last page
+        """
+        try:
+            limit = max(1, min(int(limit), MAX_PRESENTATION_PAGE_SIZE))
+            after = _decode_listing_cursor(cursor) if cursor else None
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        SELECT presentation_id, title, LEFT(description, %s) as description,
+                               slide_count, revision, thumbnail_url, created_at, updated_at
+                        FROM presentations
+                        WHERE user_id = %s
+                        {'AND (updated_at, presentation_id) < (%s, %s)' if after else ''}
+                        ORDER BY updated_at DESC, presentation_id DESC
+                        LIMIT %s
+                    """, (LISTING_DESCRIPTION_CHARS, user_id, *(after or ()), limit + 1))
                     
-                    presentations = cur.fetchall()
-                    return [dict(p) for p in presentations]
+                    presentations = [dict(p) for p in cur.fetchall()]
+                    next_cursor = None
+                    if len(presentations) > limit:
+                        presentations = presentations[:limit]
+                        last = presentations[-1]
+                        next_cursor = _encode_listing_cursor(last['updated_at'], last['presentation_id'])
+                    return {'presentations': self.s3_service.sign_urls(presentations), 'next_cursor': next_cursor}
                     
         except Exception as e:
             raise Exception(f"Error retrieving user presentations: {str(e)}")
 
+    def search_user_presentations(self, user_id: int, query: str, limit: int = SEARCH_PAGE_SIZE,
+                                  offset: int = 0) -> Dict[str, Any]:
+        """
+        Full-text search over a user's presentation titles and descriptions, slide titles and text elements.
+        
+        The query uses web search syntax ("quoted phrases", or, -excluded). Matches
+        in presentation titles rank above descriptions and slide titles, which rank
+        above slide text.
+        
+        Args:
+            user_id: The ID of the user whose presentations to search
+            query: The search text
+            limit: Maximum number of results to return (capped at MAX_SEARCH_PAGE_SIZE)
+            offset: Number of results to skip
+            
+        Returns:
+            Dict with the 'results' list, best match first, and 'next_offset', which is
+            None on the last page. Each result has entity_type ('presentation', 'slide'
+            or 'element'), presentation_id, presentation_title, slide_id, slide_number,
+            element_id, rank and an HTML-escaped headline with matches in <mark> tags
+        """
+        try:
+            query = (query or '').strip()
+            if not query:
+                raise Exception("Search query is required")
+            limit = max(1, min(int(limit), MAX_SEARCH_PAGE_SIZE))
+            offset = max(0, int(offset))
+            
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    # Headlines are the expensive part, so they are only built for the page returned
+                    cur.execute("""
+                        WITH q AS (
+                            SELECT websearch_to_tsquery(%(config)s::regconfig, %(query)s) AS query
+                        ),
+                        hits AS (
+                            SELECT d.entity_type, d.entity_id, d.presentation_id, d.slide_id, d.element_id,
+                                   d.body, ts_rank(d.document, q.query, 1) AS rank
+                            FROM search_documents d, q
+                            WHERE d.user_id = %(user_id)s AND d.document @@ q.query
+                            ORDER BY rank DESC, d.entity_type, d.entity_id
+                            LIMIT %(limit)s OFFSET %(offset)s
+                        )
+                        SELECT h.entity_type, h.presentation_id, p.title AS presentation_title,
+                               h.slide_id, s.slide_number, h.element_id, h.rank,
+                               ts_headline(%(config)s::regconfig, h.body, q.query, %(headline_options)s) AS headline
+                        FROM hits h
+                        CROSS JOIN q
+                        JOIN presentations p ON p.presentation_id = h.presentation_id
+                        LEFT JOIN slides s ON s.slide_id = h.slide_id
+                        ORDER BY h.rank DESC, h.entity_type, h.entity_id
+                    """, {
+                        'config': SEARCH_CONFIG,
+                        'query': query,
+                        'user_id': user_id,
+                        'limit': limit + 1,
+                        'offset': offset,
+                        'headline_options': SEARCH_HEADLINE_OPTIONS
+                    })
+                    
+                    results = [{**dict(row), 'headline': _highlight(row['headline'])} for row in cur.fetchall()]
+                    next_offset = None
+                    if len(results) > limit:
+                        results = results[:limit]
+                        next_offset = offset + limit
+                    return {'results': results, 'next_offset': next_offset}
+                    
+        except Exception as e:
+            raise Exception(f"Error searching presentations: {str(e)}")
+
     def update_presentation(self, presentation_id: str, title: Optional[str] = None, 
                           description: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
@@ -172,7 +803,11 @@ class PresentationsService:
                     """, params)
                     
                     presentation = cur.fetchone()
+                    if presentation:
+                        self._record_changes(cur, [('presentation', presentation['presentation_id'], None, 'update')],
+                                             presentation_id=presentation['presentation_id'])
                     conn.commit()
+                    self._invalidate(presentation_ids=[presentation_id])
                     return dict(presentation) if presentation else None
                     
         except Exception as e:
@@ -194,14 +829,36 @@ class PresentationsService:
         try:
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
+                    # Collect the slides first so their cached elements can be dropped too
+                    cur.execute("""
+                        SELECT slide_id, background_image_url FROM slides WHERE presentation_id = %s
+                    """, (presentation_id,))
+                    slides = cur.fetchall()
+                    slide_ids = [row['slide_id'] for row in slides]
+                    removed_images = [row['background_image_url'] for row in slides]
+                    
+                    cur.execute("""
+                        SELECT ie.image_url
+                        FROM image_elements ie
+                        JOIN slide_elements se ON ie.element_id = se.element_id
+                        WHERE se.slide_id = ANY(%s)
+                    """, (slide_ids,))
+                    removed_images.extend(row['image_url'] for row in cur.fetchall())
+                    
                     cur.execute("""
                         DELETE FROM presentations
                         WHERE presentation_id = %s
-                        RETURNING presentation_id
+                        RETURNING presentation_id, thumbnail_url
                     """, (presentation_id,))
                     
                     deleted = cur.fetchone()
+                    if deleted:
+                        self._adjust_image_refs(cur, removed=removed_images)
+                        if deleted['thumbnail_url'] and self.s3_service.is_own_url(deleted['thumbnail_url']):
+                            self.jobs.enqueue('s3_delete', {'image_url': deleted['thumbnail_url']}, cur=cur)
                     conn.commit()
+                    self._invalidate(presentation_ids=[presentation_id], slide_ids=slide_ids)
+                    self.owners.delete(f"presentation:{presentation_id}", *[f"slide:{slide_id}" for slide_id in slide_ids])
                     return bool(deleted)
                     
         except Exception as e:
@@ -232,9 +889,17 @@ class PresentationsService:
         try:
             if not presentation_id or slide_number is None:
                 raise Exception("Presentation ID and slide number are required")
+            background_image_url = self.s3_service.canonical_url(background_image_url)
             
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
+                    # Counting the slide first also locks the presentation, so concurrent
+                    # inserts read each other's slide numbers below
+                    cur.execute("""
+                        UPDATE presentations SET slide_count = slide_count + 1
+                        WHERE presentation_id = %s
+                    """, (presentation_id,))
+                    
                     # Get the next available slide number
                     cur.execute("""
                         SELECT COALESCE(MAX(slide_number), 0) + 1 as next_number
@@ -253,7 +918,11 @@ class PresentationsService:
                     """, (presentation_id, next_number, background_color, background_image_url, title, background_image_opacity, background_image_fit))
                     
                     slide = cur.fetchone()
+                    self._adjust_image_refs(cur, added=[background_image_url])
+                    self._record_changes(cur, [('slide', slide['slide_id'], slide['slide_id'], 'insert')],
+                                         presentation_id=presentation_id)
                     conn.commit()
+                    self._invalidate(presentation_ids=[presentation_id])
                     return dict(slide)
                     
         except psycopg2.IntegrityError as e:
@@ -276,16 +945,17 @@ class PresentationsService:
         """
         try:
             if not any([
-                slide_number is not None, background_color, background_image_url, title is not None,
+                slide_number is not None, background_color, background_image_url is not None, title is not None,
                 background_image_opacity is not None, background_image_fit is not None
             ]):
                 raise Exception("At least one field must be provided for update")
+            background_image_url = self.s3_service.canonical_url(background_image_url)
 
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
                     # Get current slide info
                     cur.execute("""
-                        SELECT slide_number, presentation_id FROM slides WHERE slide_id = %s
+                        SELECT slide_number, presentation_id, background_image_url FROM slides WHERE slide_id = %s
                     """, (slide_id,))
                     current = cur.fetchone()
                     if not current:
@@ -294,7 +964,10 @@ class PresentationsService:
                     presentation_id = current['presentation_id']
 
                     # If slide_number is being changed, shift others
+                    shifted = []
                     if slide_number is not None and slide_number != old_number:
+                        # Numbers collide until the target slide is moved below
+                        cur.execute("SET CONSTRAINTS slides_presentation_id_slide_number_key DEFERRED")
                         # Get total slides
                         cur.execute("SELECT COUNT(*) FROM slides WHERE presentation_id = %s", (presentation_id,))
                         total = cur.fetchone()['count']
@@ -305,13 +978,16 @@ class PresentationsService:
                             cur.execute("""
                                 UPDATE slides SET slide_number = slide_number + 1
                                 WHERE presentation_id = %s AND slide_number >= %s AND slide_number < %s
+                                RETURNING slide_id
                             """, (presentation_id, slide_number, old_number))
                         else:
                             # Moving down: decrement slide_number for slides between old+1 and new
                             cur.execute("""
                                 UPDATE slides SET slide_number = slide_number - 1
                                 WHERE presentation_id = %s AND slide_number > %s AND slide_number <= %s
+                                RETURNING slide_id
                             """, (presentation_id, old_number, slide_number))
+                        shifted = [row['slide_id'] for row in cur.fetchall()]
 
                     # Now update the target slide
                     update_fields = []
@@ -322,9 +998,10 @@ class PresentationsService:
                     if background_color:
                         update_fields.append("background_color = %s")
                         params.append(background_color)
-                    if background_image_url:
+                    if background_image_url is not None:
+                        # An empty URL removes the background image
                         update_fields.append("background_image_url = %s")
-                        params.append(background_image_url)
+                        params.append(background_image_url or None)
                     if title is not None:
                         update_fields.append("title = %s")
                         params.append(title)
@@ -344,11 +1021,75 @@ class PresentationsService:
                                   background_image_url, title, created_at, updated_at, background_image_opacity, background_image_fit
                     """, params)
                     slide = cur.fetchone()
+                    if background_image_url is not None and (background_image_url or None) != current['background_image_url']:
+                        self._adjust_image_refs(cur, added=[background_image_url],
+                                                removed=[current['background_image_url']])
+                    self._record_changes(cur, [
+                        ('slide', changed_id, changed_id, 'update')
+                        for changed_id in [slide['slide_id'], *shifted]
+                    ], presentation_id=presentation_id)
                     conn.commit()
+                    self._invalidate(presentation_ids=[presentation_id])
                     return dict(slide) if slide else None
         except Exception as e:
             raise Exception(f"Error updating slide: {str(e)}")
 
+    def reorder_slides(self, presentation_id: int, slide_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Apply a complete slide order to a presentation in a single transaction.
+        
+        Args:
+            presentation_id: The ID of the presentation whose slides are reordered
+            slide_ids: Every slide ID of the presentation, in the desired order
+            
+        Returns:
+            List of dictionaries with slide_id and slide_number, ordered by slide_number
+            
+        Raises:
+            Exception: If slide_ids is not exactly the set of slides in the presentation
+        """
+        try:
+            slide_ids = [int(slide_id) for slide_id in slide_ids]
+            if len(set(slide_ids)) != len(slide_ids):
+                raise Exception("Slide order contains duplicate slide IDs")
+            
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    # Lock the presentation's slides so concurrent reorders serialize
+                    cur.execute("""
+                        SELECT slide_id FROM slides
+                        WHERE presentation_id = %s
+                        FOR UPDATE
+                    """, (presentation_id,))
+                    existing = {row['slide_id'] for row in cur.fetchall()}
+                    if existing != set(slide_ids):
+                        raise Exception("Slide order must list every slide in the presentation exactly once")
+                    
+                    # Uniqueness is checked at commit, so the permutation can be applied in one statement
+                    cur.execute("SET CONSTRAINTS slides_presentation_id_slide_number_key DEFERRED")
+                    cur.execute("""
+                        UPDATE slides s
+                        SET slide_number = v.slide_number, updated_at = NOW()
+                        FROM unnest(%s::int[]) WITH ORDINALITY AS v(slide_id, slide_number)
+                        WHERE s.slide_id = v.slide_id
+                          AND s.presentation_id = %s
+                          AND s.slide_number <> v.slide_number
+                        RETURNING s.slide_id
+                    """, (slide_ids, presentation_id))
+                    
+                    self._record_changes(cur, [
+                        ('slide', row['slide_id'], row['slide_id'], 'update') for row in cur.fetchall()
+                    ], presentation_id=presentation_id)
+                    conn.commit()
+                    self._invalidate(presentation_ids=[presentation_id])
+                    return [
+                        {'slide_id': slide_id, 'slide_number': number}
+                        for number, slide_id in enumerate(slide_ids, start=1)
+                    ]
+                    
+        except Exception as e:
+            raise Exception(f"Error reordering slides: {str(e)}")
+
     def delete_slide(self, slide_id: str) -> bool:
         """
         Delete a slide and reorder remaining slides.
@@ -364,7 +1105,7 @@ class PresentationsService:
                 with conn.cursor() as cur:
                     # Get the slide's position and presentation_id before deleting
                     cur.execute("""
-                        SELECT slide_number, presentation_id
+                        SELECT slide_number, presentation_id, background_image_url
                         FROM slides
                         WHERE slide_id = %s
                     """, (slide_id,))
@@ -372,20 +1113,40 @@ class PresentationsService:
                     if not slide_info:
                         return False
                     
+                    cur.execute("""
+                        SELECT ie.image_url
+                        FROM image_elements ie
+                        JOIN slide_elements se ON ie.element_id = se.element_id
+                        WHERE se.slide_id = %s
+                    """, (slide_id,))
+                    removed_images = [row['image_url'] for row in cur.fetchall()]
+                    removed_images.append(slide_info['background_image_url'])
+                    
                     # Delete the slide
                     cur.execute("""
-                        DELETE FROM slides
-                        WHERE slide_id = %s
+                        WITH deleted AS (
+                            DELETE FROM slides
+                            WHERE slide_id = %s
+                            RETURNING presentation_id
+                        )
+                        UPDATE presentations SET slide_count = slide_count - 1
+                        WHERE presentation_id IN (SELECT presentation_id FROM deleted)
                     """, (slide_id,))
+                    self._adjust_image_refs(cur, removed=removed_images)
                     
                     # Reorder remaining slides
                     cur.execute("""
                         UPDATE slides
                         SET slide_number = slide_number - 1
                         WHERE presentation_id = %s AND slide_number > %s
+                        RETURNING slide_id
                     """, (slide_info['presentation_id'], slide_info['slide_number']))
                     
+                    self._record_changes(cur, [('slide', int(slide_id), int(slide_id), 'delete')] + [
+                        ('slide', row['slide_id'], row['slide_id'], 'update') for row in cur.fetchall()
+                    ], presentation_id=slide_info['presentation_id'])
                     conn.commit()
+                    self._invalidate(presentation_ids=[slide_info['presentation_id']], slide_ids=[slide_id])
                     return True
                     
         except Exception as e:
@@ -446,7 +1207,10 @@ class PresentationsService:
                          bold, italic, underline, text_align))
                     
                     text_element = cur.fetchone()
+                    self._record_changes(cur, [('element', element['element_id'], slide_id, 'insert')],
+                                         slide_id=slide_id)
                     conn.commit()
+                    self._invalidate(slide_ids=[slide_id])
                     
                     # Combine the information
                     return {
@@ -502,7 +1266,7 @@ class PresentationsService:
                 with conn.cursor() as cur:
                     # Get current element data first
                     cur.execute("""
-                        SELECT se.x_position, se.y_position, se.width, se.height, se.z_index,
+                        SELECT se.slide_id, se.x_position, se.y_position, se.width, se.height, se.z_index,
                                te.content, te.font_family, te.font_size, te.font_color,
                                te.bold, te.italic, te.underline, te.text_align
                         FROM slide_elements se
@@ -612,7 +1376,10 @@ class PresentationsService:
                             'text_align': current_data['text_align']
                         }
                     
+                    self._record_changes(cur, [('element', element_id, current_data['slide_id'], 'update')],
+                                         slide_id=current_data['slide_id'])
                     conn.commit()
+                    self._invalidate(slide_ids=[current_data['slide_id']])
                     
                     # Combine the information
                     return {
@@ -625,6 +1392,90 @@ class PresentationsService:
         except Exception as e:
             raise Exception(f"Error updating text element: {str(e)}")
 
+    def update_element_geometry(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Update the position and size of many elements with a single statement.
+        
+        Only slide_elements geometry columns are written and nothing is read
+        first; the revision bump and change log entries are part of the same
+        statement. Fields that are missing or None keep their current value.
+        
+        Args:
+            updates: List of dicts with element_id, an optional slide_id the element
+                must belong to, and any of x_position, y_position, width, height, z_index
+            
+        Returns:
+            List of the updated elements' geometry; unknown elements are omitted
+        """
+        if not updates:
+            return []
+        
+        try:
+            rows = [
+                (update['element_id'], update.get('slide_id'),
+                 update.get('x_position'), update.get('y_position'),
+                 update.get('width'), update.get('height'), update.get('z_index'))
+                for update in updates
+            ]
+            queue_thumbnails = 'TRUE' if thumbnails_available() else 'FALSE'
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    updated = execute_values(cur, f"""
+                        WITH updated AS (
+                            UPDATE slide_elements se
+                            SET x_position = COALESCE(v.x_position, se.x_position),
+                                y_position = COALESCE(v.y_position, se.y_position),
+                                width = COALESCE(v.width, se.width),
+                                height = COALESCE(v.height, se.height),
+                                z_index = COALESCE(v.z_index, se.z_index),
+                                updated_at = NOW()
+                            FROM (VALUES %s) AS v(element_id, slide_id, x_position, y_position, width, height, z_index)
+                            WHERE se.element_id = v.element_id
+                              AND (v.slide_id IS NULL OR se.slide_id = v.slide_id)
+                            RETURNING se.element_id, se.slide_id, se.x_position, se.y_position,
+                                      se.width, se.height, se.z_index
+                        ),
+                        bumped AS (
+                            UPDATE presentations p
+                            SET revision = revision + 1,
+                                thumbnail_queued_at = CASE WHEN {queue_thumbnails} THEN COALESCE(thumbnail_queued_at, NOW())
+                                                           ELSE thumbnail_queued_at END
+                            FROM (
+                                SELECT DISTINCT s.presentation_id
+                                FROM updated u JOIN slides s ON s.slide_id = u.slide_id
+                            ) changed
+                            WHERE p.presentation_id = changed.presentation_id
+                            RETURNING p.presentation_id, p.revision, p.thumbnail_queued_at = NOW() AS thumbnail_due
+                        ),
+                        logged AS (
+                            INSERT INTO presentation_changes
+                            (presentation_id, revision, entity_type, entity_id, slide_id, operation)
+                            SELECT b.presentation_id, b.revision, 'element', u.element_id, u.slide_id, 'update'
+                            FROM updated u
+                            JOIN slides s ON s.slide_id = u.slide_id
+                            JOIN bumped b ON b.presentation_id = s.presentation_id
+                        )
+                        SELECT u.*, (
+                            SELECT array_agg(presentation_id) FROM bumped WHERE thumbnail_due
+                        ) AS thumbnails_due
+                        FROM updated u
+                    """, rows,
+                        template="(%s::int, %s::int, %s::numeric, %s::numeric, %s::numeric, %s::numeric, %s::int)",
+                        page_size=len(rows), fetch=True)
+                    updated = [dict(row) for row in updated]
+                    due = updated[0]['thumbnails_due'] if updated else None
+                    self.jobs.enqueue_many('render_thumbnail', [
+                        {'presentation_id': presentation_id} for presentation_id in due or []
+                    ], cur=cur, delay=THUMBNAIL_DELAY_SECONDS)
+                    conn.commit()
+                    for row in updated:
+                        del row['thumbnails_due']
+                    self._invalidate(slide_ids=list({row['slide_id'] for row in updated}))
+                    return updated
+                    
+        except Exception as e:
+            raise Exception(f"Error updating element geometry: {str(e)}")
+
     def delete_element(self, element_id: int) -> bool:
         """
         Delete an element from a slide.
@@ -640,13 +1491,20 @@ class PresentationsService:
                 with conn.cursor() as cur:
                     # The deletion will cascade to the specific element table
                     cur.execute("""
-                        DELETE FROM slide_elements
-                        WHERE element_id = %s
-                        RETURNING element_id
+                        DELETE FROM slide_elements se
+                        WHERE se.element_id = %s
+                        RETURNING se.element_id, se.slide_id,
+                                  (SELECT image_url FROM image_elements ie WHERE ie.element_id = se.element_id) as image_url
                     """, (element_id,))
                     
                     deleted = cur.fetchone()
+                    if deleted:
+                        self._adjust_image_refs(cur, removed=[deleted['image_url']])
+                        self._record_changes(cur, [('element', element_id, deleted['slide_id'], 'delete')],
+                                             slide_id=deleted['slide_id'])
                     conn.commit()
+                    if deleted:
+                        self._invalidate(slide_ids=[deleted['slide_id']])
                     return bool(deleted)
                     
         except Exception as e:
@@ -662,53 +1520,563 @@ class PresentationsService:
         Returns:
             List of dictionaries containing element information
         """
+        payload = self.get_slide_elements_with_revision(slide_id)
+        return payload['elements'] if payload else []
+
+    def get_slide_elements_with_revision(self, slide_id: int,
+                                         min_revision: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get all elements for a slide together with the presentation revision they were read at.
+        
+        The revision is read before the elements, so the elements are never older
+        than it and it can safely be used to build an ETag for them.
+        
+        Args:
+            slide_id: The ID of the slide to get elements for
+            min_revision: Cached elements read at an older revision are reloaded (optional)
+            
+        Returns:
+            Dict with presentation_id, revision and the 'elements' list, or None if the slide does not exist
+        """
         try:
+            cache_key = _slide_elements_cache_key(slide_id)
+            cached = self.cache.get(cache_key)
+            if cached is not None and (min_revision is None or cached['revision'] >= min_revision):
+                return {**cached, 'elements': self.s3_service.sign_urls(cached['elements'])}
+            
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute("""
-                        SELECT 
-                            se.element_id,
-                            se.element_type,
-                            se.x_position,
-                            se.y_position,
-                            se.width,
-                            se.height,
-                            se.z_index,
-                            CASE 
-                                WHEN se.element_type = 'text' THEN 
-                                    json_build_object(
-                                        'content', te.content,
-                                        'font_family', te.font_family,
-                                        'font_size', te.font_size,
-                                        'font_color', te.font_color,
-                                        'bold', te.bold,
-                                        'italic', te.italic,
-                                        'underline', te.underline,
-                                        'text_align', te.text_align
-                                    )
-                                WHEN se.element_type = 'image' THEN 
-                                    json_build_object(
-                                        'image_url', ie.image_url,
-                                        'alt_text', ie.alt_text
-                                    )
-                                ELSE NULL
-                            END as element_data
-                        FROM slide_elements se
-                        LEFT JOIN text_elements te ON se.element_id = te.element_id
-                        LEFT JOIN image_elements ie ON se.element_id = ie.element_id
+                        SELECT p.presentation_id, p.revision
+                        FROM slides s
+                        JOIN presentations p ON p.presentation_id = s.presentation_id
+                        WHERE s.slide_id = %s
+                    """, (slide_id,))
+                    slide = cur.fetchone()
+                    if not slide:
+                        return None
+                    
+                    cur.execute(f"""
+                        {SLIDE_ELEMENTS_SELECT_SQL}
                         WHERE se.slide_id = %s
                         ORDER BY se.z_index
                     """, (slide_id,))
                     
-                    elements = cur.fetchall()
-                    return [{
-                        **dict(element),
-                        'element_data': element['element_data'] if element['element_data'] else {}
-                    } for element in elements]
+                    payload = {
+                        'presentation_id': slide['presentation_id'],
+                        'revision': slide['revision'],
+                        'elements': [self._format_element(element) for element in cur.fetchall()]
+                    }
+                    self.cache.set(cache_key, payload)
+                    return {**payload, 'elements': self.s3_service.sign_urls(payload['elements'])}
                     
         except Exception as e:
             raise Exception(f"Error retrieving slide elements: {str(e)}")
 
+    def _format_element(self, element: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize an element row returned by SLIDE_ELEMENTS_SELECT_SQL."""
+        element_data = element['element_data'] if element['element_data'] else {}
+        if element_data.get('variants'):
+            # Smallest derivative covering the element's box, with a JPEG fallback
+            width = float(element['width']) if element['width'] is not None else None
+            element_data['display_url'] = best_fit(element_data['variants'], width)
+            element_data['display_url_jpeg'] = best_fit(element_data['variants'], width, 'jpeg')
+        return {
+            **dict(element),
+            'element_data': element_data
+        }
+
+    def save_image_asset(self, image_url: str, manifest: Dict[str, Any]) -> None:
+        """
+        Record the derivatives generated for an uploaded image.
+        
+        Args:
+            image_url: URL of the original image
+            manifest: Manifest returned by S3Service.upload_derivatives
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        INSERT INTO image_assets (image_url, width, height, manifest_url, variants)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (image_url) DO UPDATE
+                        SET width = EXCLUDED.width,
+                            height = EXCLUDED.height,
+                            manifest_url = EXCLUDED.manifest_url,
+                            variants = EXCLUDED.variants
+                    """, (image_url, manifest['width'], manifest['height'],
+                          manifest['manifest_url'], Json(manifest['variants'])))
+                    
+                    # Payloads cached before the derivatives existed only carry the original URL
+                    cur.execute("""
+                        SELECT se.slide_id, NULL as presentation_id
+                        FROM image_elements ie
+                        JOIN slide_elements se ON se.element_id = ie.element_id
+                        WHERE ie.image_url = %s
+                        UNION ALL
+                        SELECT s.slide_id, s.presentation_id
+                        FROM slides s
+                        WHERE s.background_image_url = %s
+                    """, (image_url, image_url))
+                    rows = cur.fetchall()
+                    conn.commit()
+                    self._invalidate(
+                        presentation_ids=list({row['presentation_id'] for row in rows if row['presentation_id']}),
+                        slide_ids=list({row['slide_id'] for row in rows if not row['presentation_id']})
+                    )
+                    
+        except Exception as e:
+            raise Exception(f"Error saving image asset: {str(e)}")
+
+    def get_thumbnail_source(self, presentation_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Load what a presentation's thumbnail is rendered from and clear its queued flag.
+        
+        Clearing the flag first means any edit made while the thumbnail renders
+        queues another job instead of being lost.
+        
+        Args:
+            presentation_id: The ID of the presentation
+            
+        Returns:
+            Dict with revision, thumbnail_url, the first slide (None for an empty
+            presentation) and its elements, or None if the presentation does not exist
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        UPDATE presentations SET thumbnail_queued_at = NULL
+                        WHERE presentation_id = %s
+                        RETURNING revision, thumbnail_url
+                    """, (presentation_id,))
+                    source = cur.fetchone()
+                    conn.commit()
+                    if not source:
+                        return None
+                    
+                    cur.execute(f"""
+                        SELECT {SLIDE_JSON_SQL} as slide
+                        FROM slides s
+                        WHERE s.presentation_id = %s
+                        ORDER BY s.slide_number
+                        LIMIT 1
+                    """, (presentation_id,))
+                    row = cur.fetchone()
+                    slide = row['slide'] if row else None
+                    elements = []
+                    if slide:
+                        cur.execute(f"""
+                            {SLIDE_ELEMENTS_SELECT_SQL}
+                            WHERE se.slide_id = %s
+                            ORDER BY se.z_index
+                        """, (slide['slide_id'],))
+                        elements = [self._format_element(element) for element in cur.fetchall()]
+                    return {**dict(source), 'slide': slide, 'elements': elements}
+                    
+        except Exception as e:
+            raise Exception(f"Error retrieving thumbnail source: {str(e)}")
+
+    def save_thumbnail(self, presentation_id: int, thumbnail_url: str, revision: int) -> bool:
+        """
+        Record a rendered thumbnail unless a newer one has been saved meanwhile.
+        
+        Whichever object loses, the replaced thumbnail or a stale render, is
+        queued for deletion in the same transaction.
+        
+        Args:
+            presentation_id: The ID of the presentation
+            thumbnail_url: URL of the uploaded thumbnail
+            revision: The presentation revision the thumbnail was rendered from
+            
+        Returns:
+            True if the thumbnail was saved, False if it was stale
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT thumbnail_url, thumbnail_revision
+                        FROM presentations
+                        WHERE presentation_id = %s
+                        FOR UPDATE
+                    """, (presentation_id,))
+                    current = cur.fetchone()
+                    saved = bool(current) and (current['thumbnail_revision'] is None
+                                               or current['thumbnail_revision'] < revision)
+                    if saved:
+                        cur.execute("""
+                            UPDATE presentations SET thumbnail_url = %s, thumbnail_revision = %s
+                            WHERE presentation_id = %s
+                        """, (thumbnail_url, revision, presentation_id))
+                        discarded = current['thumbnail_url']
+                    else:
+                        discarded = thumbnail_url
+                    
+                    # Thumbnails are named by content, so an unchanged render is the current object itself
+                    kept = thumbnail_url if saved else (current['thumbnail_url'] if current else None)
+                    if discarded and discarded != kept and self.s3_service.is_own_url(discarded):
+                        self.jobs.enqueue('s3_delete', {'image_url': discarded}, cur=cur)
+                    conn.commit()
+                    return saved
+                    
+        except Exception as e:
+            raise Exception(f"Error saving thumbnail: {str(e)}")
+
+    def store_image(self, stream, file_extension: str, content_type: str) -> Dict[str, Any]:
+        """
+        Store an uploaded image under a key derived from its SHA-256, reusing an identical earlier upload.
+        
+        Args:
+            stream: Seekable binary stream of the upload
+            file_extension: Extension including the dot, e.g. '.png'
+            content_type: MIME type of the upload
+            
+        Returns:
+            Dict with image_url, sha256 and deduplicated (True if the bytes were already stored)
+        """
+        try:
+            sha256, byte_size = self.s3_service.hash_stream(stream)
+            existing = self._find_image_blob(sha256)
+            if existing:
+                return {'image_url': existing, 'sha256': sha256, 'deduplicated': True}
+            
+            # A blob row can be missing while the object exists, e.g. after a failed insert below
+            file_name = f"{sha256}{file_extension.lower()}"
+            if self.s3_service.image_exists(file_name):
+                image_url = self.s3_service.image_url(file_name)
+            else:
+                success, image_url = self.s3_service.upload_stream(stream, file_name, content_type)
+                if not success:
+                    raise Exception("Failed to upload image")
+            
+            return self._register_image_blob(image_url, sha256, byte_size, content_type)
+            
+        except Exception as e:
+            raise Exception(f"Error storing image: {str(e)}")
+
+    def _find_image_blob(self, sha256: str) -> Optional[str]:
+        """Return the URL of a stored image with this hash, restarting its grace period."""
+        with self._get_connection() as conn:
+            with conn.cursor() as cur:
+                # Touching updated_at restarts the grace period of an unreferenced blob
+                cur.execute("""
+                    UPDATE image_blobs SET updated_at = NOW()
+                    WHERE sha256 = %s
+                    RETURNING image_url
+                """, (sha256,))
+                existing = cur.fetchone()
+                conn.commit()
+                return existing['image_url'] if existing else None
+
+    def _register_image_blob(self, image_url: str, sha256: str, byte_size: int,
+                             content_type: str) -> Dict[str, Any]:
+        """
+        Record a stored image in image_blobs and describe it like store_image does.
+        
+        If a concurrent upload of the same bytes registered first (possibly under
+        another extension), its URL is returned instead of image_url; the object
+        stored under image_url is then unreferenced and left to the image GC sweep.
+        """
+        with self._get_connection() as conn:
+            with conn.cursor() as cur:
+                # Rows may be added or removed between the statements below, so each path is retried a few times
+                for _ in range(REGISTER_IMAGE_ATTEMPTS):
+                    try:
+                        cur.execute("""
+                            INSERT INTO image_blobs (image_url, sha256, byte_size, content_type)
+                            VALUES (%s, %s, %s, %s)
+                            ON CONFLICT (sha256) DO UPDATE SET updated_at = NOW()
+                            RETURNING image_url, (xmax <> 0) as existed
+                        """, (image_url, sha256, byte_size, content_type))
+                        row = cur.fetchone()
+                    except psycopg2.IntegrityError:
+                        # The URL already has a row without a hash, e.g. from an element created before the upload completed
+                        conn.rollback()
+                        try:
+                            cur.execute("""
+                                UPDATE image_blobs
+                                SET sha256 = %s, byte_size = %s, content_type = %s, updated_at = NOW()
+                                WHERE image_url = %s
+                                RETURNING image_url, TRUE as existed
+                            """, (sha256, byte_size, content_type, image_url))
+                            row = cur.fetchone()
+                        except psycopg2.IntegrityError:
+                            # Another upload of the same bytes registered in the meantime
+                            conn.rollback()
+                            cur.execute("""
+                                SELECT image_url, TRUE as existed FROM image_blobs WHERE sha256 = %s
+                            """, (sha256,))
+                            row = cur.fetchone()
+                    if row:
+                        conn.commit()
+                        return {'image_url': row['image_url'], 'sha256': sha256, 'deduplicated': row['existed']}
+                    # The row was deleted in between, e.g. by forget_images
+                    conn.rollback()
+        raise Exception(f"Could not register image {image_url}: it kept changing concurrently")
+
+    def presign_image_upload(self, sha256: str, byte_size: int, file_extension: str,
+                             content_type: str) -> Dict[str, Any]:
+        """
+        Prepare a direct browser-to-S3 upload of an image.
+        
+        Args:
+            sha256: Hex SHA-256 of the file, computed by the client
+            byte_size: Size of the file in bytes
+            file_extension: Extension including the dot, e.g. '.png'
+            content_type: MIME type of the file
+            
+        Returns:
+            Dict with image_url and deduplicated. Unless the image is already
+            stored, also 'upload' with the presigned POST 'url' and 'fields';
+            the client then posts the file there and calls complete_image_upload.
+        """
+        try:
+            sha256 = (sha256 or '').lower()
+            if len(sha256) != 64 or any(char not in '0123456789abcdef' for char in sha256):
+                raise Exception("sha256 must be a hex SHA-256 digest")
+            if not content_type or not content_type.startswith('image/'):
+                raise Exception("File must be an image")
+            if int(byte_size) <= 0 or int(byte_size) > self.s3_service.upload_max_bytes:
+                raise Exception(f"File size must be between 1 and {self.s3_service.upload_max_bytes} bytes")
+            
+            existing = self._find_image_blob(sha256)
+            if existing:
+                return {'image_url': existing, 'sha256': sha256, 'deduplicated': True}
+            
+            file_name = f"{sha256}{file_extension.lower()}"
+            return {
+                'image_url': self.s3_service.image_url(file_name),
+                'sha256': sha256,
+                'deduplicated': False,
+                'upload': self.s3_service.presign_image_upload(file_name, content_type, int(byte_size), sha256)
+            }
+            
+        except Exception as e:
+            raise Exception(f"Error presigning image upload: {str(e)}")
+
+    def complete_image_upload(self, sha256: str, file_extension: str) -> Dict[str, Any]:
+        """
+        Verify a direct upload landed in S3 intact and register it.
+        
+        Args:
+            sha256: Hex SHA-256 passed to presign_image_upload
+            file_extension: Extension passed to presign_image_upload
+            
+        Returns:
+            Dict with image_url, sha256 and deduplicated, as returned by store_image
+        """
+        try:
+            sha256 = (sha256 or '').lower()
+            file_name = f"{sha256}{file_extension.lower()}"
+            head = self.s3_service.head_image(file_name)
+            if head is None:
+                raise Exception("Upload not found")
+            # S3 only stores a checksum it has verified against the body
+            expected = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+            if head.get('ChecksumSHA256') != expected:
+                raise Exception("Upload checksum does not match")
+            if not head.get('ContentType', '').startswith('image/'):
+                raise Exception("File must be an image")
+            
+            return self._register_image_blob(self.s3_service.image_url(file_name), sha256,
+                                             head['ContentLength'], head['ContentType'])
+            
+        except Exception as e:
+            raise Exception(f"Error completing image upload: {str(e)}")
+
+    def release_image(self, image_url: str, grace_seconds: float) -> bool:
+        """
+        Forget an image that has been unreferenced for the grace period and queue its files for deletion.
+        
+        Args:
+            image_url: URL of the original image
+            grace_seconds: Minimum time since the image was last referenced or uploaded
+            
+        Returns:
+            True if the image was released, False if it is in use or was used too recently
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        DELETE FROM image_blobs
+                        WHERE image_url = %s AND ref_count = 0
+                          AND updated_at <= NOW() - make_interval(secs => %s)
+                        RETURNING image_url
+                    """, (image_url, grace_seconds))
+                    if not cur.fetchone():
+                        return False
+                    
+                    cur.execute("""
+                        DELETE FROM image_assets
+                        WHERE image_url = %s
+                        RETURNING manifest_url, variants
+                    """, (image_url,))
+                    asset = cur.fetchone()
+                    urls = [image_url]
+                    if asset:
+                        urls += [asset['manifest_url']] + [variant['url'] for variant in asset['variants']]
+                    # Only objects in our own bucket are deleted; external URLs are just forgotten
+                    self.jobs.enqueue_many('s3_delete', [
+                        {'image_url': url} for url in urls if self.s3_service.is_own_url(url)
+                    ], cur=cur)
+                    conn.commit()
+                    return True
+                    
+        except Exception as e:
+            raise Exception(f"Error releasing image: {str(e)}")
+
+    def find_unreferenced_images(self, candidates: List[tuple], grace_seconds: float) -> List[str]:
+        """
+        Check a batch of stored objects against every place an image can be referenced from.
+        
+        An original is referenced if an image element or slide background uses it,
+        or if its image_blobs row has references or was touched within the grace
+        period. A derivative or manifest is referenced if the original it belongs
+        to is.
+        
+        Args:
+            candidates: (url, manifest_url) tuples, where manifest_url is the manifest a
+                derivative or manifest belongs to and None for originals
+            grace_seconds: How long an unreferenced upload is kept
+            
+        Returns:
+            The candidate URLs nothing references
+        """
+        if not candidates:
+            return []
+        try:
+            urls, manifest_urls = (list(column) for column in zip(*candidates))
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT c.url
+                        FROM unnest(%s::text[], %s::text[]) AS c(url, manifest_url)
+                        LEFT JOIN image_assets ia ON ia.manifest_url = c.manifest_url
+                        CROSS JOIN LATERAL (
+                            SELECT CASE WHEN c.manifest_url IS NULL THEN c.url ELSE ia.image_url END as image_url
+                        ) owner
+                        WHERE owner.image_url IS NULL
+                           OR NOT (
+                               EXISTS (SELECT 1 FROM image_elements ie WHERE ie.image_url = owner.image_url)
+                               OR EXISTS (SELECT 1 FROM slides s WHERE s.background_image_url = owner.image_url)
+                               OR EXISTS (
+                                   SELECT 1 FROM image_blobs b
+                                   WHERE b.image_url = owner.image_url
+                                     AND (b.ref_count > 0 OR b.updated_at > NOW() - make_interval(secs => %s))
+                               )
+                           )
+                    """, (urls, manifest_urls, grace_seconds))
+                    return [row['url'] for row in cur.fetchall()]
+                    
+        except Exception as e:
+            raise Exception(f"Error finding unreferenced images: {str(e)}")
+
+    def forget_images(self, image_urls: List[str], grace_seconds: float) -> List[str]:
+        """
+        Drop the image_blobs and image_assets rows of originals about to be deleted from S3.
+        
+        Originals whose blob row gained a reference or was touched since they were
+        found unreferenced keep their rows and are left out of the result.
+        
+        Args:
+            image_urls: URLs of unreferenced originals
+            grace_seconds: How long an unreferenced upload is kept
+            
+        Returns:
+            The URLs that are safe to delete from S3
+        """
+        if not image_urls:
+            return []
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    # Both CTEs read the table as it was before the DELETE
+                    cur.execute("""
+                        WITH released AS (
+                            DELETE FROM image_blobs
+                            WHERE image_url = ANY(%s) AND ref_count = 0
+                              AND updated_at <= NOW() - make_interval(secs => %s)
+                            RETURNING image_url
+                        ),
+                        tracked AS (
+                            SELECT image_url FROM image_blobs WHERE image_url = ANY(%s)
+                        )
+                        SELECT t.image_url
+                        FROM unnest(%s::text[]) AS t(image_url)
+                        WHERE t.image_url IN (SELECT image_url FROM released)
+                           OR t.image_url NOT IN (SELECT image_url FROM tracked)
+                    """, (image_urls, grace_seconds, image_urls, image_urls))
+                    deletable = [row['image_url'] for row in cur.fetchall()]
+                    cur.execute("DELETE FROM image_assets WHERE image_url = ANY(%s)", (deletable,))
+                    conn.commit()
+                    return deletable
+                    
+        except Exception as e:
+            raise Exception(f"Error forgetting images: {str(e)}")
+
+    def get_full_presentation(self, presentation_id: str, slide_start: Optional[int] = None,
+                              slide_end: Optional[int] = None, sign: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a presentation with every slide and all of its elements.
+        
+        Slides and elements are fetched with two set-based queries regardless of
+        the number of slides. An optional slide number range allows a large deck
+        to be fetched a page at a time.
+        
+        Args:
+            presentation_id: The ID of the presentation to retrieve
+            slide_start: First slide number to include (optional, inclusive)
+            slide_end: Last slide number to include (optional, inclusive)
+            sign: Presign image URLs when the bucket is private; pass False for a payload kept beyond one response
+            
+        Returns:
+            Dict containing presentation information, a total_slides count and the
+            requested slides each with an 'elements' list, or None if not found
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        SELECT p.*,
+                               (SELECT COUNT(*) FROM slides WHERE presentation_id = p.presentation_id) as total_slides,
+                               COALESCE(
+                                   json_agg({SLIDE_JSON_SQL} ORDER BY s.slide_number) FILTER (WHERE s.slide_id IS NOT NULL),
+                                   '[]'
+                               ) as slides
+                        FROM presentations p
+                        LEFT JOIN slides s ON p.presentation_id = s.presentation_id
+                            AND (%s::int IS NULL OR s.slide_number >= %s::int)
+                            AND (%s::int IS NULL OR s.slide_number <= %s::int)
+                        WHERE p.presentation_id = %s
+                        GROUP BY p.presentation_id
+                    """, (slide_start, slide_start, slide_end, slide_end, presentation_id))
+                    
+                    presentation = cur.fetchone()
+                    if not presentation:
+                        return None
+                    presentation = dict(presentation)
+                    
+                    slides = presentation['slides']
+                    elements_by_slide = {slide['slide_id']: [] for slide in slides}
+                    if elements_by_slide:
+                        cur.execute(f"""
+                            {SLIDE_ELEMENTS_SELECT_SQL}
+                            WHERE se.slide_id = ANY(%s)
+                            ORDER BY se.slide_id, se.z_index
+                        """, (list(elements_by_slide),))
+                        for element in cur.fetchall():
+                            elements_by_slide[element['slide_id']].append(self._format_element(element))
+                    
+                    for slide in slides:
+                        slide['elements'] = elements_by_slide[slide['slide_id']]
+                    return self.s3_service.sign_urls(presentation) if sign else presentation
+                    
+        except Exception as e:
+            raise Exception(f"Error retrieving full presentation: {str(e)}")
+
     def create_image_element(self, slide_id: int, image_url: str, x_position: float, y_position: float,
                            width: Optional[float] = None, height: Optional[float] = None,
                            alt_text: Optional[str] = None, z_index: int = 0) -> Dict[str, Any]:
@@ -729,6 +2097,7 @@ class PresentationsService:
             Dict containing the created image element's information
         """
         try:
+            image_url = self.s3_service.canonical_url(image_url)
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
                     # First create the slide element
@@ -752,7 +2121,11 @@ class PresentationsService:
                     """, (element['element_id'], image_url, alt_text))
                     
                     image_element = cur.fetchone()
+                    self._adjust_image_refs(cur, added=[image_url])
+                    self._record_changes(cur, [('element', element['element_id'], slide_id, 'insert')],
+                                         slide_id=slide_id)
                     conn.commit()
+                    self._invalidate(slide_ids=[slide_id])
                     
                     # Combine the information
                     return {
@@ -792,12 +2165,13 @@ class PresentationsService:
             if not any([image_url, x_position is not None, y_position is not None,
                        width is not None, height is not None, alt_text, z_index is not None]):
                 raise Exception("At least one field must be provided for update")
+            image_url = self.s3_service.canonical_url(image_url)
             
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
                     # Get current element data first
                     cur.execute("""
-                        SELECT se.x_position, se.y_position, se.width, se.height, se.z_index,
+                        SELECT se.slide_id, se.x_position, se.y_position, se.width, se.height, se.z_index,
                                ie.image_url, ie.alt_text
                         FROM slide_elements se
                         LEFT JOIN image_elements ie ON se.element_id = ie.element_id
@@ -856,9 +2230,9 @@ class PresentationsService:
                     image_params = []
                     
                     if image_url is not None:
-                        # Delete old image from S3 if URL is changing
+                        # Move the reference; an image left unreferenced is cleaned up after the grace period
                         if current_data['image_url'] != image_url:
-                            self.s3_service.delete_image(current_data['image_url'])
+                            self._adjust_image_refs(cur, added=[image_url], removed=[current_data['image_url']])
                         image_update_fields.append("image_url = %s")
                         image_params.append(image_url)
                     if alt_text is not None:
@@ -884,7 +2258,10 @@ class PresentationsService:
                             'alt_text': current_data['alt_text']
                         }
                     
+                    self._record_changes(cur, [('element', element_id, current_data['slide_id'], 'update')],
+                                         slide_id=current_data['slide_id'])
                     conn.commit()
+                    self._invalidate(slide_ids=[current_data['slide_id']])
                     
                     # Combine the information
                     return {
@@ -895,4 +2272,282 @@ class PresentationsService:
                     }
                     
         except Exception as e:
-            raise Exception(f"Error updating image element: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error updating image element: {str(e)}")
+
+    def apply_element_batch(self, slide_id: int, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply many element creates, updates and deletes to a slide in one transaction.
+        
+        Each kind of write is issued as one multi-row statement per table, so the
+        number of round trips does not grow with the number of operations. Fields
+        omitted from an update keep their current value.
+        
+        Args:
+            slide_id: The ID of the slide the elements belong to
+            operations: List of operation dicts. 'op' is 'create', 'update' or 'delete'.
+                Creates and updates carry an 'element_type' ('text' or 'image') and
+                element fields; updates and deletes carry an 'element_id'. Creates may
+                carry a 'client_id' that is echoed back in the result.
+            
+        Returns:
+            List of per-operation results in the same order as operations
+            
+        Raises:
+            Exception: If an operation is malformed or the batch fails
+        """
+        try:
+            creates, updates, deletes = self._validate_element_batch(operations)
+            results = [None] * len(operations)
+            added_images = [operation['image_url'] for _, operation in creates
+                            if operation['element_type'] == 'image']
+            removed_images = []
+            
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    if creates:
+                        self._batch_create_elements(cur, slide_id, creates, results)
+                    if updates:
+                        for previous_image_url, image_url in self._batch_update_elements(cur, slide_id, updates, results):
+                            removed_images.append(previous_image_url)
+                            added_images.append(image_url)
+                    if deletes:
+                        removed_images.extend(self._batch_delete_elements(cur, slide_id, deletes, results))
+                    self._adjust_image_refs(cur, added=added_images, removed=removed_images)
+                    self._record_changes(cur, self._element_batch_changes(slide_id, results),
+                                         slide_id=slide_id)
+                    conn.commit()
+            self._invalidate(slide_ids=[slide_id])
+            
+            return results
+            
+        except Exception as e:
+            raise Exception(f"Error applying element batch: {str(e)}")
+
+    def _element_batch_changes(self, slide_id: int, results: List[Dict[str, Any]]) -> List[tuple]:
+        """Translate successful batch results into change log entries."""
+        operations = {'create': 'insert', 'update': 'update', 'delete': 'delete'}
+        changes = []
+        for result in results:
+            if not result['success']:
+                continue
+            element_id = result['element']['element_id'] if 'element' in result else result['element_id']
+            changes.append(('element', element_id, slide_id, operations[result['op']]))
+        return changes
+
+    def _validate_element_batch(self, operations: List[Dict[str, Any]]):
+        """Split a batch into create, update and delete operations, rejecting malformed ones."""
+        if not isinstance(operations, list) or not operations:
+            raise Exception("At least one operation is required")
+        
+        creates, updates, deletes = [], [], []
+        seen_ids = set()
+        for index, operation in enumerate(operations):
+            if isinstance(operation, dict) and operation.get('image_url'):
+                # Presigned URLs handed out by reads are stored without their signature
+                operation = {**operation, 'image_url': self.s3_service.canonical_url(operation['image_url'])}
+            op = operation.get('op') if isinstance(operation, dict) else None
+            if op in ('create', 'update'):
+                element_type = operation.get('element_type')
+                if element_type not in ('text', 'image'):
+                    raise Exception(f"Operation {index}: unsupported element type")
+            
+            if op == 'create':
+                required_fields = ['x_position', 'y_position', 'content' if element_type == 'text' else 'image_url']
+                missing_fields = [field for field in required_fields if operation.get(field) is None]
+                if missing_fields:
+                    raise Exception(f"Operation {index}: missing required fields: {', '.join(missing_fields)}")
+                creates.append((index, operation))
+            elif op in ('update', 'delete'):
+                if operation.get('element_id') is None:
+                    raise Exception(f"Operation {index}: missing required field: element_id")
+                element_id = int(operation['element_id'])
+                if element_id in seen_ids:
+                    raise Exception(f"Operation {index}: element {element_id} appears more than once")
+                seen_ids.add(element_id)
+                if op == 'update':
+                    updates.append((index, element_id, operation))
+                else:
+                    deletes.append((index, element_id))
+            else:
+                raise Exception(f"Operation {index}: unsupported op '{op}'")
+        
+        return creates, updates, deletes
+
+    def _batch_create_elements(self, cur, slide_id: int, creates, results: List[Any]) -> None:
+        """Insert every created element with one multi-row INSERT per table."""
+        # Reserve IDs up front so base and detail rows can be matched without relying on RETURNING order
+        cur.execute("""
+            SELECT nextval('elements_id_seq') as element_id
+            FROM generate_series(1, %s)
+        """, (len(creates),))
+        element_ids = [row['element_id'] for row in cur.fetchall()]
+        
+        slide_rows, text_rows, image_rows = [], [], []
+        for element_id, (_, operation) in zip(element_ids, creates):
+            slide_rows.append((
+                element_id, slide_id, operation['element_type'],
+                float(operation['x_position']), float(operation['y_position']),
+                operation.get('width'), operation.get('height'), operation.get('z_index', 0)
+            ))
+            if operation['element_type'] == 'text':
+                text_rows.append((
+                    element_id, operation['content'],
+                    operation.get('font_family', 'Arial'), operation.get('font_size', 18),
+                    operation.get('font_color', '#000000'), operation.get('bold', False),
+                    operation.get('italic', False), operation.get('underline', False),
+                    operation.get('text_align', 'left')
+                ))
+            else:
+                image_rows.append((element_id, operation['image_url'], operation.get('alt_text')))
+        
+        created = {row['element_id']: dict(row) for row in execute_values(cur, """
+            INSERT INTO slide_elements
+            (element_id, slide_id, element_type, x_position, y_position, width, height, z_index)
+            VALUES %s
+            RETURNING element_id, element_type, x_position, y_position, width, height, z_index
+        """, slide_rows, page_size=len(slide_rows), fetch=True)}
+        
+        if text_rows:
+            for row in execute_values(cur, """
+                INSERT INTO text_elements
+                (element_id, content, font_family, font_size, font_color,
+                 bold, italic, underline, text_align)
+                VALUES %s
+                RETURNING element_id, content, font_family, font_size, font_color,
+                        bold, italic, underline, text_align
+            """, text_rows, page_size=len(text_rows), fetch=True):
+                created[row['element_id']].update(row)
+        
+        if image_rows:
+            for row in execute_values(cur, """
+                INSERT INTO image_elements (element_id, image_url, alt_text)
+                VALUES %s
+                RETURNING element_id, image_url, alt_text
+            """, image_rows, page_size=len(image_rows), fetch=True):
+                created[row['element_id']].update(row)
+        
+        for element_id, (index, operation) in zip(element_ids, creates):
+            result = {'op': 'create', 'success': True, 'element': created[element_id]}
+            if 'client_id' in operation:
+                result['client_id'] = operation['client_id']
+            results[index] = result
+
+    def _batch_update_elements(self, cur, slide_id: int, updates, results: List[Any]) -> List[tuple]:
+        """
+        Update every element with one UPDATE ... FROM (VALUES ...) per table.
+        
+        Returns:
+            List of (previous image URL, new image URL) pairs for images that were replaced
+        """
+        geometry_rows = [
+            (element_id, slide_id, operation['element_type'],
+             operation.get('x_position'), operation.get('y_position'),
+             operation.get('width'), operation.get('height'), operation.get('z_index'))
+            for _, element_id, operation in updates
+        ]
+        # Every update touches slide_elements, which also confirms the element lives on this slide
+        updated = {row['element_id']: dict(row) for row in execute_values(cur, """
+            UPDATE slide_elements se
+            SET x_position = COALESCE(v.x_position, se.x_position),
+                y_position = COALESCE(v.y_position, se.y_position),
+                width = COALESCE(v.width, se.width),
+                height = COALESCE(v.height, se.height),
+                z_index = COALESCE(v.z_index, se.z_index),
+                updated_at = NOW()
+            FROM (VALUES %s) AS v(element_id, slide_id, element_type, x_position, y_position, width, height, z_index)
+            WHERE se.element_id = v.element_id
+              AND se.slide_id = v.slide_id
+              AND se.element_type = v.element_type
+            RETURNING se.element_id, se.element_type, se.x_position, se.y_position,
+                      se.width, se.height, se.z_index
+        """, geometry_rows,
+            template="(%s::int, %s::int, %s::varchar, %s::numeric, %s::numeric, %s::numeric, %s::numeric, %s::int)",
+            page_size=len(geometry_rows), fetch=True)}
+        
+        text_rows = [
+            (element_id, operation.get('content'), operation.get('font_family'),
+             operation.get('font_size'), operation.get('font_color'), operation.get('bold'),
+             operation.get('italic'), operation.get('underline'), operation.get('text_align'))
+            for _, element_id, operation in updates
+            if element_id in updated and operation['element_type'] == 'text'
+        ]
+        if text_rows:
+            for row in execute_values(cur, """
+                UPDATE text_elements te
+                SET content = COALESCE(v.content, te.content),
+                    font_family = COALESCE(v.font_family, te.font_family),
+                    font_size = COALESCE(v.font_size, te.font_size),
+                    font_color = COALESCE(v.font_color, te.font_color),
+                    bold = COALESCE(v.bold, te.bold),
+                    italic = COALESCE(v.italic, te.italic),
+                    underline = COALESCE(v.underline, te.underline),
+                    text_align = COALESCE(v.text_align, te.text_align)
+                FROM (VALUES %s) AS v(element_id, content, font_family, font_size, font_color,
+                                      bold, italic, underline, text_align)
+                WHERE te.element_id = v.element_id
+                RETURNING te.element_id, te.content, te.font_family, te.font_size, te.font_color,
+                          te.bold, te.italic, te.underline, te.text_align
+            """, text_rows,
+                template="(%s::int, %s::text, %s::varchar, %s::int, %s::varchar, %s::boolean, %s::boolean, %s::boolean, %s::varchar)",
+                page_size=len(text_rows), fetch=True):
+                updated[row['element_id']].update(row)
+        
+        replaced_images = []
+        image_rows = [
+            (element_id, operation.get('image_url'), operation.get('alt_text'))
+            for _, element_id, operation in updates
+            if element_id in updated and operation['element_type'] == 'image'
+        ]
+        if image_rows:
+            # The self-join reads each row as it was before the update
+            for row in execute_values(cur, """
+                UPDATE image_elements ie
+                SET image_url = COALESCE(v.image_url, ie.image_url),
+                    alt_text = COALESCE(v.alt_text, ie.alt_text)
+                FROM (VALUES %s) AS v(element_id, image_url, alt_text)
+                JOIN image_elements previous ON previous.element_id = v.element_id
+                WHERE ie.element_id = v.element_id
+                RETURNING ie.element_id, ie.image_url, ie.alt_text,
+                          previous.image_url as previous_image_url
+            """, image_rows,
+                template="(%s::int, %s::text, %s::varchar)",
+                page_size=len(image_rows), fetch=True):
+                row = dict(row)
+                previous_image_url = row.pop('previous_image_url')
+                if previous_image_url != row['image_url']:
+                    replaced_images.append((previous_image_url, row['image_url']))
+                updated[row['element_id']].update(row)
+        
+        for index, element_id, _ in updates:
+            if element_id in updated:
+                results[index] = {'op': 'update', 'success': True, 'element': updated[element_id]}
+            else:
+                results[index] = {'op': 'update', 'success': False, 'element_id': element_id,
+                                  'error': 'Element not found'}
+        
+        return replaced_images
+
+    def _batch_delete_elements(self, cur, slide_id: int, deletes, results: List[Any]) -> List[str]:
+        """
+        Delete every listed element with a single statement.
+        
+        Returns:
+            List of image URLs the deleted image elements referenced
+        """
+        # The deletion will cascade to the specific element tables
+        cur.execute("""
+            DELETE FROM slide_elements se
+            WHERE se.slide_id = %s AND se.element_id = ANY(%s)
+            RETURNING se.element_id,
+                      (SELECT image_url FROM image_elements ie WHERE ie.element_id = se.element_id) as image_url
+        """, (slide_id, [element_id for _, element_id in deletes]))
+        rows = cur.fetchall()
+        deleted = {row['element_id'] for row in rows}
+        
+        for index, element_id in deletes:
+            result = {'op': 'delete', 'success': element_id in deleted, 'element_id': element_id}
+            if element_id not in deleted:
+                result['error'] = 'Element not found'
+            results[index] = result
+        
+        return [row['image_url'] for row in rows if row['image_url']]
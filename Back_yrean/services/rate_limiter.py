@@ -0,0 +1,350 @@
+import os
+import math
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ('sliding_window', 'token_bucket')
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Limits per route and per client identity; override any of them with
+# RATE_LIMIT_<ROUTE>_<SCOPE>, e.g. RATE_LIMIT_LOGIN_USERNAME=10/minute, or 'off'
+DEFAULT_LIMITS = {
+    'login': {'ip': '20/minute', 'username': '5/minute'},
+    'register': {'ip': '5/minute', 'username': 'off'}
+}
+
+# Atomic token bucket; floats are returned as strings because Lua numbers are truncated to integers
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local take = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    allowed = 1
+end
+if take == 0 then
+    return {allowed, tostring(tokens)}
+end
+if allowed == 1 then
+    tokens = tokens - 1
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a client has used up a route's allowance; retry_after is in seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimit:
+    """At most limit requests per period seconds, counted with the given algorithm."""
+
+    def __init__(self, limit: int, period: float, algorithm: str = 'sliding_window'):
+        if algorithm not in ALGORITHMS:
+            raise Exception(f"Unsupported rate limit algorithm: {algorithm}")
+        if limit < 1 or period <= 0:
+            raise Exception("Rate limits need a positive limit and period")
+        self.limit = limit
+        self.period = period
+        self.algorithm = algorithm
+
+    def __repr__(self) -> str:
+        return f"RateLimit({self.limit}/{self.period}s, {self.algorithm})"
+
+
+def parse_rate(value: Optional[str], algorithm: str = 'sliding_window') -> Optional[RateLimit]:
+    """
+    Parse a limit such as '5/minute', '100/3600s' or '10/minute:token_bucket'.
+
+    Returns:
+        The RateLimit, or None for an empty value or 'off'
+    """
+    value = (value or '').strip().lower()
+    if not value or value == 'off':
+        return None
+    value, _, named_algorithm = value.partition(':')
+    count, _, period = value.partition('/')
+    period = period.strip()
+    if period in PERIODS:
+        seconds = PERIODS[period]
+    elif period.endswith('s') and period[:-1].replace('.', '', 1).isdigit():
+        seconds = float(period[:-1])
+    else:
+        raise Exception(f"Invalid rate limit: {value}")
+    return RateLimit(int(count), seconds, named_algorithm.strip() or algorithm)
+
+
+def sliding_window_retry_after(previous: int, current: int, limit: int, period: float, elapsed: float) -> float:
+    """
+    Seconds until a sliding window counter is below its limit again.
+
+    The window's count is estimated as the previous fixed window's count,
+    weighted by how much of it still overlaps the sliding window, plus the
+    current one's; this assumes no requests are counted meanwhile.
+    """
+    if current < limit:
+        # The previous window's share decays within the current window
+        return max(0.0, period * (1 - (limit - current) / previous) - elapsed) if previous else 0.0
+    # Only after the current window becomes the previous one
+    return (period - elapsed) + period * (1 - limit / current)
+
+
+class InMemoryRateLimitStore:
+    """
+    Per-process counters, bounded to max_keys identities (least recently seen are dropped).
+
+    Each process counts on its own, so with several workers a client gets up
+    to workers times the limit; use a shared store to enforce it fleet-wide.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _save(self, key: str, state: tuple) -> None:
+        self._entries[key] = state
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def sliding_window(self, key: str, limit: int, period: float, now: float, count: bool = True) -> Optional[float]:
+        """
+        Count a request unless the window is full; returns None if allowed, else seconds to wait.
+
+        With count=False the window is only checked, the request is not counted.
+        """
+        window = int(now // period)
+        elapsed = now - window * period
+        with self._lock:
+            index, current, previous = self._entries.get(key, (window, 0, 0))
+            if index != window:
+                previous = current if index == window - 1 else 0
+                current = 0
+            if previous * (1 - elapsed / period) + current >= limit:
+                self._save(key, (window, current, previous))
+                return sliding_window_retry_after(previous, current, limit, period, elapsed)
+            if count:
+                self._save(key, (window, current + 1, previous))
+            return None
+
+    def token_bucket(self, key: str, limit: int, period: float, now: float, count: bool = True) -> Optional[float]:
+        """
+        Take a token unless the bucket is empty; returns None if allowed, else seconds to wait.
+
+        With count=False the bucket is only checked, no token is taken.
+        """
+        rate = limit / period
+        with self._lock:
+            tokens, updated = self._entries.get(key, (limit, now))
+            tokens = min(limit, tokens + max(0.0, now - updated) * rate)
+            if tokens >= 1:
+                if count:
+                    self._save(key, (tokens - 1, now))
+                return None
+            self._save(key, (tokens, now))
+            return (1 - tokens) / rate
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisRateLimitStore:
+    """
+    Counters in a redis-py compatible client, shared by every process.
+
+    Sliding windows use plain INCR/EXPIRE counters per fixed window (a request
+    is uncounted again if it turns out to be over the limit); token buckets
+    run as one Lua script, so they are exact under concurrency.
+    """
+
+    def __init__(self, client, key_prefix: str = 'empyre:ratelimit:'):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._token_bucket = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def sliding_window(self, key: str, limit: int, period: float, now: float, count: bool = True) -> Optional[float]:
+        window = int(now // period)
+        elapsed = now - window * period
+        current_key = f"{self.key_prefix}{key}:{window}"
+        if not count:
+            current, previous = self.client.mget(current_key, f"{self.key_prefix}{key}:{window - 1}")
+            current, previous = int(current or 0), int(previous or 0)
+            if previous * (1 - elapsed / period) + current >= limit:
+                return sliding_window_retry_after(previous, current, limit, period, elapsed)
+            return None
+        pipeline = self.client.pipeline()
+        pipeline.incr(current_key)
+        pipeline.expire(current_key, int(math.ceil(period * 2)))
+        pipeline.get(f"{self.key_prefix}{key}:{window - 1}")
+        current, _, previous = pipeline.execute()
+        previous = int(previous or 0)
+        # current includes this request, so the check is on what was there before it
+        if previous * (1 - elapsed / period) + current - 1 >= limit:
+            self.client.decr(current_key)
+            return sliding_window_retry_after(previous, current - 1, limit, period, elapsed)
+        return None
+
+    def token_bucket(self, key: str, limit: int, period: float, now: float, count: bool = True) -> Optional[float]:
+        rate = limit / period
+        allowed, tokens = self._token_bucket(keys=[f"{self.key_prefix}{key}"],
+                                             args=[limit, rate, now, 1 if count else 0])
+        return None if int(allowed) else (1 - float(tokens)) / rate
+
+
+class RateLimiter:
+    """
+    Throttles routes per client identity (IP address, username) before they do any work.
+
+    Each route has a RateLimit per identity scope; a request is rejected with
+    RateLimitExceeded if any of its identities is over its limit, and is only
+    counted against its identities once all of them are within theirs. If
+    the store fails the request is let through, so an outage of a shared
+    store does not lock every user out.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Optional[RateLimit]]], store=None, clock=time.time):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits: {route: {scope: RateLimit or None}}; scopes without a limit are not checked
+            store: Counter store (defaults to an InMemoryRateLimitStore)
+            clock: Returns the current UNIX time (for tests)
+        """
+        self.limits = {route: {scope: limit for scope, limit in scopes.items() if limit}
+                       for route, scopes in limits.items()}
+        self.store = store or InMemoryRateLimitStore()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._store_errors = 0
+
+    def _count(self, route: str, scope: str, outcome: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(f"{route}:{scope}", {'allowed': 0, 'throttled': 0})
+            counters[outcome] += 1
+
+    def _take(self, key: str, limit: RateLimit, count: bool) -> Optional[float]:
+        """Check or count a request against one identity; returns seconds to wait if it is over its limit."""
+        if limit.algorithm == 'token_bucket':
+            return self.store.token_bucket(key, limit.limit, limit.period, self._clock(), count=count)
+        return self.store.sliding_window(key, limit.limit, limit.period, self._clock(), count=count)
+
+    def check(self, route: str, identities: Dict[str, Any]) -> None:
+        """
+        Count a request to route against the limit of each of its identities.
+
+        Every identity is checked before any is counted, so a request rejected
+        on one scope (e.g. username) does not use up another's (e.g. IP) allowance.
+
+        Args:
+            route: Name of the route in the configured limits
+            identities: {scope: identity}, e.g. {'ip': '10.0.0.1', 'username': 'ada'};
+                scopes without an identity are skipped
+
+        Raises:
+            RateLimitExceeded: If any identity is over its limit
+        """
+        checks = []
+        for scope, limit in self.limits.get(route, {}).items():
+            identity = identities.get(scope)
+            if identity is None or identity == '':
+                continue
+            checks.append((scope, limit, f"{route}:{scope}:{str(identity).strip().lower()}"))
+
+        # Check every scope first, then count the request against all of them;
+        # a concurrent request can still fill a scope in between, which is then throttled
+        for count in (False, True):
+            passed = []
+            for scope, limit, key in checks:
+                try:
+                    retry_after = self._take(key, limit, count)
+                except Exception as e:
+                    logger.warning(f"Rate limit store failed, allowing request: {str(e)}")
+                    with self._lock:
+                        self._store_errors += 1
+                    continue
+                if retry_after is not None:
+                    self._count(route, scope, 'throttled')
+                    logger.warning(f"Throttled {route} request by {scope} for {retry_after:.1f}s")
+                    raise RateLimitExceeded("Too many attempts, please try again later", retry_after)
+                passed.append((scope, limit, key))
+            checks = passed
+
+        for scope, limit, key in checks:
+            self._count(route, scope, 'allowed')
+
+    def stats(self) -> Dict[str, Any]:
+        """Allowed and throttled requests per route and scope, and store failures."""
+        with self._lock:
+            stats = {
+                'routes': {name: dict(counters) for name, counters in self._counters.items()},
+                'store_errors': self._store_errors
+            }
+        if isinstance(self.store, InMemoryRateLimitStore):
+            stats['tracked_keys'] = len(self.store)
+        return stats
+
+
+def limits_from_env() -> Dict[str, Dict[str, Optional[RateLimit]]]:
+    """Read DEFAULT_LIMITS with RATE_LIMIT_<ROUTE>_<SCOPE> and RATE_LIMIT_ALGORITHM overrides."""
+    if os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('0', 'false', 'no'):
+        return {}
+    algorithm = os.getenv('RATE_LIMIT_ALGORITHM', 'sliding_window').lower()
+    return {
+        route: {
+            scope: parse_rate(os.getenv(f"RATE_LIMIT_{route.upper()}_{scope.upper()}", default), algorithm)
+            for scope, default in scopes.items()
+        }
+        for route, scopes in DEFAULT_LIMITS.items()
+    }
+
+
+def _store_from_env():
+    """Connect to the shared store named by RATE_LIMIT_REDIS_URL, if any."""
+    url = os.getenv('RATE_LIMIT_REDIS_URL')
+    if not url:
+        return InMemoryRateLimitStore(max_keys=int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000')))
+    try:
+        import redis
+    except ImportError:
+        logger.warning("RATE_LIMIT_REDIS_URL is set but the redis package is not installed; counting per process")
+        return InMemoryRateLimitStore(max_keys=int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000')))
+    return RedisRateLimitStore(redis.Redis.from_url(url))
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _rate_limiter
+    if _rate_limiter is not None:
+        return _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(limits_from_env(), store=_store_from_env())
+        return _rate_limiter
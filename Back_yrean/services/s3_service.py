@@ -1,30 +1,248 @@
 import os
+import json
+import base64
+import hashlib
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 import logging
-from typing import Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from services import image_processing
+from services.cache import LRUCache
+from services.metrics import InstrumentedS3Client
 
 # Load environment variables
 load_dotenv()
 
+# S3 rejects multipart parts smaller than this, except for the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# delete_objects accepts at most this many keys per request
+DELETE_BATCH_SIZE = 1000
+
+# Payload fields holding image URLs, which are presigned when the bucket is private
+SIGNED_URL_FIELDS = frozenset({
+    'image_url', 'display_url', 'display_url_jpeg', 'url', 'manifest_url',
+    'background_image_url', 'background_image_display_url', 'background_image_thumbnail_url',
+    'thumbnail_url'
+})
+
 class S3Service:
-    def __init__(self):
-        """Initialize the S3 service with AWS credentials."""
-        self.s3_client = boto3.client(
+    def __init__(self, part_size: Optional[int] = None, concurrency: Optional[int] = None):
+        """
+        Initialize the S3 service with AWS credentials.
+        
+        Args:
+            part_size: Multipart upload part size in bytes (defaults to S3_MULTIPART_PART_SIZE)
+            concurrency: Parts uploaded in parallel per upload (defaults to S3_MULTIPART_CONCURRENCY)
+        """
+        # S3_ENDPOINT_URL points the client at an S3-compatible server such as MinIO (object URLs keep the AWS form)
+        endpoint_url = os.getenv('S3_ENDPOINT_URL') or None
+        # Every call is timed for the request metrics
+        self.s3_client = InstrumentedS3Client(boto3.client(
             's3',
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION')
-        )
+            region_name=os.getenv('AWS_REGION'),
+            endpoint_url=endpoint_url,
+            config=Config(s3={'addressing_style': 'path'}) if endpoint_url else None
+        ))
         self.bucket_name = os.getenv('S3_BUCKET_NAME')
+        if part_size is None:
+            part_size = max(MIN_PART_SIZE, int(os.getenv('S3_MULTIPART_PART_SIZE', str(8 * 1024 * 1024))))
+        self.part_size = part_size
+        self.concurrency = max(1, concurrency or int(os.getenv('S3_MULTIPART_CONCURRENCY', '4')))
+        self.upload_max_bytes = int(os.getenv('S3_UPLOAD_MAX_BYTES', str(25 * 1024 * 1024)))
+        self.upload_expires = int(os.getenv('S3_PRESIGN_UPLOAD_EXPIRES', '600'))
+        self.private = os.getenv('S3_PRIVATE_BUCKET', 'false').lower() == 'true'
+        self.download_expires = int(os.getenv('S3_PRESIGN_GET_EXPIRES', '3600'))
+        # Signed URLs are reused until refresh_margin seconds before they expire
+        self.refresh_margin = max(1, int(os.getenv('S3_PRESIGN_REFRESH_MARGIN', '300')))
+        self._signed_urls = LRUCache(
+            max_entries=int(os.getenv('S3_PRESIGN_CACHE_ENTRIES', '10000')),
+            ttl=max(1, self.download_expires - self.refresh_margin)
+        )
+
+    def _object_url(self, key: str) -> str:
+        return f"https://{self.bucket_name}.s3.amazonaws.com/{key}"
+
+    def _object_key(self, image_url: str) -> str:
+        return image_url.split(self._object_url(''))[1]
+
+    def is_own_url(self, image_url: str) -> bool:
+        """Return whether a URL points into this service's bucket."""
+        return bool(image_url) and image_url.startswith(self._object_url(''))
+
+    def hash_stream(self, stream: BinaryIO, chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+        """
+        Compute the SHA-256 of a seekable stream in fixed-size chunks and rewind it.
+        
+        Returns:
+            Tuple of (hex digest, size in bytes)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+        stream.seek(0)
+        return digest.hexdigest(), size
+
+    def head_image(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the metadata of images/<file_name> with a HEAD request.
+        
+        Returns:
+            The head_object response, including ChecksumSHA256 when the object
+            was uploaded with one, or None if the object does not exist
+        """
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=f"images/{file_name}",
+                                              ChecksumMode='ENABLED')
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def image_exists(self, file_name: str) -> bool:
+        """Check with a HEAD request whether images/<file_name> is already stored."""
+        return self.head_image(file_name) is not None
+
+    def presign_image_upload(self, file_name: str, content_type: str, byte_size: int,
+                             sha256: str) -> Dict[str, Any]:
+        """
+        Create a presigned POST that lets a browser upload one image straight to S3.
+        
+        The policy pins the key, the content type and the exact size, and S3
+        rejects the upload unless the body matches the declared SHA-256.
+        
+        Args:
+            file_name: Name to store the image under in images/
+            content_type: MIME type the upload must declare
+            byte_size: Exact size of the upload in bytes
+            sha256: Hex SHA-256 of the upload
+            
+        Returns:
+            Dict with the form 'url' and the 'fields' to send along with the file
+        """
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+        fields = {
+            'Content-Type': content_type,
+            'Cache-Control': 'public, max-age=31536000, immutable',
+            'x-amz-checksum-algorithm': 'SHA256',
+            'x-amz-checksum-sha256': checksum
+        }
+        return self.s3_client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=f"images/{file_name}",
+            Fields=fields,
+            Conditions=[{name: value} for name, value in fields.items()] + [
+                ['content-length-range', byte_size, byte_size]
+            ],
+            ExpiresIn=self.upload_expires
+        )
+
+    def canonical_url(self, image_url: Optional[str]) -> Optional[str]:
+        """Strip presigning query parameters from one of this bucket's URLs."""
+        if self.is_own_url(image_url):
+            return image_url.split('?', 1)[0]
+        return image_url
+
+    def presigned_url(self, image_url: str) -> str:
+        """
+        Return a presigned GET URL for one of this bucket's objects.
+        
+        Signatures are cached and reused until shortly before they expire, so a
+        deck with hundreds of images does not sign every URL on every load.
+        """
+        cached = self._signed_urls.get(image_url)
+        if cached is not None:
+            return cached.decode('utf-8')
+        signed = self.s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket_name, 'Key': self._object_key(image_url)},
+            ExpiresIn=self.download_expires
+        )
+        self._signed_urls.set(image_url, signed.encode('utf-8'))
+        return signed
+
+    def signature_window(self) -> Optional[int]:
+        """
+        Index of the current refresh-margin-long time window, or None for public buckets.
+        
+        Every URL handed out during a window stays valid until the window ends,
+        so response ETags that include it never revalidate expired URLs.
+        """
+        if not self.private:
+            return None
+        return int(time.time() // self.refresh_margin)
 
-    def upload_image(self, file_data: bytes, file_name: str, content_type: str) -> Tuple[bool, Optional[str]]:
+    def sign_urls(self, payload: Any) -> Any:
         """
-        Upload an image to S3.
+        Replace this bucket's image URLs in an API payload with presigned URLs.
+        
+        Returns the payload unchanged unless S3_PRIVATE_BUCKET is enabled;
+        otherwise returns a copy, leaving cached payloads untouched.
+        """
+        if not self.private:
+            return payload
+        if isinstance(payload, list):
+            return [self.sign_urls(item) for item in payload]
+        if isinstance(payload, dict):
+            return {
+                key: self.presigned_url(value)
+                if key in SIGNED_URL_FIELDS and isinstance(value, str) and self.is_own_url(value)
+                else self.sign_urls(value)
+                for key, value in payload.items()
+            }
+        return payload
+
+    def image_url(self, file_name: str) -> str:
+        """Return the URL an image stored as file_name is served from."""
+        return self._object_url(f"images/{file_name}")
+
+    def thumbnail_url(self, file_name: str) -> str:
+        """Return the URL a thumbnail stored as file_name is served from."""
+        return self._object_url(f"thumbnails/{file_name}")
+
+    def upload_thumbnail(self, data: bytes, file_name: str, content_type: str) -> str:
+        """
+        Store a rendered presentation thumbnail as thumbnails/<file_name>.
+        
+        Returns:
+            The thumbnail URL
+            
+        Raises:
+            Exception: If the upload fails, so the rendering job is retried
+        """
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=f"thumbnails/{file_name}",
+            Body=data,
+            ContentType=content_type,
+            CacheControl='public, max-age=31536000, immutable'
+        )
+        return self.thumbnail_url(file_name)
+
+    def upload_stream(self, stream: BinaryIO, file_name: str, content_type: str) -> Tuple[bool, Optional[str]]:
+        """
+        Upload an image to S3 from a file-like object without reading it into memory.
+        
+        The stream is read one part at a time and parts are uploaded in parallel,
+        so at most part_size * concurrency bytes are buffered. Anything shorter than
+        one part is sent with one put_object call. A failed multipart upload is
+        aborted so no incomplete parts are left behind.
         
         Args:
-            file_data: The binary data of the image
+            stream: Readable binary stream of the image
             file_name: The name to give the file in S3
             content_type: The MIME type of the image
             
@@ -32,29 +250,167 @@ class S3Service:
             Tuple of (success: bool, url: Optional[str])
             If successful, returns (True, url). If failed, returns (False, None)
         """
+        key = f"images/{file_name}"
+        upload_id = None
         try:
-            # Generate a unique key for the file
-            key = f"images/{file_name}"
+            first_part = stream.read(self.part_size)
+            # A stream of exactly part_size bytes becomes a one-part multipart upload,
+            # so no part beyond the first is read before a slot is free
+            if len(first_part) < self.part_size:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=first_part,
+                    ContentType=content_type
+                )
+                return True, self._object_url(key)
             
-            # Upload the file
-            self.s3_client.put_object(
+            upload_id = self.s3_client.create_multipart_upload(
                 Bucket=self.bucket_name,
                 Key=key,
-                Body=file_data,
                 ContentType=content_type
-            )
+            )['UploadId']
             
-            # Generate the URL
-            url = f"https://{self.bucket_name}.s3.amazonaws.com/{key}"
-            return True, url
+            # Each buffered part holds a slot until S3 has acknowledged it
+            slots = threading.BoundedSemaphore(self.concurrency)
+            
+            def upload_part(part_number, data):
+                try:
+                    response = self.s3_client.upload_part(
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=data
+                    )
+                    return {'PartNumber': part_number, 'ETag': response['ETag']}
+                finally:
+                    slots.release()
+            
+            buffered = [first_part]
+            first_part = None
+            futures = []
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                part_number = 0
+                while True:
+                    # Wait for a free slot before reading the next part into memory
+                    slots.acquire()
+                    data = buffered.pop(0) if buffered else stream.read(self.part_size)
+                    if not data or any(future.done() and future.exception() for future in futures):
+                        slots.release()
+                        break
+                    part_number += 1
+                    futures.append(executor.submit(upload_part, part_number, data))
+                    data = None
+            parts = [future.result() for future in futures]
+            
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return True, self._object_url(key)
             
-        except ClientError as e:
-            logging.error(f"Error uploading to S3: {str(e)}")
-            return False, None
         except Exception as e:
-            logging.error(f"Unexpected error uploading to S3: {str(e)}")
+            logging.error(f"Error streaming upload to S3: {str(e)}")
+            if upload_id is not None:
+                try:
+                    self.s3_client.abort_multipart_upload(
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        UploadId=upload_id
+                    )
+                except Exception as abort_error:
+                    logging.error(f"Error aborting multipart upload: {str(abort_error)}")
             return False, None
 
+    def upload_derivatives(self, source: BinaryIO, file_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Generate resized WebP/JPEG copies of an uploaded image and store them next to it.
+        
+        For images/<name>.<ext> the copies are stored as images/<name>_<width>.<format>
+        and described by images/<name>.manifest.json.
+        
+        Args:
+            source: Readable binary stream of the original image
+            file_name: The name the original was stored under
+            
+        Returns:
+            The manifest (original width/height, manifest_url and a 'variants' list with
+            width, height, format, content_type, url and bytes), or None if no
+            derivatives were produced
+            
+        Raises:
+            Exception: If storing the derivatives fails
+        """
+        derivatives = image_processing.generate_derivatives(source)
+        if not derivatives or not derivatives['variants']:
+            return None
+        
+        stem = os.path.splitext(file_name)[0]
+        
+        def put(variant):
+            key = f"images/{stem}_{variant['width']}.{variant['format']}"
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=variant['data'],
+                ContentType=variant['content_type'],
+                CacheControl='public, max-age=31536000, immutable'
+            )
+            return {
+                'width': variant['width'],
+                'height': variant['height'],
+                'format': variant['format'],
+                'content_type': variant['content_type'],
+                'url': self._object_url(key),
+                'bytes': len(variant['data'])
+            }
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                variants = list(executor.map(put, derivatives['variants']))
+            
+            manifest_key = f"images/{stem}.manifest.json"
+            manifest = {
+                'source_url': self._object_url(f"images/{file_name}"),
+                'width': derivatives['width'],
+                'height': derivatives['height'],
+                'variants': variants
+            }
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=manifest_key,
+                Body=json.dumps(manifest).encode('utf-8'),
+                ContentType='application/json'
+            )
+            return {**manifest, 'manifest_url': self._object_url(manifest_key)}
+            
+        except Exception as e:
+            raise Exception(f"Error uploading image derivatives to S3: {str(e)}")
+
+    def download_image(self, image_url: str) -> BinaryIO:
+        """
+        Download an image into a temporary file.
+        
+        Up to part_size bytes are kept in memory; larger images spill to disk.
+        
+        Args:
+            image_url: The full URL of the image
+            
+        Returns:
+            Seekable file positioned at the start; the caller must close it
+        """
+        buffer = tempfile.SpooledTemporaryFile(max_size=self.part_size)
+        try:
+            self.s3_client.download_fileobj(self.bucket_name, self._object_key(image_url), buffer)
+        except Exception:
+            buffer.close()
+            raise
+        buffer.seek(0)
+        return buffer
+
     def delete_image(self, image_url: str) -> bool:
         """
         Delete an image from S3.
@@ -67,7 +423,7 @@ class S3Service:
         """
         try:
             # Extract the key from the URL
-            key = image_url.split(f"https://{self.bucket_name}.s3.amazonaws.com/")[1]
+            key = self._object_key(image_url)
             
             # Delete the object
             self.s3_client.delete_object(
@@ -81,4 +437,45 @@ class S3Service:
             return False
         except Exception as e:
             logging.error(f"Unexpected error deleting from S3: {str(e)}")
-            return False 
\ No newline at end of file
+            return False 
+
+    def iter_image_pages(self, page_size: int = DELETE_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """
+        List every object under images/ one page at a time.
+        
+        Args:
+            page_size: Keys per list_objects_v2 request (at most 1000)
+            
+        Yields:
+            Lists of dicts with the object's Key, Size and LastModified
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix='images/',
+                                       PaginationConfig={'PageSize': min(page_size, DELETE_BATCH_SIZE)}):
+            yield [
+                {'Key': item['Key'], 'Size': item['Size'], 'LastModified': item['LastModified']}
+                for item in page.get('Contents', [])
+            ]
+
+    def delete_objects(self, keys: List[str]) -> List[Dict[str, str]]:
+        """
+        Delete objects by key with as few delete_objects requests as possible.
+        
+        Args:
+            keys: Object keys to delete
+            
+        Returns:
+            List of {'Key', 'Code', 'Message'} dicts for keys S3 could not delete
+        """
+        errors = []
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            errors.extend(
+                {'Key': error['Key'], 'Code': error.get('Code', ''), 'Message': error.get('Message', '')}
+                for error in response.get('Errors', [])
+            )
+        return errors
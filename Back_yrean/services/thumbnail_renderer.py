@@ -0,0 +1,268 @@
+import os
+import io
+import re
+import json
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from services.image_processing import best_fit
+
+try:
+    from PIL import Image, ImageColor, ImageDraw, ImageFont
+except ImportError:  # Pillow is optional; without it presentations have no thumbnails
+    Image = None
+    ImageColor = None
+    ImageDraw = None
+    ImageFont = None
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Size of the slide canvas element positions are stored in (see useSlideScale.js)
+DESIGN_WIDTH = 960
+DESIGN_HEIGHT = 540
+
+# Pillow format name and content type per thumbnail format
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'png': ('PNG', 'image/png')
+}
+
+# Fallback faces, in the order tried, when the element's font family is not installed
+FALLBACK_FONTS = {
+    (False, False): ['DejaVuSans.ttf', 'LiberationSans-Regular.ttf'],
+    (True, False): ['DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf'],
+    (False, True): ['DejaVuSans-Oblique.ttf', 'LiberationSans-Italic.ttf'],
+    (True, True): ['DejaVuSans-BoldOblique.ttf', 'LiberationSans-BoldItalic.ttf']
+}
+
+# Seconds between the first edit after a render and the re-render, so a burst of edits renders once
+THUMBNAIL_DELAY_SECONDS = float(os.getenv('THUMBNAIL_DELAY_SECONDS', '30'))
+
+MARKDOWN_PATTERN = re.compile(r'(\*\*|__|`|^#{1,6}\s+|^>\s?)', re.MULTILINE)
+
+
+def thumbnail_width() -> int:
+    """Return the configured thumbnail width in pixels."""
+    return int(os.getenv('THUMBNAIL_WIDTH', '320'))
+
+
+def thumbnail_format() -> str:
+    """Return the configured thumbnail format, 'webp' or 'png'."""
+    image_format = os.getenv('THUMBNAIL_FORMAT', 'webp').lower()
+    return image_format if image_format in THUMBNAIL_FORMATS else 'webp'
+
+
+def is_available() -> bool:
+    """Return whether Pillow is installed and thumbnails can be rendered."""
+    return Image is not None
+
+
+@lru_cache(maxsize=256)
+def _font(family: str, size: int, bold: bool, italic: bool):
+    """Load the closest available font face at a pixel size."""
+    variant = ('-Bold' if bold else '') + ('-Italic' if italic else '')
+    for name in [f"{family}{variant}.ttf", f"{family}.ttf"] + FALLBACK_FONTS[(bold, italic)]:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def _color(value: Optional[str], default: str) -> tuple:
+    """Parse a CSS color into an RGB tuple, ignoring any alpha."""
+    try:
+        return ImageColor.getrgb(value or default)[:3]
+    except ValueError:
+        return ImageColor.getrgb(default)[:3]
+
+
+def _fit(image, width: int, height: int, fit: str):
+    """Scale an image into a width x height box like CSS background-size / object-fit."""
+    if fit == 'stretch':
+        return image.resize((width, height), Image.LANCZOS)
+    scale = (max if fit == 'cover' else min)(width / image.width, height / image.height)
+    return image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+
+
+def _composite(canvas, layer, left: int, top: int) -> None:
+    """Alpha-composite a layer at a position that may lie partly outside the canvas."""
+    crop_left, crop_top = max(0, -left), max(0, -top)
+    if crop_left >= layer.width or crop_top >= layer.height:
+        return
+    canvas.alpha_composite(layer.crop((crop_left, crop_top, layer.width, layer.height)),
+                           (left + crop_left, top + crop_top))
+
+
+def _paste_centered(canvas, image, left: int, top: int, width: int, height: int, opacity: float = 1) -> None:
+    """Composite image centered in a box of the canvas, clipped to the box."""
+    image = image.convert('RGBA')
+    if opacity < 1:
+        image.putalpha(image.getchannel('A').point(lambda alpha: round(alpha * opacity)))
+    offset_x, offset_y = (image.width - width) // 2, (image.height - height) // 2
+    box = image.crop((offset_x, offset_y, offset_x + width, offset_y + height))
+    _composite(canvas, box, left, top)
+
+
+def _wrap(draw, text: str, font, width: float) -> List[str]:
+    """Break text into lines no wider than width, keeping explicit line breaks."""
+    lines = []
+    for paragraph in text.split('\n'):
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f"{line} {word}" if line else word
+            if line and draw.textlength(candidate, font=font) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _draw_text(canvas, element: Dict[str, Any], box: tuple, scale: float) -> None:
+    data = element.get('element_data') or {}
+    left, top, width, height = box
+    size = max(1, round(float(data.get('font_size') or 24) * scale))
+    font = _font(data.get('font_family') or 'Arial', size, bool(data.get('bold')), bool(data.get('italic')))
+    color = _color(data.get('font_color'), '#000000')
+    padding = 2 * scale
+    line_height = size * 1.2
+
+    # Drawn on its own layer so text overflowing the element box is clipped like overflow: hidden
+    layer = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    text = MARKDOWN_PATTERN.sub('', data.get('content') or '')
+    y = padding
+    for line in _wrap(draw, text, font, width - 2 * padding):
+        if y > height:
+            break
+        line_width = draw.textlength(line, font=font)
+        align = data.get('text_align') or 'left'
+        x = padding
+        if align == 'center':
+            x = (width - line_width) / 2
+        elif align == 'right':
+            x = width - padding - line_width
+        draw.text((x, y), line, font=font, fill=color)
+        if data.get('underline') and line:
+            underline_y = y + size * 1.05
+            draw.line((x, underline_y, x + line_width, underline_y), fill=color, width=max(1, size // 14))
+        y += line_height
+    _composite(canvas, layer, left, top)
+
+
+def fingerprint(slide: Dict[str, Any], elements: List[Dict[str, Any]],
+                width: Optional[int] = None, image_format: Optional[str] = None) -> str:
+    """
+    Hash everything a thumbnail is drawn from.
+
+    Timestamps and the slide's position are left out, so reordering the other
+    slides or saving without changes keeps the same thumbnail.
+    """
+    drawn_slide = {key: value for key, value in slide.items()
+                   if key not in ('slide_number', 'created_at', 'updated_at')}
+    raw = json.dumps([drawn_slide, elements, width or thumbnail_width(), image_format or thumbnail_format()],
+                     sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def image_loader(s3_service) -> Callable[[str, float], Optional[Any]]:
+    """
+    Build a load_image callable for render_slide that reads images from the bucket.
+
+    Images outside the bucket are skipped rather than fetched, and each URL is
+    downloaded at most once per loader.
+    """
+    loaded = {}
+
+    def load_image(image_url: str, width: float):
+        image_url = s3_service.canonical_url(image_url)
+        if not s3_service.is_own_url(image_url):
+            return None
+        if image_url not in loaded:
+            source = None
+            try:
+                source = s3_service.download_image(image_url)
+                image = Image.open(source)
+                # JPEGs can be decoded at a reduced scale, which is much cheaper for large photos
+                image.draft('RGB', (max(1, int(width)), max(1, int(width))))
+                image.load()
+                loaded[image_url] = image
+            except Exception as e:
+                logger.warning(f"Could not load {image_url} for thumbnail: {str(e)}")
+                loaded[image_url] = None
+            finally:
+                if source is not None:
+                    source.close()
+        return loaded[image_url]
+    return load_image
+
+
+def render_slide(slide: Dict[str, Any], elements: List[Dict[str, Any]],
+                 load_image: Callable[[str, float], Optional[Any]],
+                 width: Optional[int] = None, image_format: Optional[str] = None) -> Optional[bytes]:
+    """
+    Rasterize a slide into a small thumbnail.
+
+    Draws the background color, the background image with its fit and opacity,
+    and the text and image elements in z-index order, scaled from the design
+    canvas to the thumbnail width.
+
+    Args:
+        slide: Slide dict as embedded in presentation payloads
+        elements: Elements as returned by get_slide_elements
+        load_image: Returns a decoded PIL image for a URL and the width it is drawn
+            at, or None if the image cannot be loaded
+        width: Thumbnail width in pixels (defaults to THUMBNAIL_WIDTH)
+        image_format: 'webp' or 'png' (defaults to THUMBNAIL_FORMAT)
+
+    Returns:
+        The encoded thumbnail, or None if Pillow is not installed
+    """
+    if Image is None:
+        return None
+    width = width or thumbnail_width()
+    image_format = image_format or thumbnail_format()
+    scale = width / DESIGN_WIDTH
+    height = round(DESIGN_HEIGHT * scale)
+
+    canvas = Image.new('RGBA', (width, height), _color(slide.get('background_color'), '#FFFFFF') + (255,))
+
+    background_url = slide.get('background_image_thumbnail_url') or slide.get('background_image_url')
+    if background_url:
+        background = load_image(background_url, width)
+        if background is not None:
+            fitted = _fit(background, width, height, slide.get('background_image_fit') or 'cover')
+            opacity = slide.get('background_image_opacity')
+            _paste_centered(canvas, fitted, 0, 0, width, height, 1 if opacity is None else float(opacity))
+
+    for element in sorted(elements, key=lambda element: element.get('z_index') or 0):
+        if element.get('width') is None or element.get('height') is None:
+            continue
+        box = (
+            round(float(element['x_position']) * scale), round(float(element['y_position']) * scale),
+            max(1, round(float(element['width']) * scale)), max(1, round(float(element['height']) * scale))
+        )
+        try:
+            if element['element_type'] == 'text':
+                _draw_text(canvas, element, box, scale)
+            elif element['element_type'] == 'image':
+                data = element.get('element_data') or {}
+                # The smallest derivative covering the thumbnail box, not the one sized for the editor
+                image_url = best_fit(data.get('variants'), box[2]) or data.get('image_url')
+                image = load_image(image_url, box[2])
+                if image is not None:
+                    _paste_centered(canvas, _fit(image, box[2], box[3], 'contain'), *box)
+        except Exception as e:
+            logger.warning(f"Could not draw element {element.get('element_id')} in thumbnail: {str(e)}")
+
+    pil_format, _ = THUMBNAIL_FORMATS[image_format]
+    buffer = io.BytesIO()
+    canvas.convert('RGB').save(buffer, format=pil_format, quality=80)
+    return buffer.getvalue()
@@ -1,29 +1,22 @@
-import os
-from datetime import datetime
 from typing import Optional, Dict, Any
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 import logging
+from services.db_pool import get_pool
+from services.password_hasher import get_password_hasher, PasswordHasherBusy
 
 # Load environment variables
 load_dotenv()
 
 class UserAccountsService:
     def __init__(self):
-        """Initialize the service with database connection parameters."""
-        self.db_params = {
-            'dbname': os.getenv('DB_NAME'),
-            'user': os.getenv('DB_USERNAME'),
-            'password': os.getenv('DB_PASSWORD'),
-            'host': os.getenv('DB_ENDPOINT'),
-            'port': os.getenv('DB_PORT')
-        }
+        """Initialize the service with the password hasher."""
+        self.hasher = get_password_hasher()
 
     def _get_connection(self):
-        """Create and return a database connection."""
-        return psycopg2.connect(**self.db_params, cursor_factory=RealDictCursor)
+        """Check out a pooled database connection; it is returned to the pool when the block exits."""
+        # Looked up on every call, so a worker forked after this service was built gets its own pool
+        return get_pool().connection()
 
     def create_user(self, username: str, email: str, password: str) -> Dict[str, Any]:
         """
@@ -38,6 +31,7 @@ class UserAccountsService:
             Dict containing the created user's information (excluding password)
             
         Raises:
+            PasswordHasherBusy: If too many passwords are being hashed already
             Exception: If user creation fails (e.g., duplicate username/email)
         """
         try:
@@ -45,11 +39,11 @@ class UserAccountsService:
             if not username or not email or not password:
                 raise Exception("Username, email, and password are required")
             
+            # Hashed before a connection is checked out, so none is held while it runs
+            password_hash = self.hasher.hash(password)
+            
             with self._get_connection() as conn:
                 with conn.cursor() as cur:
-                    # Hash the password using pbkdf2:sha256 method
-                    password_hash = generate_password_hash(password, method='pbkdf2:sha256')
-                    
                     # Insert the new user
                     cur.execute("""
                         INSERT INTO users (username, email, password_hash)
@@ -67,6 +61,8 @@ class UserAccountsService:
             elif "users_email_key" in str(e):
                 raise Exception("Email already exists")
             raise Exception("Failed to create user")
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             raise Exception(f"Error creating user: {str(e)}")
 
@@ -99,12 +95,18 @@ class UserAccountsService:
         """
         Verify a user's password and return their information if correct.
         
+        A hash made with another algorithm or cost than the configured one is
+        replaced with a fresh hash of the now verified password.
+        
         Args:
             username: The username to verify
             password: The plain text password to verify
             
         Returns:
             Dict containing user information if password is correct, None otherwise
+            
+        Raises:
+            PasswordHasherBusy: If too many passwords are being checked already
         """
         try:
             with self._get_connection() as conn:
@@ -115,18 +117,34 @@ class UserAccountsService:
                         WHERE username = %s
                     """, (username,))
                     user = cur.fetchone()
-                    if user:
-                        logging.debug(f"Login attempt for username: {username}")
-                        logging.debug(f"Password provided: {password}")
-                        logging.debug(f"Password hash in DB: {user['password_hash']}")
-                        if check_password_hash(user['password_hash'], password):
-                            user_dict = dict(user)
-                            del user_dict['password_hash']
-                            return user_dict
-                        else:
-                            logging.debug("Password hash check failed.")
-                    else:
-                        logging.debug(f"No user found for username: {username}")
-                    return None
+            
+            logging.debug(f"Login attempt for username: {username}")
+            if not self.hasher.verify(user['password_hash'] if user else None, password):
+                logging.debug("Password check failed.")
+                return None
+            
+            user_dict = dict(user)
+            password_hash = user_dict.pop('password_hash')
+            if self.hasher.needs_rehash(password_hash):
+                self._rehash_password(user_dict['user_id'], password_hash, password)
+            return user_dict
+        except PasswordHasherBusy:
+            raise
+        except Exception as e:
+            raise Exception(f"Error verifying password: {str(e)}")
+
+    def _rehash_password(self, user_id: int, old_hash: str, password: str) -> None:
+        """Store a hash with the current parameters; skipped when the pool is busy or the password changed meanwhile."""
+        try:
+            new_hash = self.hasher.hash(password)
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        UPDATE users SET password_hash = %s
+                        WHERE user_id = %s AND password_hash = %s
+                    """, (new_hash, user_id, old_hash))
+                    conn.commit()
+        except PasswordHasherBusy:
+            logging.debug(f"Hashing pool busy, not upgrading the password hash of user {user_id}")
         except Exception as e:
-            raise Exception(f"Error verifying password: {str(e)}") 
\ No newline at end of file
+            logging.warning(f"Could not upgrade the password hash of user {user_id}: {str(e)}")
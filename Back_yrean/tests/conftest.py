@@ -1,5 +1,29 @@
 import os
 import sys
+import pytest
 
 # Add the parent directory to the Python path so that the services module can be imported
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) 
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) 
+
+
+class FakeRevocationStore:
+    def revoke(self, jti, expires_at):
+        return True
+
+    def revoked_since(self, since):
+        return [], since
+
+    def prune(self):
+        return 0
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    # Importing the app builds every service; keep the job worker out of the test process
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('JOB_WORKER_MODE', 'external')
+    os.environ.setdefault('AUTH_SECRET_KEY', 'secret')
+    import app
+    from services.auth_service import AuthService
+    monkeypatch.setattr(app, 'auth_service', AuthService('secret', store=FakeRevocationStore()))
+    return app
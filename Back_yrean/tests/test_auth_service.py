@@ -0,0 +1,119 @@
+import os
+import pytest
+from services import auth_service
+from services.auth_service import AuthService, AuthError, get_auth_service
+
+
+class FakeRevocationStore:
+    """In-memory stand-in for the revoked_tokens table, shared by several AuthService instances."""
+
+    def __init__(self):
+        self.revoked = {}
+        self.queries = 0
+
+    def revoke(self, jti, expires_at):
+        self.queries += 1
+        if jti in self.revoked:
+            return False
+        self.revoked[jti] = expires_at
+        return True
+
+    def revoked_since(self, since):
+        self.queries += 1
+        return list(self.revoked.items()), since
+
+    def prune(self):
+        return 0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_access_tokens_verify_without_touching_the_store():
+    """Test that valid tokens verify from memory and forged or expired ones are rejected."""
+    store, clock = FakeRevocationStore(), Clock()
+    auth = AuthService('secret', store=store, access_ttl=60, clock=clock)
+    tokens = auth.issue_tokens(42)
+
+    for _ in range(3):
+        assert auth.verify_access(tokens['access_token'])['sub'] == 42
+    assert store.queries == 0
+
+    with pytest.raises(AuthError):
+        auth.verify_access(None)
+    with pytest.raises(AuthError):
+        auth.verify_access(tokens['refresh_token'])
+    with pytest.raises(AuthError):
+        AuthService('other secret', store=store).verify_access(tokens['access_token'])
+
+    clock.now += 61
+    with pytest.raises(AuthError):
+        auth.verify_access(tokens['access_token'])
+
+
+def test_refresh_tokens_rotate_and_cannot_be_reused():
+    """Test that a refresh token yields a new pair once and is rejected the second time."""
+    auth = AuthService('secret', store=FakeRevocationStore())
+    tokens = auth.issue_tokens(42)
+
+    refreshed = auth.refresh(tokens['refresh_token'])
+    assert auth.verify_access(refreshed['access_token'])['sub'] == 42
+    with pytest.raises(AuthError):
+        auth.refresh(tokens['refresh_token'])
+    with pytest.raises(AuthError):
+        auth.refresh(refreshed['access_token'])
+
+
+def test_revocations_reach_other_processes_on_sync():
+    """Test that a logout in one process rejects the token in another after its next sync."""
+    store = FakeRevocationStore()
+    here, there = AuthService('secret', store=store), AuthService('secret', store=store)
+    token = here.issue_tokens(42)['access_token']
+    assert there.verify_access(token)['sub'] == 42
+
+    here.revoke('access', token)
+    with pytest.raises(AuthError):
+        here.verify_access(token)
+    # Still cached as valid over there until the revocation set is synced
+    assert there.verify_access(token)['sub'] == 42
+    there.sync_revocations()
+    with pytest.raises(AuthError):
+        there.verify_access(token)
+
+
+def test_forked_processes_keep_syncing_revocations(monkeypatch):
+    """Test that a process forked after start() picks up revocations from its own sync thread."""
+    store = FakeRevocationStore()
+    auth = AuthService('secret', store=store, sync_interval=0.01)
+    token = auth.issue_tokens(42)['access_token']
+    auth.start()
+    parent_thread = auth._thread
+
+    # The parent's sync thread does not exist in a forked child
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    try:
+        assert auth.verify_access(token)['sub'] == 42
+        assert auth._thread is not parent_thread
+        AuthService('secret', store=store).revoke('access', token)
+        auth._thread.join(0.5)
+        with pytest.raises(AuthError):
+            auth.verify_access(token)
+    finally:
+        auth.stop()
+
+
+def test_a_signing_key_is_required_unless_random_keys_are_allowed(monkeypatch):
+    """Test that the shared auth service refuses a per-process key unless explicitly allowed."""
+    monkeypatch.setattr(auth_service, '_auth_service', None)
+    monkeypatch.delenv('AUTH_SECRET_KEY', raising=False)
+    monkeypatch.delenv('AUTH_ALLOW_RANDOM_SECRET', raising=False)
+    with pytest.raises(ValueError):
+        get_auth_service()
+
+    monkeypatch.setenv('AUTH_ALLOW_RANDOM_SECRET', 'true')
+    assert isinstance(get_auth_service(), AuthService)
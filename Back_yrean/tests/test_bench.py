@@ -0,0 +1,34 @@
+from bench.report import percentile, summarize, diff
+
+
+def test_summaries_report_nearest_rank_percentiles_and_throughput():
+    """Test that endpoint summaries use nearest-rank percentiles in milliseconds."""
+    assert percentile([], 50) is None
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+
+    summary = summarize([i / 1000 for i in range(100, 0, -1)], errors=3, seconds=10)
+    assert summary['requests'] == 100
+    assert summary['errors'] == 3
+    assert summary['throughput_rps'] == 10
+    assert summary['latency_ms'] == {'p50': 50, 'p95': 95, 'p99': 99, 'mean': 50.5, 'max': 100}
+
+
+def test_diff_flags_regressions_beyond_the_threshold():
+    """Test that slower percentiles, lower throughput and new errors count as regressions, noise does not."""
+    def result(rps, p99, errors=0):
+        return {'endpoints': {'search': {'throughput_rps': rps, 'errors': errors,
+                                         'latency_ms': {'p50': 5, 'p95': 10, 'p99': p99}}}}
+
+    rows = {row['metric']: row for row in diff(result(100, 20), result(95, 21), threshold=10)}
+    assert not any(row['regression'] for row in rows.values())
+    assert rows['p99']['change_percent'] == 5
+
+    rows = {row['metric']: row for row in diff(result(100, 20), result(80, 30, errors=1), threshold=10)}
+    assert rows['throughput_rps']['regression']
+    assert rows['p99']['regression']
+    assert rows['errors']['regression']
+    assert not rows['p50']['regression']
+
+    rows = diff(result(100, 20), {'endpoints': {}}, threshold=10)
+    assert all(row['current'] is None for row in rows)
@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from services.cache import LRUCache, InMemorySharedCache, TieredCache, dumps, loads
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_serialization_round_trip():
+    """Test that database types survive serialization unchanged."""
+    value = {
+        'presentation_id': 1,
+        'created_at': datetime(2025, 5, 30, 12, 0, tzinfo=timezone.utc),
+        'x_position': Decimal('10.50'),
+        'slides': [{'title': 'Intro', 'element_data': {}}]
+    }
+
+    assert loads(dumps(value)) == value
+
+
+def test_lru_expires_entries_after_ttl():
+    """Test that entries are dropped once their TTL has passed."""
+    clock = FakeClock()
+    cache = LRUCache(ttl=10, clock=clock)
+    cache.set('a', b'1')
+
+    clock.now += 9
+    assert cache.get('a') == b'1'
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.expirations == 1
+
+
+def test_lru_evicts_least_recently_used_entry():
+    """Test that the least recently used entry is evicted at max_entries."""
+    cache = LRUCache(max_entries=2)
+    cache.set('a', b'1')
+    cache.set('b', b'2')
+    cache.get('a')
+    cache.set('c', b'3')
+
+    assert cache.get('a') == b'1'
+    assert cache.get('b') is None
+    assert cache.get('c') == b'3'
+    assert cache.evictions == 1
+
+
+def test_lru_respects_memory_bound():
+    """Test that total stored bytes never exceed max_bytes."""
+    cache = LRUCache(max_bytes=10)
+    cache.set('a', b'12345')
+    cache.set('b', b'12345')
+    cache.set('c', b'12345')
+    cache.set('too_big', b'x' * 11)
+
+    assert cache.size_bytes <= 10
+    assert cache.get('a') is None
+    assert cache.get('too_big') is None
+
+
+def test_tiered_cache_reads_through_shared_tier():
+    """Test that a local miss is served from the shared tier and repopulates the local tier."""
+    shared = InMemorySharedCache()
+    writer = TieredCache(local=LRUCache(), shared=shared)
+    reader = TieredCache(local=LRUCache(), shared=shared)
+
+    writer.set('presentation:1', {'title': 'Deck'})
+
+    assert reader.get('presentation:1') == {'title': 'Deck'}
+    assert reader.get('presentation:1') == {'title': 'Deck'}
+    stats = reader.stats()
+    assert stats['shared_hits'] == 1
+    assert stats['local_hits'] == 1
+
+
+def test_tiered_cache_invalidates_both_tiers():
+    """Test that delete removes a key from the local and shared tiers."""
+    shared = InMemorySharedCache()
+    cache = TieredCache(local=LRUCache(), shared=shared)
+    cache.set('slide_elements:7', [{'element_id': 1}])
+
+    cache.delete(['slide_elements:7'])
+
+    assert cache.get('slide_elements:7') is None
+    assert shared.get('empyre:slide_elements:7') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_tiered_cache_survives_shared_tier_failure():
+    """Test that shared tier errors degrade to a miss instead of raising."""
+    class BrokenShared:
+        def get(self, key):
+            raise ConnectionError("connection refused")
+
+        def set(self, key, value, ex=None):
+            raise ConnectionError("connection refused")
+
+        def delete(self, *keys):
+            raise ConnectionError("connection refused")
+
+    cache = TieredCache(local=LRUCache(), shared=BrokenShared())
+    cache.set('presentation:1', {'title': 'Deck'})
+    cache.local.clear()
+
+    assert cache.get('presentation:1') is None
+    cache.delete(['presentation:1'])
+    assert cache.stats()['shared_errors'] == 3
@@ -0,0 +1,200 @@
+import os
+import pytest
+import threading
+from flask import Flask
+from flask_socketio import SocketIO
+from services.collaboration_service import (
+    UpdateCoalescer, CollaborationService, CollaborationNamespace
+)
+from services.auth_service import AuthService
+
+
+class FakePresentationsService:
+    def __init__(self):
+        self.batches = []
+        self.geometry_writes = []
+        self.slides = {10: 1, 20: 1, 30: 2}
+
+    def get_presentation_revision(self, presentation_id):
+        return 5 if int(presentation_id) in (1, 2) else None
+
+    def get_owner(self, entity_type, entity_id):
+        return {1: 7, 2: 8}.get(int(entity_id))
+
+    def get_slide_revision(self, slide_id):
+        if slide_id not in self.slides:
+            return None
+        return {'presentation_id': self.slides[slide_id], 'revision': 5}
+
+    def apply_element_batch(self, slide_id, operations):
+        self.batches.append((slide_id, operations))
+        return [{'op': operation['op'], 'success': True, 'element': {}} for operation in operations]
+
+    def update_element_geometry(self, updates):
+        self.geometry_writes.append(updates)
+        return updates
+
+
+def test_coalescer_keeps_latest_value_per_key():
+    """Test that a burst of updates to one key is flushed as a single merged update."""
+    flushed = []
+    coalescer = UpdateCoalescer(flushed.append)
+
+    coalescer.submit('a', {'x_position': 1, 'y_position': 1})
+    coalescer.submit('a', {'x_position': 2})
+    coalescer.submit('a', {'x_position': 3})
+    coalescer.submit('b', {'width': 50})
+
+    assert coalescer.flush() == 2
+    assert flushed == [{'a': {'x_position': 3, 'y_position': 1}, 'b': {'width': 50}}]
+    assert coalescer.stats() == {'submitted': 4, 'coalesced': 2, 'flushed': 2, 'pending': 0}
+    assert coalescer.flush() == 0
+
+
+def test_coalescer_survives_flush_errors():
+    """Test that a failing flush callback does not break later flushes."""
+    calls = []
+
+    def flush(pending):
+        calls.append(pending)
+        if len(calls) == 1:
+            raise Exception("database unavailable")
+
+    coalescer = UpdateCoalescer(flush)
+    coalescer.submit('a', {'x_position': 1})
+    coalescer.flush()
+    coalescer.submit('a', {'x_position': 2})
+    coalescer.flush()
+
+    assert calls[-1] == {'a': {'x_position': 2}}
+
+
+def test_flush_waits_for_a_flush_in_flight():
+    """Test that a caller's flush returns only after a concurrent background write has finished."""
+    writing, release = threading.Event(), threading.Event()
+    written = []
+
+    def flush(pending):
+        writing.set()
+        release.wait(5)
+        written.append(pending)
+
+    coalescer = UpdateCoalescer(flush)
+    coalescer.submit('a', {'x_position': 1})
+    background = threading.Thread(target=coalescer.flush)
+    background.start()
+    assert writing.wait(5)
+
+    caller = threading.Thread(target=coalescer.flush)
+    caller.start()
+    caller.join(0.1)
+    assert caller.is_alive()
+    release.set()
+    caller.join(5)
+    background.join(5)
+    assert written == [{'a': {'x_position': 1}}]
+
+
+def test_forked_processes_start_their_own_flush_loop(monkeypatch):
+    """Test that a process forked after start() runs its own flush loop once it submits an update."""
+    flushed = threading.Event()
+    coalescer = UpdateCoalescer(lambda pending: flushed.set(), interval=0.01)
+    coalescer.start()
+    parent_thread = coalescer._thread
+
+    # The parent's loop thread does not exist in a forked child
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    coalescer.submit('a', {'x_position': 1})
+    try:
+        assert coalescer._thread is not parent_thread
+        assert flushed.wait(5)
+    finally:
+        coalescer.stop()
+
+
+def test_coalesced_moves_are_written_in_one_statement():
+    """Test that pending geometry for every element is persisted with a single geometry write."""
+    presentations = FakePresentationsService()
+    service = CollaborationService(presentations, interval=60)
+
+    for x in range(10):
+        service.move_element(10, 100, 'text', {'x_position': x, 'content': 'ignored'})
+    service.move_element(10, 101, 'image', {'width': 200})
+    service.queue_geometry(200, {'y_position': 7})
+    service.coalescer.flush()
+
+    assert presentations.geometry_writes == [[
+        {'element_id': 100, 'slide_id': 10, 'x_position': 9},
+        {'element_id': 101, 'slide_id': 10, 'width': 200},
+        {'element_id': 200, 'y_position': 7}
+    ]]
+    assert presentations.batches == []
+
+
+@pytest.fixture
+def socket_clients():
+    app = Flask(__name__)
+    socketio = SocketIO(app)
+    presentations = FakePresentationsService()
+    service = CollaborationService(presentations, interval=60)
+    socketio.on_namespace(CollaborationNamespace('/collab', service))
+
+    def connect():
+        return socketio.test_client(app, namespace='/collab')
+    return connect, service, presentations
+
+
+def test_moves_are_broadcast_to_other_room_members(socket_clients):
+    """Test that an element move reaches other editors of the deck but not the sender or other decks."""
+    connect, service, presentations = socket_clients
+    sender, peer, outsider = connect(), connect(), connect()
+    assert sender.emit('join', {'presentation_id': 1}, namespace='/collab', callback=True)['revision'] == 5
+    peer.emit('join', {'presentation_id': 1}, namespace='/collab', callback=True)
+    outsider.emit('join', {'presentation_id': 2}, namespace='/collab', callback=True)
+
+    ack = sender.emit('element:move', {
+        'presentation_id': 1, 'slide_id': 10, 'element_id': 100,
+        'element_type': 'text', 'x_position': 42
+    }, namespace='/collab', callback=True)
+
+    assert ack == {'success': True}
+    received = peer.get_received('/collab')
+    assert received == [{
+        'name': 'element:changed',
+        'args': [{'slide_id': 10, 'element_id': 100, 'changes': {'x_position': 42}}],
+        'namespace': '/collab'
+    }]
+    assert sender.get_received('/collab') == []
+    assert outsider.get_received('/collab') == []
+    assert service.coalescer.stats()['pending'] == 1
+
+
+def test_edits_require_joining_the_owning_presentation(socket_clients):
+    """Test that clients cannot edit decks they have not joined or slides of other decks."""
+    connect, service, presentations = socket_clients
+    client = connect()
+    move = {'presentation_id': 1, 'slide_id': 30, 'element_id': 300,
+            'element_type': 'text', 'x_position': 1}
+
+    assert 'error' in client.emit('element:move', move, namespace='/collab', callback=True)
+    client.emit('join', {'presentation_id': 1}, namespace='/collab', callback=True)
+    assert client.emit('element:move', move, namespace='/collab', callback=True) == {'error': 'Slide not found'}
+    assert service.coalescer.stats()['submitted'] == 0
+
+
+def test_authenticated_clients_may_only_join_their_own_decks():
+    """Test that a token is required to connect and that other users' decks cannot be joined."""
+    app = Flask(__name__)
+    socketio = SocketIO(app)
+    auth = AuthService('secret', store=object())
+    service = CollaborationService(FakePresentationsService(), interval=60)
+    socketio.on_namespace(CollaborationNamespace('/collab', service, auth_service=auth))
+
+    anonymous = socketio.test_client(app, namespace='/collab')
+    assert not anonymous.is_connected('/collab')
+
+    token = auth.issue_tokens(7)['access_token']
+    client = socketio.test_client(app, namespace='/collab', auth={'token': token})
+    assert client.is_connected('/collab')
+    assert client.emit('join', {'presentation_id': 1}, namespace='/collab', callback=True)['success']
+    assert 'error' in client.emit('join', {'presentation_id': 2}, namespace='/collab', callback=True)
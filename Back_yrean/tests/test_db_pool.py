@@ -0,0 +1,199 @@
+import threading
+import time
+import pytest
+from psycopg2 import extensions
+from services.db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise Exception("server closed the connection unexpectedly")
+        self.conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def commit(self):
+        self.commits += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def connections():
+    return []
+
+
+@pytest.fixture
+def make_pool(connections):
+    def factory(**kwargs):
+        def connect():
+            conn = FakeConnection()
+            connections.append(conn)
+            return conn
+        return ConnectionPool(connect=connect, **kwargs)
+    return factory
+
+
+def test_connections_are_reused(make_pool, connections):
+    """Test that a returned connection is handed out again."""
+    pool = make_pool(min_size=0, max_size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert len(connections) == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_prefills_min_size(make_pool, connections):
+    """Test that min_size connections are opened on first use."""
+    pool = make_pool(min_size=3, max_size=5)
+
+    with pool.connection():
+        stats = pool.stats()
+
+    assert len(connections) == 3
+    assert stats['size'] == 3
+    assert stats['in_use'] == 1
+    assert stats['idle'] == 2
+
+
+def test_commit_on_success_and_rollback_on_error(make_pool):
+    """Test the context manager's transaction handling."""
+    pool = make_pool(min_size=0, max_size=1)
+
+    with pool.connection() as conn:
+        pass
+    assert conn.commits == 1
+
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("boom")
+    assert conn.rollbacks == 1
+    assert pool.stats()['in_use'] == 0
+
+
+def test_open_transaction_is_rolled_back_on_return(make_pool):
+    """Test that a connection is never returned to the pool mid-transaction."""
+    pool = make_pool(min_size=0, max_size=1)
+
+    conn = pool.getconn()
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1")
+    pool.putconn(conn)
+
+    assert conn.rollbacks == 1
+    assert conn.get_transaction_status() == extensions.TRANSACTION_STATUS_IDLE
+
+
+def test_checkout_times_out_when_exhausted(make_pool):
+    """Test that checkout raises PoolTimeout once max_size connections are in use."""
+    pool = make_pool(min_size=0, max_size=1, timeout=0.05)
+
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    pool.putconn(conn)
+
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiter_receives_released_connection(make_pool, connections):
+    """Test that a blocked checkout is served as soon as a connection is returned."""
+    pool = make_pool(min_size=0, max_size=1, timeout=2)
+    conn = pool.getconn()
+    result = {}
+
+    def worker():
+        result['conn'] = pool.getconn()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    while pool.stats()['waiting'] == 0:
+        time.sleep(0.001)
+    pool.putconn(conn)
+    thread.join()
+
+    assert result['conn'] is conn
+    assert len(connections) == 1
+
+
+def test_unhealthy_connection_is_replaced(make_pool, connections):
+    """Test that a connection failing its health check is discarded on checkout."""
+    pool = make_pool(min_size=0, max_size=1, health_check_interval=0)
+
+    with pool.connection() as conn:
+        pass
+    conn.broken = True
+
+    with pool.connection() as replacement:
+        pass
+
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()['failed_health_checks'] == 1
+
+
+def test_expired_connection_is_recycled(make_pool, connections):
+    """Test that connections older than max_age are closed and replaced."""
+    pool = make_pool(min_size=0, max_size=1, max_age=0.01)
+
+    with pool.connection() as conn:
+        pass
+    time.sleep(0.02)
+    with pool.connection() as replacement:
+        pass
+
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()['size'] == 1
+
+
+def test_failed_connect_releases_slot(make_pool):
+    """Test that a failing connect does not leak pool capacity."""
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        raise Exception("could not connect to server")
+
+    pool = ConnectionPool(connect=connect, min_size=0, max_size=1, timeout=0.05)
+
+    for _ in range(2):
+        with pytest.raises(Exception, match="could not connect"):
+            pool.getconn()
+
+    assert len(attempts) == 2
+    assert pool.stats()['size'] == 0
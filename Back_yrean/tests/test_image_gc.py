@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from services.image_gc import ImageGarbageCollector, manifest_key
+
+NOW = datetime(2026, 1, 10, tzinfo=timezone.utc)
+OLD = NOW - timedelta(days=3)
+
+
+class FakeS3Service:
+    def __init__(self, objects):
+        self.objects = dict(objects)
+        self.delete_calls = []
+        self.page_sizes = []
+
+    def image_url(self, file_name):
+        return f"https://bucket.s3.amazonaws.com/images/{file_name}"
+
+    def iter_image_pages(self, page_size):
+        keys = sorted(self.objects)
+        for start in range(0, len(keys), page_size):
+            page = [{'Key': key, 'Size': 10, 'LastModified': self.objects[key]}
+                    for key in keys[start:start + page_size]]
+            self.page_sizes.append(len(page))
+            yield page
+
+    def delete_objects(self, keys):
+        self.delete_calls.append(list(keys))
+        for key in keys:
+            del self.objects[key]
+        return []
+
+
+class FakePresentationsService:
+    """Treats originals in live as referenced; derivatives follow their original through the manifest."""
+
+    def __init__(self, live, assets):
+        self.live = set(live)
+        self.assets = assets
+        self.forgotten = []
+
+    def find_unreferenced_images(self, candidates, grace_seconds):
+        unreferenced = []
+        for url, manifest_url in candidates:
+            owner = url if manifest_url is None else self.assets.get(manifest_url)
+            if owner not in self.live:
+                unreferenced.append(url)
+        return unreferenced
+
+    def forget_images(self, image_urls, grace_seconds):
+        self.forgotten.extend(image_urls)
+        return image_urls
+
+
+def url(name):
+    return f"https://bucket.s3.amazonaws.com/images/{name}"
+
+
+def make_bucket():
+    return {
+        'images/keep.png': OLD,
+        'images/keep_320.webp': OLD,
+        'images/keep.manifest.json': OLD,
+        'images/gone.png': OLD,
+        'images/gone_320.webp': OLD,
+        'images/gone.manifest.json': OLD,
+        'images/fresh.png': NOW - timedelta(minutes=5)
+    }
+
+
+def make_collector(s3, presentations, **kwargs):
+    return ImageGarbageCollector(s3, presentations, grace_seconds=86400, clock=lambda: NOW, **kwargs)
+
+
+def test_manifest_key_maps_derivatives_to_their_manifest():
+    """Test that derivatives and manifests are attributed to their original and originals are not."""
+    assert manifest_key('images/abc_960.webp') == 'images/abc.manifest.json'
+    assert manifest_key('images/abc.manifest.json') == 'images/abc.manifest.json'
+    assert manifest_key('images/abc.png') is None
+
+
+def test_unreferenced_objects_and_their_derivatives_are_deleted():
+    """Test that orphaned originals, derivatives and manifests are deleted and recent uploads are kept."""
+    s3 = FakeS3Service(make_bucket())
+    presentations = FakePresentationsService(
+        live=[url('keep.png')],
+        assets={url('keep.manifest.json'): url('keep.png'), url('gone.manifest.json'): url('gone.png')}
+    )
+
+    report = make_collector(s3, presentations, page_size=2).run()
+
+    assert sorted(s3.objects) == ['images/fresh.png', 'images/keep.manifest.json',
+                                  'images/keep.png', 'images/keep_320.webp']
+    assert presentations.forgotten == [url('gone.png')]
+    assert len(s3.delete_calls) == 1
+    assert max(s3.page_sizes) == 2
+    assert {key: report[key] for key in ('pages', 'scanned', 'recent', 'referenced', 'deleted', 'bytes_freed')} == {
+        'pages': 4, 'scanned': 7, 'recent': 1, 'referenced': 3, 'deleted': 3, 'bytes_freed': 30
+    }
+
+
+def test_dry_run_deletes_nothing():
+    """Test that a dry run reports what would be deleted without touching the bucket or database."""
+    s3 = FakeS3Service(make_bucket())
+    presentations = FakePresentationsService(live=[], assets={})
+
+    report = make_collector(s3, presentations, dry_run=True).run()
+
+    assert report['would_delete'] == 6 and report['deleted'] == 0
+    assert s3.delete_calls == [] and presentations.forgotten == []
+    assert len(s3.objects) == 7
+
+
+def test_deletes_are_sent_in_batches_of_1000():
+    """Test that a large sweep issues delete_objects with at most 1000 keys each."""
+    s3 = FakeS3Service({f'images/{index:05d}.png': OLD for index in range(2500)})
+    presentations = FakePresentationsService(live=[], assets={})
+
+    report = make_collector(s3, presentations, page_size=300).run()
+
+    assert [len(call) for call in s3.delete_calls] == [1000, 1000, 500]
+    assert report['deleted'] == 2500 and s3.objects == {}
@@ -0,0 +1,37 @@
+import io
+import pytest
+from services.image_processing import best_fit, generate_derivatives
+
+VARIANTS = [
+    {'width': 320, 'format': 'webp', 'url': 'w320.webp'},
+    {'width': 960, 'format': 'webp', 'url': 'w960.webp'},
+    {'width': 1920, 'format': 'webp', 'url': 'w1920.webp'},
+    {'width': 320, 'format': 'jpeg', 'url': 'w320.jpeg'}
+]
+
+
+def test_best_fit_picks_smallest_covering_variant():
+    """Test that the smallest variant at least as wide as the display box is chosen."""
+    assert best_fit(VARIANTS, 300) == 'w320.webp'
+    assert best_fit(VARIANTS, 321) == 'w960.webp'
+    assert best_fit(VARIANTS, 4000) == 'w1920.webp'
+    assert best_fit(VARIANTS, None) == 'w1920.webp'
+    assert best_fit(VARIANTS, 500, 'jpeg') == 'w320.jpeg'
+    assert best_fit([], 300) is None
+
+
+def test_generate_derivatives_never_upscales():
+    """Test that derivatives are produced in both formats only for widths below the original."""
+    Image = pytest.importorskip('PIL.Image')
+    source = io.BytesIO()
+    Image.new('RGBA', (1000, 500), (255, 0, 0, 128)).save(source, format='PNG')
+    source.seek(0)
+
+    derivatives = generate_derivatives(source, widths=[320, 960, 1920])
+
+    assert (derivatives['width'], derivatives['height']) == (1000, 500)
+    assert [(v['width'], v['height'], v['format']) for v in derivatives['variants']] == [
+        (960, 480, 'webp'), (960, 480, 'jpeg'), (320, 160, 'webp'), (320, 160, 'jpeg')
+    ]
+    for variant in derivatives['variants']:
+        assert Image.open(io.BytesIO(variant['data'])).size == (variant['width'], variant['height'])
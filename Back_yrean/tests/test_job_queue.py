@@ -0,0 +1,153 @@
+import os
+import threading
+from services.job_queue import JobQueue, retry_delay
+
+
+class FakeJobStore:
+    """In-memory stand-in for PostgresJobStore that ignores run_at delays."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = {}
+        self.next_id = 1
+        self.retries = []
+
+    def enqueue(self, jobs, cur=None):
+        with self._lock:
+            for job_type, payload, delay, max_attempts in jobs:
+                self.jobs[self.next_id] = {
+                    'job_id': self.next_id, 'job_type': job_type, 'payload': payload,
+                    'attempts': 0, 'max_attempts': max_attempts, 'status': 'pending'
+                }
+                self.next_id += 1
+
+    def claim(self, limit):
+        with self._lock:
+            claimed = [job for job in self.jobs.values() if job['status'] == 'pending'][:limit]
+            for job in claimed:
+                job['status'] = 'running'
+                job['attempts'] += 1
+            return [dict(job) for job in claimed]
+
+    def complete(self, job_id):
+        with self._lock:
+            del self.jobs[job_id]
+
+    def retry(self, job_id, delay, error):
+        with self._lock:
+            self.retries.append((job_id, delay, error))
+            self.jobs[job_id]['status'] = 'pending'
+
+    def fail(self, job_id, error):
+        with self._lock:
+            self.jobs[job_id].update(status='failed', last_error=error)
+
+    def counts(self):
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return counts
+
+
+def test_retry_delay_grows_exponentially_up_to_cap():
+    """Test that the backoff doubles per attempt and never exceeds the cap."""
+    for attempts, expected in ((1, 5), (2, 10), (3, 20), (20, 3600)):
+        delay = retry_delay(attempts, base=5, cap=3600)
+        assert expected / 2 <= delay <= expected
+
+
+def test_successful_job_is_removed():
+    """Test that a job whose handler succeeds is deleted from the store."""
+    store = FakeJobStore()
+    queue = JobQueue(store)
+    seen = []
+    queue.register('s3_delete', seen.append)
+
+    queue.enqueue('s3_delete', {'image_url': 'a.png'})
+
+    assert queue.run_once() == 1
+    assert seen == [{'image_url': 'a.png'}]
+    assert store.jobs == {}
+    assert queue.stats()['succeeded'] == 1
+
+
+def test_failing_job_is_retried_then_marked_failed():
+    """Test that a failing job is retried with backoff until max_attempts."""
+    store = FakeJobStore()
+    queue = JobQueue(store, backoff_base=1, backoff_max=60)
+
+    def handler(payload):
+        raise Exception("S3 unavailable")
+
+    queue.register('s3_delete', handler)
+    queue.enqueue('s3_delete', {'image_url': 'a.png'}, max_attempts=3)
+
+    for _ in range(3):
+        queue.run_once()
+
+    job = store.jobs[1]
+    assert job['status'] == 'failed'
+    assert job['last_error'] == "S3 unavailable"
+    assert [delay <= 1 * 2 ** attempt for attempt, (_, delay, _) in enumerate(store.retries)] == [True, True]
+    stats = queue.stats()
+    assert (stats['retried'], stats['failed']) == (2, 1)
+    assert stats['stored'] == {'failed': 1}
+
+
+def test_unknown_job_type_is_not_lost():
+    """Test that a job without a handler is retried rather than dropped."""
+    store = FakeJobStore()
+    queue = JobQueue(store)
+    queue.enqueue('unknown', {})
+
+    queue.run_once()
+
+    assert store.jobs[1]['status'] == 'pending'
+    assert 'No handler registered' in store.retries[0][2]
+
+
+def test_background_workers_run_jobs_concurrently():
+    """Test that start() runs queued jobs on the thread pool."""
+    store = FakeJobStore()
+    queue = JobQueue(store, concurrency=3, poll_interval=0.01)
+    barrier = threading.Barrier(3, timeout=5)
+    done = threading.Event()
+    finished = []
+
+    def handler(payload):
+        # Only passes if three jobs run at the same time
+        barrier.wait()
+        finished.append(payload['n'])
+        if len(finished) == 3:
+            done.set()
+
+    queue.register('work', handler)
+    queue.enqueue_many('work', [{'n': n} for n in range(3)])
+    queue.start()
+    try:
+        assert done.wait(5)
+    finally:
+        queue.stop()
+
+    assert sorted(finished) == [0, 1, 2]
+    assert store.jobs == {}
+
+
+def test_forked_processes_start_their_own_dispatcher(monkeypatch):
+    """Test that a process forked after start() dispatches jobs once it enqueues one."""
+    store = FakeJobStore()
+    queue = JobQueue(store, poll_interval=0.01)
+    done = threading.Event()
+    queue.register('work', lambda payload: done.set())
+    queue.start()
+    parent_thread = queue._thread
+
+    # The parent's dispatcher and thread pool do not exist in a forked child
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    queue.enqueue('work', {})
+    try:
+        assert queue._thread is not parent_thread
+        assert done.wait(5)
+    finally:
+        queue.stop()
@@ -0,0 +1,202 @@
+import json
+import pytest
+from flask import Flask
+from flask_socketio import SocketIO
+from services.live_session_service import LiveSessionService, LiveNamespace
+
+
+class FakeS3Service:
+    """Signs URLs with a counter, so each signing is visible."""
+
+    def __init__(self, private=False):
+        self.private = private
+        self.signings = 0
+
+    def sign_urls(self, payload):
+        if isinstance(payload, list):
+            return [self.sign_urls(item) for item in payload]
+        if isinstance(payload, dict):
+            return {key: self._sign(value) if key == 'image_url' else self.sign_urls(value)
+                    for key, value in payload.items()}
+        return payload
+
+    def _sign(self, url):
+        self.signings += 1
+        return f"{url}?signature={self.signings}"
+
+
+class FakePresentationsService:
+    def __init__(self, s3_service=None):
+        self.loads = 0
+        self.s3_service = s3_service or FakeS3Service()
+
+    def get_full_presentation(self, presentation_id, sign=True):
+        self.loads += 1
+        if presentation_id != 1:
+            return None
+        deck = {
+            'presentation_id': 1,
+            'revision': 3,
+            'slides': [{'slide_id': 10, 'elements': [{'image_url': 'https://bucket/images/a.png'}]},
+                       {'slide_id': 11, 'elements': []}, {'slide_id': 12, 'elements': []}]
+        }
+        return self.s3_service.sign_urls(deck) if sign else deck
+
+
+class FakeLiveSessionStore:
+    """In-memory stand-in for the live_sessions table, shared by several LiveSessionService instances."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.deck_reads = 0
+
+    def create(self, session, deck_json, ttl):
+        self.sessions[session.session_id] = {**session.state(), 'presenter_key': session.presenter_key,
+                                             'deck': deck_json}
+
+    def get(self, session_id, ttl):
+        row = self.sessions.get(session_id)
+        return {key: value for key, value in row.items() if key != 'deck'} if row else None
+
+    def get_deck(self, session_id):
+        self.deck_reads += 1
+        row = self.sessions.get(session_id)
+        return row['deck'] if row else None
+
+    def set_slides(self, slides):
+        for session_id, current_slide in slides.items():
+            if session_id in self.sessions:
+                self.sessions[session_id]['current_slide'] = current_slide
+
+    def add_viewer(self, session_id, delta):
+        row = self.sessions.get(session_id)
+        if row is None:
+            return None
+        row['viewers'] = max(0, row['viewers'] + delta)
+        return row['viewers']
+
+    def delete(self, session_id):
+        return self.sessions.pop(session_id, None) is not None
+
+
+@pytest.fixture
+def live():
+    app = Flask(__name__)
+    socketio = SocketIO(app)
+    presentations = FakePresentationsService()
+    service = LiveSessionService(presentations, store=FakeLiveSessionStore())
+    namespace = LiveNamespace('/live', service, interval=60)
+    socketio.on_namespace(namespace)
+
+    def connect():
+        return socketio.test_client(app, namespace='/live')
+    return connect, service, namespace, presentations
+
+
+def test_deck_is_built_once_per_session(live):
+    """Test that the deck is loaded from the database once and then served from memory."""
+    connect, service, namespace, presentations = live
+    session = service.start_session(1)
+
+    assert service.start_session(2) is None
+    assert json.loads(service.get_deck(session.session_id))['slides'][2]['slide_id'] == 12
+    assert service.get_session(session.session_id).state() == session.state()
+    assert presentations.loads == 2
+    assert service.store.deck_reads == 0
+
+
+def test_sessions_are_served_by_every_worker(live):
+    """Test that a session started in one worker can be read and presented from another."""
+    connect, service, namespace, presentations = live
+    session = service.start_session(1)
+    other_worker = LiveSessionService(FakePresentationsService(), store=service.store)
+
+    assert json.loads(other_worker.get_deck(session.session_id))['revision'] == 3
+    assert json.loads(other_worker.get_deck(session.session_id))['revision'] == 3
+    assert service.store.deck_reads == 1
+    assert other_worker.authorize(session.session_id, session.presenter_key).total_slides == 3
+
+    namespace.broadcaster.submit(session.session_id, {'current_slide': 2, 'revision': 3})
+    namespace.broadcaster.flush()
+    assert other_worker.get_session(session.session_id).current_slide == 2
+
+    assert other_worker.end_session(session.session_id)
+    assert service.get_session(session.session_id) is None
+
+
+def test_private_decks_are_signed_whenever_they_are_served():
+    """Test that decks are stored unsigned and get fresh signed URLs on every load."""
+    s3_service = FakeS3Service(private=True)
+    service = LiveSessionService(FakePresentationsService(s3_service), store=FakeLiveSessionStore())
+    session = service.start_session(1)
+
+    stored = json.loads(service.store.sessions[session.session_id]['deck'])
+    assert stored['slides'][0]['elements'][0]['image_url'] == 'https://bucket/images/a.png'
+    for signings in (1, 2):
+        deck = json.loads(service.get_deck(session.session_id))
+        assert deck['slides'][0]['elements'][0]['image_url'] == f"https://bucket/images/a.png?signature={signings}"
+
+
+def test_slide_changes_are_coalesced_and_fanned_out(live):
+    """Test that a burst of presenter slide changes reaches every viewer as one message."""
+    connect, service, namespace, presentations = live
+    session = service.start_session(1)
+    presenter = connect()
+    viewers = [connect() for _ in range(5)]
+    for viewer in viewers:
+        assert viewer.emit('join', {'session_id': session.session_id}, namespace='/live', callback=True)['success']
+    assert service.get_session(session.session_id).viewers == 5
+
+    for slide_index in (1, 2, 1):
+        ack = presenter.emit('presenter:slide', {
+            'session_id': session.session_id,
+            'presenter_key': session.presenter_key,
+            'slide_index': slide_index
+        }, namespace='/live', callback=True)
+        assert ack == {'success': True}
+    namespace.broadcaster.flush()
+
+    for viewer in viewers:
+        assert viewer.get_received('/live') == [{
+            'name': 'slide',
+            'args': [{'current_slide': 1, 'revision': 3}],
+            'namespace': '/live'
+        }]
+    assert presentations.loads == 1
+    assert service.get_session(session.session_id).current_slide == 1
+
+    viewers[0].disconnect(namespace='/live')
+    assert service.get_session(session.session_id).viewers == 4
+
+
+def test_only_the_presenter_can_change_slides(live):
+    """Test that slide changes without the presenter key are rejected."""
+    connect, service, namespace, presentations = live
+    session = service.start_session(1)
+    client = connect()
+
+    ack = client.emit('presenter:slide', {
+        'session_id': session.session_id,
+        'presenter_key': 'guess',
+        'slide_index': 1
+    }, namespace='/live', callback=True)
+
+    assert ack == {'error': 'Invalid session or presenter key'}
+    namespace.broadcaster.flush()
+    assert service.get_session(session.session_id).current_slide == 0
+
+
+def test_joining_another_session_leaves_the_previous_one(live):
+    """Test that a viewer switching sessions is counted and broadcast to only in the new one."""
+    connect, service, namespace, presentations = live
+    first, second = service.start_session(1), service.start_session(1)
+    viewer = connect()
+
+    viewer.emit('join', {'session_id': first.session_id}, namespace='/live', callback=True)
+    ack = viewer.emit('join', {'session_id': second.session_id}, namespace='/live', callback=True)
+    assert ack['viewers'] == 1
+    assert service.get_session(first.session_id).viewers == 0
+
+    namespace.broadcaster.submit(first.session_id, {'current_slide': 1, 'revision': first.revision})
+    namespace.broadcaster.flush()
+    assert viewer.get_received('/live') == []
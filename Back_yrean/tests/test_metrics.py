@@ -0,0 +1,54 @@
+import logging
+from services import metrics
+from services.metrics import MetricsRegistry, InstrumentedS3Client, params_shape
+
+
+def test_histograms_render_cumulative_buckets():
+    """Test that histograms are exposed with cumulative buckets, sum and count per label set."""
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1))
+    latency.observe(0.05, '/a')
+    latency.observe(0.5, '/a')
+    latency.observe(5, '/a')
+    registry.counter('errors_total', 'Errors').inc(amount=2)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="/a"} 5.55' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert 'errors_total 2' in lines
+
+
+def test_queries_and_s3_calls_are_attributed_to_the_current_request():
+    """Test that DB and S3 time inside a request is accumulated, and background work is not."""
+    client = InstrumentedS3Client(type('Client', (), {'head_object': lambda self, **kwargs: {'ok': True}})())
+    metrics.observe_query("SELECT 1", None, 0.01)
+
+    token = metrics.start_request()
+    try:
+        metrics.observe_query("SELECT 1", None, 0.01)
+        metrics.observe_query("SELECT 2", (1,), 0.02)
+        assert client.head_object(Bucket='b', Key='k') == {'ok': True}
+        stats = metrics.current_request()
+        assert stats.db_queries == 2
+        assert abs(stats.db_seconds - 0.03) < 1e-9
+        assert stats.s3_calls == 1
+    finally:
+        metrics.end_request(token)
+    assert metrics.current_request() is None
+
+
+def test_slow_queries_are_logged_with_parameter_shapes_only(caplog):
+    """Test that slow queries log collapsed SQL and parameter types, never parameter values."""
+    with caplog.at_level(logging.WARNING, logger='slow_queries'):
+        metrics.observe_query("SELECT *\n    FROM users WHERE username = %s", ('ada', 'hunter2'), 10)
+        metrics.observe_query("SELECT 1", None, 0)
+
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert "SELECT * FROM users WHERE username = %s" in message
+    assert 'hunter2' not in message
+    assert params_shape({'ids': list(range(50)), 'name': 'x', 'n': 1}) == {'ids': 'list[50]', 'name': 'str[1]', 'n': 'int'}
@@ -0,0 +1,113 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from werkzeug.security import generate_password_hash
+from services.password_hasher import PasswordHasher, PasswordHasherBusy, parse_cost
+
+
+class HeldExecutor:
+    """Executor whose futures only complete when the test releases them."""
+
+    def __init__(self):
+        self.futures = []
+        self.submitted = threading.Event()
+
+    def submit(self, function, *args):
+        future = Future()
+        self.futures.append((future, function, args))
+        self.submitted.set()
+        return future
+
+    def release_all(self):
+        while self.futures:
+            future, function, args = self.futures.pop(0)
+            future.set_result(function(*args))
+
+
+def test_hash_and_verify_in_worker_processes():
+    """Test that passwords hashed in the process pool verify, and wrong or unknown ones do not."""
+    hasher = PasswordHasher('pbkdf2', {'iterations': 1000}, workers=1)
+    try:
+        password_hash = hasher.hash('correct horse')
+        assert password_hash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(password_hash, 'correct horse')
+        assert not hasher.verify(password_hash, 'battery staple')
+        assert not hasher.verify(None, 'correct horse')
+    finally:
+        hasher.shutdown()
+
+
+def test_needs_rehash_when_algorithm_or_cost_changed():
+    """Test that only hashes made with the configured algorithm and cost are kept."""
+    hasher = PasswordHasher('scrypt', {'n': 1024}, executor_factory=ThreadPoolExecutor)
+
+    current = hasher.hash('secret')
+    assert current.startswith('scrypt:1024:8:1$')
+    assert not hasher.needs_rehash(current)
+    assert hasher.needs_rehash(generate_password_hash('secret', method='scrypt:2048:8:1'))
+    assert hasher.needs_rehash(generate_password_hash('secret', method='pbkdf2:sha256:1000'))
+    # Old hashes still verify, so they can be upgraded on the next login
+    assert hasher.verify(generate_password_hash('secret', method='pbkdf2:sha256:1000'), 'secret')
+
+
+def test_saturated_pool_raises_busy_instead_of_queueing():
+    """Test that requests beyond max_pending are shed immediately."""
+    executor = HeldExecutor()
+    hasher = PasswordHasher('pbkdf2', {'iterations': 1000}, max_pending=1, executor_factory=lambda workers: executor)
+    results = []
+    waiting = threading.Thread(target=lambda: results.append(hasher.hash('first')))
+    waiting.start()
+    assert executor.submitted.wait(5)
+
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash('second')
+
+    executor.release_all()
+    waiting.join(5)
+    assert results and results[0].startswith('pbkdf2:sha256:1000$')
+    # The slot is free again once the first hash finished
+    checked = []
+    checking = threading.Thread(target=lambda: checked.append(hasher.verify(results[0], 'first')))
+    executor.submitted.clear()
+    checking.start()
+    assert executor.submitted.wait(5)
+    executor.release_all()
+    checking.join(5)
+    assert checked == [True]
+
+
+class BrokenExecutor:
+    """Executor whose worker process has died."""
+
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, function, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced_and_the_call_retried():
+    """Test that a pool broken by a killed worker is rebuilt instead of failing every later call."""
+    executors = [BrokenExecutor(), ThreadPoolExecutor(1)]
+    hasher = PasswordHasher('pbkdf2', {'iterations': 1000}, executor_factory=lambda workers: executors.pop(0))
+
+    password_hash = hasher.hash('secret')
+    assert hasher.verify(password_hash, 'secret')
+    assert not executors
+
+    always_broken = PasswordHasher('pbkdf2', {'iterations': 1000},
+                                   executor_factory=lambda workers: BrokenExecutor())
+    with pytest.raises(BrokenProcessPool):
+        always_broken.hash('secret')
+
+
+def test_parse_cost():
+    """Test that PASSWORD_HASH_COST values are parsed into integer parameters."""
+    assert parse_cost('n=65536, r=8,p=2') == {'n': 65536, 'r': 8, 'p': 2}
+    assert parse_cost(None) == {}
@@ -0,0 +1,121 @@
+import io
+import json
+import time
+import zipfile
+import threading
+from decimal import Decimal
+from services.presentation_export import PresentationExporter
+
+BUCKET = "https://bucket.s3.amazonaws.com/"
+
+
+class FakeS3Service:
+    def __init__(self, objects, delay=0.01):
+        self.objects = objects
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def canonical_url(self, url):
+        return url.split('?')[0]
+
+    def is_own_url(self, url):
+        return url.startswith(BUCKET)
+
+    def download_image(self, url):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            key = url[len(BUCKET):]
+            if key not in self.objects:
+                raise Exception("NoSuchKey")
+            return io.BytesIO(self.objects[key])
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class FakePresentationsService:
+    def __init__(self, s3_service, presentation):
+        self.s3_service = s3_service
+        self.presentation = presentation
+
+    def get_full_presentation(self, presentation_id):
+        return self.presentation if presentation_id == 1 else None
+
+
+def make_presentation(image_count):
+    return {
+        'presentation_id': 1,
+        'title': 'Deck',
+        'thumbnail_url': f"{BUCKET}thumbnails/1/abc.webp",
+        'slides': [{
+            'slide_id': 10,
+            'background_image_url': f"{BUCKET}images/background.png?X-Amz-Signature=x",
+            'background_image_thumbnail_url': f"{BUCKET}images/background_320.webp",
+            'elements': [
+                {'element_id': index, 'x_position': Decimal('12.5'), 'element_type': 'image',
+                 'element_data': {'image_url': f"{BUCKET}images/{index}.png",
+                                  'display_url': f"{BUCKET}images/{index}_320.webp",
+                                  'manifest_url': f"{BUCKET}images/{index}.manifest.json?X-Amz-Signature=x"}}
+                for index in range(image_count)
+            ] + [
+                {'element_id': 999, 'element_type': 'image',
+                 'element_data': {'image_url': 'https://elsewhere.example/cat.png'}}
+            ]
+        }]
+    }
+
+
+def export(exporter, presentation_id=1):
+    return zipfile.ZipFile(io.BytesIO(b''.join(exporter.stream(exporter.load(presentation_id)))))
+
+
+def test_archive_contains_deck_and_images_with_rewritten_urls():
+    """Test that own images are bundled and referenced by archive path, and derived URLs are dropped."""
+    objects = {f'images/{index}.png': bytes([index]) * 1000 for index in range(5)}
+    objects['images/background.png'] = b'bg'
+    s3 = FakeS3Service(objects)
+    archive = export(PresentationExporter(FakePresentationsService(s3, make_presentation(5)), max_workers=2))
+
+    assert archive.testzip() is None
+    assert sorted(archive.namelist()) == ['deck.json', 'images/0.png', 'images/1.png', 'images/2.png',
+                                          'images/3.png', 'images/4.png', 'images/background.png']
+    assert archive.read('images/3.png') == bytes([3]) * 1000
+
+    deck = json.loads(archive.read('deck.json'))
+    slide = deck['slides'][0]
+    assert 'thumbnail_url' not in deck
+    assert slide['background_image_url'] == 'images/background.png'
+    assert 'background_image_thumbnail_url' not in slide
+    assert slide['elements'][0]['x_position'] == 12.5
+    assert slide['elements'][0]['element_data'] == {'image_url': 'images/0.png'}
+    assert slide['elements'][-1]['element_data']['image_url'] == 'https://elsewhere.example/cat.png'
+
+
+def test_downloads_are_bounded_by_the_pool_size():
+    """Test that no more than max_workers images are downloaded at once."""
+    objects = {f'images/{index}.png': b'x' for index in range(20)}
+    objects['images/background.png'] = b'bg'
+    s3 = FakeS3Service(objects)
+    export(PresentationExporter(FakePresentationsService(s3, make_presentation(20)), max_workers=3))
+
+    assert 1 < s3.peak <= 3
+
+
+def test_missing_images_are_listed_instead_of_failing_the_export():
+    """Test that a failed download is skipped and recorded in missing_images.json."""
+    s3 = FakeS3Service({'images/0.png': b'x'})
+    archive = export(PresentationExporter(FakePresentationsService(s3, make_presentation(1))))
+
+    assert 'images/0.png' in archive.namelist()
+    assert json.loads(archive.read('missing_images.json')) == [f"{BUCKET}images/background.png"]
+
+
+def test_unknown_presentation_loads_as_none():
+    """Test that load returns None so the route can answer 404 before streaming."""
+    s3 = FakeS3Service({})
+    assert PresentationExporter(FakePresentationsService(s3, make_presentation(0))).load(2) is None
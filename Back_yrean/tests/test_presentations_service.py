@@ -0,0 +1,409 @@
+import pytest
+import psycopg2
+from datetime import datetime, timezone
+from services.presentations_service import (
+    PresentationsService, _encode_listing_cursor, _decode_listing_cursor
+)
+from psycopg2.extras import RealDictCursor
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+@pytest.fixture(scope="module")
+def db_connection():
+    """Create a database connection for testing."""
+    db_params = {
+        'dbname': os.getenv('DB_NAME'),
+        'user': os.getenv('DB_USERNAME'),
+        'password': os.getenv('DB_PASSWORD'),
+        'host': os.getenv('DB_ENDPOINT'),
+        'port': os.getenv('DB_PORT')
+    }
+
+    conn = psycopg2.connect(**db_params, cursor_factory=RealDictCursor)
+    yield conn
+    conn.close()
+
+@pytest.fixture(scope="function")
+def clean_presentations_table(db_connection):
+    """Clean up the presentations table (and with it slides, elements and changes) around each test."""
+    with db_connection.cursor() as cur:
+        cur.execute("DELETE FROM presentations")
+        db_connection.commit()
+    yield
+    with db_connection.cursor() as cur:
+        cur.execute("DELETE FROM presentations")
+        db_connection.commit()
+
+@pytest.fixture(scope="function")
+def presentations_service():
+    """Create a fresh PresentationsService instance for each test."""
+    return PresentationsService()
+
+def test_get_presentation_reloads_a_cached_copy_older_than_min_revision(
+        presentations_service, db_connection, clean_presentations_table):
+    """Test that a cached presentation behind the requested revision is read again."""
+    # Arrange
+    presentation = presentations_service.create_presentation(1, "Original title")
+    presentation_id = presentation['presentation_id']
+    cached = presentations_service.get_presentation(presentation_id)
+
+    # Act: a write the cache never heard about, as when a racing reader wrote back an old copy
+    with db_connection.cursor() as cur:
+        cur.execute("""
+            UPDATE presentations SET title = 'Edited title', revision = revision + 1
+            WHERE presentation_id = %s
+        """, (presentation_id,))
+        db_connection.commit()
+    fresh = presentations_service.get_presentation(presentation_id, min_revision=cached['revision'] + 1)
+
+    # Assert
+    assert fresh['title'] == "Edited title"
+    assert fresh['revision'] == cached['revision'] + 1
+
+@pytest.fixture(scope="function")
+def slide(presentations_service, clean_presentations_table):
+    """Create a presentation with one slide."""
+    presentation = presentations_service.create_presentation(1, "Batch deck")
+    return presentations_service.create_slide(presentation['presentation_id'], 1)
+
+def test_apply_element_batch_creates_updates_and_deletes(presentations_service, slide):
+    """Test a mixed batch: per-operation results in order, client_id echoed, omitted fields kept."""
+    # Arrange
+    kept = presentations_service.create_text_element(slide['slide_id'], "Keep me", 10, 20)
+    removed = presentations_service.create_text_element(slide['slide_id'], "Remove me", 30, 40)
+
+    # Act
+    results = presentations_service.apply_element_batch(slide['slide_id'], [
+        {'op': 'create', 'client_id': 'tmp-1', 'element_type': 'text', 'content': "New", 'x_position': 5, 'y_position': 6},
+        {'op': 'update', 'element_id': kept['element_id'], 'element_type': 'text', 'content': "Kept", 'bold': True},
+        {'op': 'delete', 'element_id': removed['element_id']},
+        {'op': 'create', 'element_type': 'text', 'content': "Second", 'x_position': 7, 'y_position': 8}
+    ])
+
+    # Assert
+    assert [(result['op'], result['success']) for result in results] == [
+        ('create', True), ('update', True), ('delete', True), ('create', True)
+    ]
+    assert results[0]['client_id'] == 'tmp-1'
+    assert 'client_id' not in results[3]
+    assert results[0]['element']['content'] == "New"
+    assert results[3]['element']['content'] == "Second"
+    assert results[0]['element']['element_id'] != results[3]['element']['element_id']
+
+    elements = {element['element_id']: element for element in presentations_service.get_slide_elements(slide['slide_id'])}
+    assert set(elements) == {kept['element_id'], results[0]['element']['element_id'], results[3]['element']['element_id']}
+    assert elements[kept['element_id']]['element_data']['content'] == "Kept"
+    assert elements[kept['element_id']]['element_data']['bold'] is True
+    assert elements[kept['element_id']]['element_data']['font_family'] == 'Arial'
+    assert float(elements[kept['element_id']]['x_position']) == 10
+
+def test_apply_element_batch_ignores_elements_of_other_slides(presentations_service, slide):
+    """Test that updates and deletes aimed at another slide's elements fail without touching them."""
+    # Arrange
+    other_slide = presentations_service.create_slide(slide['presentation_id'], 2)
+    other = presentations_service.create_text_element(other_slide['slide_id'], "Not yours", 10, 20)
+
+    # Act
+    results = presentations_service.apply_element_batch(slide['slide_id'], [
+        {'op': 'update', 'element_id': other['element_id'], 'element_type': 'text', 'content': "Hijacked"}
+    ])
+    delete_results = presentations_service.apply_element_batch(slide['slide_id'], [
+        {'op': 'delete', 'element_id': other['element_id']}
+    ])
+
+    # Assert
+    assert results == [{'op': 'update', 'success': False, 'element_id': other['element_id'],
+                        'error': 'Element not found'}]
+    assert delete_results[0]['success'] is False
+    assert presentations_service.get_slide_elements(other_slide['slide_id'])[0]['element_data']['content'] == "Not yours"
+
+def test_apply_element_batch_rolls_back_entirely_on_a_failing_operation(presentations_service, slide):
+    """Test that one failing operation undoes the creates and deletes issued before it."""
+    # Arrange
+    kept = presentations_service.create_text_element(slide['slide_id'], "Keep me", 10, 20)
+    removed = presentations_service.create_text_element(slide['slide_id'], "Remove me", 30, 40)
+    revision = presentations_service.get_presentation_revision(slide['presentation_id'])
+
+    # Act: creates run first and deletes last; the update fails in between
+    with pytest.raises(Exception) as exc_info:
+        presentations_service.apply_element_batch(slide['slide_id'], [
+            {'op': 'create', 'element_type': 'text', 'content': "New", 'x_position': 5, 'y_position': 6},
+            {'op': 'delete', 'element_id': removed['element_id']},
+            {'op': 'update', 'element_id': kept['element_id'], 'element_type': 'text', 'font_size': 'huge'}
+        ])
+
+    # Assert
+    assert "Error applying element batch" in str(exc_info.value)
+    elements = presentations_service.get_slide_elements(slide['slide_id'])
+    assert sorted(element['element_id'] for element in elements) == sorted([kept['element_id'], removed['element_id']])
+    assert presentations_service.get_presentation_revision(slide['presentation_id']) == revision
+
+def test_apply_element_batch_rejects_malformed_operations(presentations_service, slide):
+    """Test that malformed operations reject the batch before anything is written."""
+    # Arrange
+    kept = presentations_service.create_text_element(slide['slide_id'], "Keep me", 10, 20)
+
+    # Act / Assert
+    for operations in (
+        [],
+        [{'op': 'explode'}],
+        [{'op': 'create', 'element_type': 'text', 'x_position': 5, 'y_position': 6}],
+        [{'op': 'delete', 'element_id': kept['element_id']}, {'op': 'delete', 'element_id': kept['element_id']}]
+    ):
+        with pytest.raises(Exception):
+            presentations_service.apply_element_batch(slide['slide_id'], operations)
+    assert [element['element_id'] for element in presentations_service.get_slide_elements(slide['slide_id'])] == [kept['element_id']]
+
+def test_writes_bump_the_revision_and_log_the_change(presentations_service, db_connection, slide):
+    """Test that each write advances the revision by one and logs the changed entity."""
+    # Arrange
+    revision = presentations_service.get_presentation_revision(slide['presentation_id'])
+
+    # Act
+    element = presentations_service.create_text_element(slide['slide_id'], "Hello", 10, 20)
+
+    # Assert
+    assert presentations_service.get_presentation_revision(slide['presentation_id']) == revision + 1
+    with db_connection.cursor() as cur:
+        cur.execute("""
+            SELECT revision, entity_type, entity_id, slide_id, operation
+            FROM presentation_changes WHERE presentation_id = %s AND revision = %s
+        """, (slide['presentation_id'], revision + 1))
+        assert [dict(row) for row in cur.fetchall()] == [{
+            'revision': revision + 1, 'entity_type': 'element', 'entity_id': element['element_id'],
+            'slide_id': slide['slide_id'], 'operation': 'insert'
+        }]
+
+def test_presentation_changes_only_include_later_revisions(presentations_service, slide):
+    """Test that a delta holds only what changed after since_revision, with deletes as IDs."""
+    # Arrange
+    first = presentations_service.create_text_element(slide['slide_id'], "First", 10, 20)
+    since = presentations_service.get_presentation_revision(slide['presentation_id'])
+    second = presentations_service.create_text_element(slide['slide_id'], "Second", 30, 40)
+    presentations_service.delete_element(first['element_id'])
+
+    # Act
+    delta = presentations_service.get_presentation_changes(slide['presentation_id'], since)
+    current = presentations_service.get_presentation_changes(slide['presentation_id'], delta['revision'])
+
+    # Assert
+    assert delta['revision'] == since + 2
+    assert delta['reset'] is False
+    assert [element['element_id'] for element in delta['elements']] == [second['element_id']]
+    assert delta['deleted_element_ids'] == [first['element_id']]
+    assert delta['slides'] == []
+    assert current['reset'] is False
+    assert current['elements'] == [] and current['deleted_element_ids'] == []
+    assert presentations_service.get_presentation_changes(0, 0) is None
+
+def test_pruned_change_log_asks_for_a_full_reload(presentations_service, db_connection, slide):
+    """Test that a since_revision the pruned log no longer covers answers with reset."""
+    # Arrange
+    since = presentations_service.get_presentation_revision(slide['presentation_id'])
+    presentations_service.create_text_element(slide['slide_id'], "Old", 10, 20)
+    with db_connection.cursor() as cur:
+        cur.execute("""
+            UPDATE presentation_changes SET changed_at = NOW() - INTERVAL '31 days'
+            WHERE presentation_id = %s
+        """, (slide['presentation_id'],))
+        db_connection.commit()
+    presentations_service.create_text_element(slide['slide_id'], "New", 30, 40)
+
+    # Act
+    pruned = presentations_service.prune_presentation_changes(older_than_days=30)
+    delta = presentations_service.get_presentation_changes(slide['presentation_id'], since)
+    recent = presentations_service.get_presentation_changes(slide['presentation_id'], since + 1)
+
+    # Assert
+    assert pruned >= 1
+    assert delta['reset'] is True
+    assert delta['revision'] == since + 2
+    assert recent['reset'] is False
+    assert len(recent['elements']) == 1
+
+def _slide_order(db_connection, presentation_id):
+    with db_connection.cursor() as cur:
+        cur.execute("""
+            SELECT slide_id FROM slides WHERE presentation_id = %s ORDER BY slide_number
+        """, (presentation_id,))
+        return [row['slide_id'] for row in cur.fetchall()]
+
+def test_reorder_slides_applies_a_permutation(presentations_service, db_connection, slide):
+    """Test that a full permutation is applied in one go despite the unique slide numbers."""
+    # Arrange
+    second = presentations_service.create_slide(slide['presentation_id'], 2)
+    third = presentations_service.create_slide(slide['presentation_id'], 3)
+    order = [third['slide_id'], slide['slide_id'], second['slide_id']]
+
+    # Act
+    result = presentations_service.reorder_slides(slide['presentation_id'], order)
+
+    # Assert
+    assert result == [{'slide_id': slide_id, 'slide_number': number} for number, slide_id in enumerate(order, start=1)]
+    assert _slide_order(db_connection, slide['presentation_id']) == order
+
+def test_reorder_slides_requires_every_slide_exactly_once(presentations_service, db_connection, slide):
+    """Test that orders with missing, duplicate or foreign slide IDs are rejected without changes."""
+    # Arrange
+    second = presentations_service.create_slide(slide['presentation_id'], 2)
+    other_presentation = presentations_service.create_presentation(1, "Other deck")
+    other = presentations_service.create_slide(other_presentation['presentation_id'], 1)
+    order = [slide['slide_id'], second['slide_id']]
+
+    # Act / Assert
+    for slide_ids in (
+        [second['slide_id']],
+        [second['slide_id'], second['slide_id']],
+        [second['slide_id'], slide['slide_id'], slide['slide_id']],
+        [second['slide_id'], other['slide_id']],
+        [second['slide_id'], slide['slide_id'], other['slide_id']]
+    ):
+        with pytest.raises(Exception) as exc_info:
+            presentations_service.reorder_slides(slide['presentation_id'], slide_ids)
+        assert "Error reordering slides" in str(exc_info.value)
+    assert _slide_order(db_connection, slide['presentation_id']) == order
+    assert _slide_order(db_connection, other_presentation['presentation_id']) == [other['slide_id']]
+
+def test_listing_cursor_round_trips_the_sort_key():
+    """Test that cursors decode to the exact (updated_at, presentation_id) they were built from."""
+    updated_at = datetime(2026, 10, 16, 12, 30, 45, 123456, tzinfo=timezone.utc)
+
+    for presentation_id in (1, 2, 2 ** 31 - 1):
+        cursor = _encode_listing_cursor(updated_at, presentation_id)
+        assert '=' not in cursor
+        assert _decode_listing_cursor(cursor) == (updated_at, presentation_id)
+
+    for cursor in ('', 'not a cursor', 'WyJ4IiwgMV0', 'WzFd', 'é'):
+        with pytest.raises(Exception) as exc_info:
+            _decode_listing_cursor(cursor)
+        assert str(exc_info.value) == "Invalid cursor"
+
+def test_listing_pages_split_rows_with_equal_updated_at(presentations_service, db_connection, clean_presentations_table):
+    """Test that paging visits every presentation once even when several share updated_at."""
+    # Arrange
+    created = [presentations_service.create_presentation(1, f"Deck {n}")['presentation_id'] for n in range(5)]
+    presentations_service.create_presentation(2, "Someone else's deck")
+    with db_connection.cursor() as cur:
+        cur.execute("""
+            UPDATE presentations SET updated_at = '2026-10-16T12:00:00+00'
+            WHERE presentation_id = ANY(%s)
+        """, (created[1:4],))
+        db_connection.commit()
+
+    # Act
+    listed, cursor = [], None
+    while True:
+        page = presentations_service.get_user_presentations(1, limit=2, cursor=cursor)
+        listed.extend(presentation['presentation_id'] for presentation in page['presentations'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    # Assert
+    assert sorted(listed) == sorted(created)
+    tied = [presentation_id for presentation_id in listed if presentation_id in created[1:4]]
+    assert tied == sorted(created[1:4], reverse=True)
+
+def test_listing_route_rejects_a_malformed_cursor(app_module, monkeypatch):
+    """Test that a cursor that does not decode answers 400 instead of a server error or an empty page."""
+    monkeypatch.setattr(app_module.presentations_service, 'get_user_presentations_version', lambda user_id: 'v1')
+    token = app_module.auth_service.issue_tokens(7)['access_token']
+
+    response = app_module.app.test_client().get('/api/user/7/presentations?cursor=garbage',
+                                                headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 400
+    assert 'Invalid cursor' in response.get_json()['error']
+
+class ScriptedConnection:
+    """Connection whose statements answer with scripted rows or raise scripted errors, in order."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.statements = []
+        self.commits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql.split()[0])
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        self.row = outcome
+
+    def fetchone(self):
+        return self.row
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+def _blob_registrar(monkeypatch, outcomes):
+    service = PresentationsService.__new__(PresentationsService)
+    conn = ScriptedConnection(outcomes)
+    monkeypatch.setattr(service, '_get_connection', lambda: conn)
+    return service, conn
+
+def test_register_image_blob_retries_when_the_url_row_disappears(monkeypatch):
+    """Test that an UPDATE of a URL row deleted since the INSERT failed falls back to inserting again."""
+    url = 'https://bucket/images/abc.png'
+    service, conn = _blob_registrar(monkeypatch, [
+        psycopg2.IntegrityError("duplicate image_url"), None, {'image_url': url, 'existed': False}
+    ])
+
+    blob = service._register_image_blob(url, 'abc', 10, 'image/png')
+
+    assert blob == {'image_url': url, 'sha256': 'abc', 'deduplicated': False}
+    assert conn.statements == ['INSERT', 'UPDATE', 'INSERT']
+    assert conn.commits == 1
+
+def test_register_image_blob_reuses_a_row_that_took_the_hash(monkeypatch):
+    """Test that a hash claimed by another row while updating the URL row returns that row."""
+    winner = 'https://bucket/images/abc.jpeg'
+    service, conn = _blob_registrar(monkeypatch, [
+        psycopg2.IntegrityError("duplicate image_url"), psycopg2.IntegrityError("duplicate sha256"),
+        {'image_url': winner, 'existed': True}
+    ])
+
+    blob = service._register_image_blob('https://bucket/images/abc.png', 'abc', 10, 'image/png')
+
+    assert blob == {'image_url': winner, 'sha256': 'abc', 'deduplicated': True}
+    assert conn.statements == ['INSERT', 'UPDATE', 'SELECT']
+
+def test_one_thumbnail_job_is_queued_per_transaction(presentations_service, db_connection, slide, monkeypatch):
+    """Test that several recorded writes in one transaction queue a single thumbnail render."""
+    # Arrange
+    monkeypatch.setattr('services.presentations_service.thumbnails_available', lambda: True)
+    with db_connection.cursor() as cur:
+        cur.execute("UPDATE presentations SET thumbnail_queued_at = NULL WHERE presentation_id = %s",
+                    (slide['presentation_id'],))
+        cur.execute("DELETE FROM jobs WHERE job_type = 'render_thumbnail'")
+        db_connection.commit()
+
+    # Act
+    with db_connection.cursor() as cur:
+        for _ in range(2):
+            presentations_service._record_changes(cur, [('slide', slide['slide_id'], slide['slide_id'], 'update')],
+                                                  presentation_id=slide['presentation_id'])
+        db_connection.commit()
+
+    # Assert
+    with db_connection.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*) as jobs FROM jobs
+            WHERE job_type = 'render_thumbnail' AND (payload->>'presentation_id')::int = %s
+        """, (slide['presentation_id'],))
+        assert cur.fetchone()['jobs'] == 1
@@ -0,0 +1,95 @@
+import pytest
+from services.rate_limiter import RateLimiter, RateLimitExceeded, RateLimit, parse_rate
+
+
+class Clock:
+    def __init__(self):
+        self.now = 6000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingStore:
+    def sliding_window(self, key, limit, period, now, count=True):
+        raise Exception("connection refused")
+
+
+def attempts(limiter, route, identities, count):
+    """Return how many of count requests get through."""
+    allowed = 0
+    for _ in range(count):
+        try:
+            limiter.check(route, identities)
+            allowed += 1
+        except RateLimitExceeded:
+            pass
+    return allowed
+
+
+def test_sliding_window_throttles_and_recovers():
+    """Test that requests over the limit are rejected with a retry delay until the window slides past them."""
+    clock = Clock()
+    limiter = RateLimiter({'login': {'ip': RateLimit(5, 60)}}, clock=clock)
+
+    assert attempts(limiter, 'login', {'ip': '10.0.0.1'}, 8) == 5
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.check('login', {'ip': '10.0.0.1'})
+    assert 0 < excinfo.value.retry_after <= 120
+    # Other clients have their own allowance
+    assert attempts(limiter, 'login', {'ip': '10.0.0.2'}, 1) == 1
+
+    clock.now += excinfo.value.retry_after + 0.01
+    assert attempts(limiter, 'login', {'ip': '10.0.0.1'}, 1) == 1
+    clock.now += 120
+    assert attempts(limiter, 'login', {'ip': '10.0.0.1'}, 8) == 5
+    stats = limiter.stats()
+    assert stats['routes']['login:ip'] == {'allowed': 12, 'throttled': 7}
+
+
+def test_token_bucket_refills_at_the_limit_rate():
+    """Test that a drained bucket lets one request through per refill interval."""
+    clock = Clock()
+    limiter = RateLimiter({'login': {'username': RateLimit(3, 30, 'token_bucket')}}, clock=clock)
+
+    assert attempts(limiter, 'login', {'username': 'Ada'}, 5) == 3
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.check('login', {'username': ' ada '})
+    assert excinfo.value.retry_after == pytest.approx(10)
+    clock.now += 10
+    assert attempts(limiter, 'login', {'username': 'ada'}, 2) == 1
+
+
+def test_requests_rejected_on_one_scope_are_not_counted_on_the_others():
+    """Test that attempts throttled by username do not use up the client's IP allowance."""
+    clock = Clock()
+    limiter = RateLimiter({'login': {'ip': RateLimit(5, 60), 'username': RateLimit(2, 60, 'token_bucket')}},
+                          clock=clock)
+
+    assert attempts(limiter, 'login', {'ip': '10.0.0.1', 'username': 'ada'}, 6) == 2
+    assert attempts(limiter, 'login', {'ip': '10.0.0.1', 'username': 'grace'}, 2) == 2
+    assert attempts(limiter, 'login', {'ip': '10.0.0.1', 'username': 'linus'}, 2) == 1
+    assert limiter.stats()['routes'] == {
+        'login:ip': {'allowed': 5, 'throttled': 1},
+        'login:username': {'allowed': 5, 'throttled': 4}
+    }
+
+
+def test_missing_identities_and_store_failures_do_not_block():
+    """Test that unidentified scopes are skipped and a failing store lets requests through."""
+    limiter = RateLimiter({'login': {'ip': RateLimit(1, 60), 'username': None}}, store=FailingStore())
+
+    assert attempts(limiter, 'login', {'ip': '10.0.0.1', 'username': 'ada'}, 3) == 3
+    assert limiter.stats()['store_errors'] == 3
+    assert attempts(limiter, 'register', {'ip': '10.0.0.1'}, 3) == 3
+
+
+def test_parse_rate():
+    """Test that RATE_LIMIT_* values are parsed into limits."""
+    limit = parse_rate('5/minute')
+    assert (limit.limit, limit.period, limit.algorithm) == (5, 60, 'sliding_window')
+    limit = parse_rate('100/3600s:token_bucket')
+    assert (limit.limit, limit.period, limit.algorithm) == (100, 3600, 'token_bucket')
+    assert parse_rate('off') is None
+    with pytest.raises(Exception):
+        parse_rate('5/fortnight')
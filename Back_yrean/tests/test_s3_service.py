@@ -0,0 +1,183 @@
+import io
+import hashlib
+import threading
+import time
+from botocore.exceptions import ClientError
+from services.s3_service import S3Service
+
+
+class FakeS3Client:
+    """Records S3 calls in memory; fails upload_part for the part numbers in fail_parts."""
+
+    def __init__(self, fail_parts=()):
+        self.fail_parts = set(fail_parts)
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.presigned = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.max_in_flight = 0
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[Key] = Body
+
+    def head_object(self, Bucket, Key, **kwargs):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        return {'ContentLength': len(self.objects[Key])}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        self.presigned.append(Params['Key'])
+        return f"https://{Params['Bucket']}.s3.amazonaws.com/{Params['Key']}?signature={len(self.presigned)}"
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            time.sleep(0.01)
+            if PartNumber in self.fail_parts:
+                raise Exception("connection reset")
+            self.uploads[UploadId][PartNumber] = Body
+            return {'ETag': f'"etag-{PartNumber}"'}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b''.join(parts[part['PartNumber']] for part in MultipartUpload['Parts'])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+        self.aborted.append(UploadId)
+
+
+class CountingStream(io.BytesIO):
+    """BytesIO that records the largest single read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.largest_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.largest_read = max(self.largest_read, len(data))
+        return data
+
+
+def make_service(client, part_size=10, concurrency=2):
+    service = S3Service(part_size=part_size, concurrency=concurrency)
+    service.s3_client = client
+    service.bucket_name = 'bucket'
+    return service
+
+
+def test_small_upload_uses_single_put():
+    """Test that a stream that fits in one part is uploaded with put_object."""
+    client = FakeS3Client()
+    service = make_service(client)
+
+    success, url = service.upload_stream(io.BytesIO(b'tiny'), 'a.png', 'image/png')
+
+    assert success
+    assert url == 'https://bucket.s3.amazonaws.com/images/a.png'
+    assert client.objects['images/a.png'] == b'tiny'
+    assert client.uploads == {}
+
+
+def test_large_upload_is_streamed_in_bounded_parts():
+    """Test that a large stream is uploaded in order with bounded reads and parallelism."""
+    client = FakeS3Client()
+    service = make_service(client, part_size=10, concurrency=2)
+    data = bytes(range(256)) * 4
+    stream = CountingStream(data)
+
+    success, url = service.upload_stream(stream, 'big.png', 'image/png')
+
+    assert success
+    assert client.objects['images/big.png'] == data
+    assert stream.largest_read == 10
+    assert client.max_in_flight <= 2
+
+
+
+def test_parts_are_read_only_when_a_slot_is_free():
+    """Test that no more than concurrency parts are ever buffered or uploading, even with one slot."""
+    client = FakeS3Client()
+    service = make_service(client, part_size=10, concurrency=1)
+    outstanding = []
+
+    class TrackingStream(io.BytesIO):
+        reads = 0
+
+        def read(self, size=-1):
+            data = super().read(size)
+            if data:
+                self.reads += 1
+                uploaded = sum(len(parts) for parts in client.uploads.values())
+                outstanding.append(self.reads - uploaded)
+            return data
+
+    data = bytes(range(100))
+    assert service.upload_stream(TrackingStream(data), 'one.png', 'image/png')[0]
+    assert client.objects['images/one.png'] == data
+    assert max(outstanding) == 1
+
+def test_failed_part_aborts_multipart_upload():
+    """Test that a failing part aborts the upload instead of leaving parts behind."""
+    client = FakeS3Client(fail_parts={3})
+    service = make_service(client, part_size=10, concurrency=2)
+
+    success, url = service.upload_stream(io.BytesIO(b'x' * 100), 'broken.png', 'image/png')
+
+    assert (success, url) == (False, None)
+    assert client.aborted == ['upload-1']
+    assert 'images/broken.png' not in client.objects
+
+
+def test_hash_stream_rewinds_and_image_exists_checks_the_key():
+    """Test that hashing reads the whole stream in chunks, rewinds it, and existence uses HEAD."""
+    client = FakeS3Client()
+    service = make_service(client)
+    data = b'pixels' * 1000
+    stream = CountingStream(data)
+
+    sha256, size = service.hash_stream(stream, chunk_size=64)
+
+    assert (sha256, size) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert stream.largest_read == 64
+    assert stream.tell() == 0
+    assert not service.image_exists(f'{sha256}.png')
+    service.upload_stream(stream, f'{sha256}.png', 'image/png')
+    assert service.image_exists(f'{sha256}.png')
+    assert service.is_own_url(service.image_url(f'{sha256}.png'))
+    assert not service.is_own_url('https://example.com/cat.png')
+
+
+def test_private_bucket_urls_are_signed_once_and_cached():
+    """Test that payload image URLs are presigned, reused from cache, and leave other URLs alone."""
+    client = FakeS3Client()
+    service = make_service(client)
+    service.private = True
+    url = service.image_url('abc.png')
+    payload = {'slides': [
+        {'background_image_url': url, 'elements': [{'element_data': {'image_url': url, 'content': url}}]},
+        {'background_image_url': 'https://example.com/cat.png', 'elements': []}
+    ]}
+
+    signed = service.sign_urls(payload)
+
+    first, second = signed['slides']
+    assert first['background_image_url'] == url + '?signature=1'
+    assert first['elements'][0]['element_data'] == {'image_url': url + '?signature=1', 'content': url}
+    assert second['background_image_url'] == 'https://example.com/cat.png'
+    assert client.presigned == ['images/abc.png']
+    assert payload['slides'][0]['background_image_url'] == url
+    assert service.canonical_url(first['background_image_url']) == url
@@ -0,0 +1,26 @@
+from services.presentations_service import _highlight
+
+
+def test_highlight_escapes_content_and_marks_only_matches():
+    """Test that headline HTML is escaped and only the ts_headline markers become <mark> tags."""
+    headline = '<img src=x onerror="alert(1)"> \x02<b>roadmap</b>\x03 & <mark>fake</mark>'
+
+    assert _highlight(headline) == (
+        '&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>&lt;b&gt;roadmap&lt;/b&gt;</mark> '
+        '&amp; &lt;mark&gt;fake&lt;/mark&gt;'
+    )
+
+
+def test_search_route_rejects_an_empty_query(app_module, monkeypatch):
+    """Test that a blank q answers 400 without running a search."""
+    searches = []
+    monkeypatch.setattr(app_module.presentations_service, 'search_user_presentations',
+                        lambda *args, **kwargs: searches.append(args))
+    token = app_module.auth_service.issue_tokens(7)['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    for query in ('', '%20%20'):
+        response = app_module.app.test_client().get(f'/api/user/7/search?q={query}', headers=headers)
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Missing required parameter: q'}
+    assert searches == []
@@ -0,0 +1,57 @@
+import io
+import pytest
+from services import thumbnail_renderer
+
+Image = pytest.importorskip('PIL.Image')
+
+SLIDE = {'slide_id': 1, 'slide_number': 1, 'background_color': '#336699', 'background_image_url': None,
+         'background_image_opacity': 1, 'background_image_fit': 'cover', 'updated_at': '2026-01-01'}
+
+
+def make_image_element(**overrides):
+    element = {'element_id': 7, 'slide_id': 1, 'element_type': 'image', 'x_position': 480, 'y_position': 0,
+               'width': 480, 'height': 540, 'z_index': 1,
+               'element_data': {'image_url': 'https://bucket.s3.amazonaws.com/images/red.png', 'variants': None}}
+    element.update(overrides)
+    return element
+
+
+def test_render_slide_scales_the_design_canvas():
+    """Test that a slide is drawn at the thumbnail width with its background and image elements."""
+    red = Image.new('RGB', (100, 100), '#FF0000')
+    requested = []
+
+    def load_image(image_url, width):
+        requested.append((image_url, width))
+        return red
+
+    data = thumbnail_renderer.render_slide(SLIDE, [make_image_element()], load_image, width=320, image_format='png')
+    thumbnail = Image.open(io.BytesIO(data))
+
+    assert thumbnail.format == 'PNG' and thumbnail.size == (320, 180)
+    assert thumbnail.getpixel((40, 90))[:3] == (0x33, 0x66, 0x99)
+    assert thumbnail.getpixel((240, 90))[:3] == (255, 0, 0)
+    assert requested == [('https://bucket.s3.amazonaws.com/images/red.png', 160)]
+
+
+
+def test_transparent_background_images_are_not_drawn():
+    """Test that an explicit background opacity of 0 leaves the background color visible."""
+    slide = dict(SLIDE, background_image_url='https://bucket.s3.amazonaws.com/images/red.png',
+                 background_image_opacity=0)
+    data = thumbnail_renderer.render_slide(slide, [], lambda image_url, width: Image.new('RGB', (16, 9), '#FF0000'),
+                                           width=320, image_format='png')
+
+    assert Image.open(io.BytesIO(data)).getpixel((40, 90))[:3] == (0x33, 0x66, 0x99)
+
+def test_fingerprint_ignores_slide_position_and_timestamps():
+    """Test that the fingerprint only changes when something drawn changes."""
+    elements = [make_image_element()]
+    moved = dict(SLIDE, slide_number=4, updated_at='2026-02-02')
+
+    assert thumbnail_renderer.fingerprint(SLIDE, elements, 320, 'webp') == \
+        thumbnail_renderer.fingerprint(moved, elements, 320, 'webp')
+    assert thumbnail_renderer.fingerprint(SLIDE, elements, 320, 'webp') != \
+        thumbnail_renderer.fingerprint(SLIDE, [make_image_element(x_position=0)], 320, 'webp')
+    assert thumbnail_renderer.fingerprint(SLIDE, elements, 320, 'webp') != \
+        thumbnail_renderer.fingerprint(SLIDE, elements, 640, 'webp')
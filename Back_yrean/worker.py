@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+import logging
+from services.presentations_service import PresentationsService
+from services.job_handlers import register_job_handlers
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+if __name__ == "__main__":
+    presentations_service = PresentationsService()
+    register_job_handlers(presentations_service.jobs, presentations_service)
+    logging.info("Job worker started")
+    presentations_service.jobs.run_forever()
@@ -1,19 +1,64 @@
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5001/api'
 
-const getAuthHeader = () => {
-  const userData = sessionStorage.getItem('user')
-  if (!userData) return {}
+const TOKENS_KEY = 'tokens'
+
+export const saveTokens = (tokens) => {
+  sessionStorage.setItem(TOKENS_KEY, JSON.stringify({
+    access_token: tokens.access_token,
+    refresh_token: tokens.refresh_token
+  }))
+}
+
+const getTokens = () => {
   try {
-    const user = JSON.parse(userData)
-    return {
-      'Authorization': `Bearer ${user.user_id}`
-    }
+    return JSON.parse(sessionStorage.getItem(TOKENS_KEY)) || {}
   } catch (err) {
-    console.error('Error parsing user data:', err)
+    console.error('Error parsing tokens:', err)
     return {}
   }
 }
 
+export const getAccessToken = () => getTokens().access_token
+
+const getAuthHeader = () => {
+  const accessToken = getAccessToken()
+  return accessToken ? { 'Authorization': `Bearer ${accessToken}` } : {}
+}
+
+// Refresh tokens are single use, so concurrent 401s share one refresh request
+let refreshing = null
+
+const refreshTokens = () => {
+  const { refresh_token } = getTokens()
+  if (!refresh_token) return Promise.resolve(false)
+  if (!refreshing) {
+    refreshing = fetch(`${API_BASE_URL}/auth/refresh`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token })
+    })
+      .then(response => response.json())
+      .then(data => {
+        if (!data.success) return false
+        saveTokens(data)
+        return true
+      })
+      .catch(() => false)
+      .finally(() => { refreshing = null })
+  }
+  return refreshing
+}
+
+// fetch with the access token attached; an expired token is refreshed and the request retried once
+const authFetch = async (url, options = {}) => {
+  const send = () => fetch(url, { ...options, headers: { ...options.headers, ...getAuthHeader() } })
+  const response = await send()
+  if (response.status === 401 && await refreshTokens()) {
+    return send()
+  }
+  return response
+}
+
 // Auth endpoints
 export const authApi = {
   async login(username, password) {
@@ -36,6 +81,19 @@ export const authApi = {
       body: JSON.stringify({ username, email, password })
     })
     return response.json()
+  },
+
+  async logout() {
+    const { refresh_token } = getTokens()
+    try {
+      await authFetch(`${API_BASE_URL}/auth/logout`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token })
+      })
+    } finally {
+      sessionStorage.removeItem(TOKENS_KEY)
+    }
   }
 }
 
@@ -45,11 +103,10 @@ export const presentationApi = {
   async createPresentation(user_id, title, description) {
     console.log('title', title)
     console.log('description', description)
-    const response = await fetch(`${API_BASE_URL}/presentations`, {
+    const response = await authFetch(`${API_BASE_URL}/presentations`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       },
       body: JSON.stringify({ user_id, title, description })
     })
@@ -58,24 +115,37 @@ export const presentationApi = {
   },
 
   async getPresentation(presentation_id) {
-    const response = await fetch(`${API_BASE_URL}/presentations/${presentation_id}`, {
+    const response = await authFetch(`${API_BASE_URL}/presentations/${presentation_id}`, {
       method: 'GET',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       }
     })
     return response.json()
   },
 
-  async getUserPresentations(user_id) {
+  async getFullPresentation(presentation_id, start = null, end = null) {
+    const params = new URLSearchParams()
+    if (start !== null) params.append('start', start)
+    if (end !== null) params.append('end', end)
+    const query = params.toString() ? `?${params.toString()}` : ''
+    const response = await authFetch(`${API_BASE_URL}/presentations/${presentation_id}/full${query}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json'
+      }
+    })
+    return response.json()
+  },
+
+  async getUserPresentations(user_id, cursor = null) {
     console.log('user_id', user_id)
     console.log('API_BASE_URL', API_BASE_URL)
-    const response = await fetch(`${API_BASE_URL}/user/${user_id}/presentations`, {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''
+    const response = await authFetch(`${API_BASE_URL}/user/${user_id}/presentations${query}`, {
       method: 'GET',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       }
     })
 
@@ -83,12 +153,29 @@ export const presentationApi = {
     return response.json()
   },
 
+  async searchPresentations(user_id, q, offset = 0) {
+    const params = new URLSearchParams({ q, offset })
+    const response = await authFetch(`${API_BASE_URL}/user/${user_id}/search?${params}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json'
+      }
+    })
+    return response.json()
+  },
+
+  // A plain link, so the browser streams the archive to disk instead of holding it in memory;
+  // links carry no headers, so the access token goes in the query string
+  exportPresentationUrl(presentation_id) {
+    const params = new URLSearchParams({ access_token: getAccessToken() || '' })
+    return `${API_BASE_URL}/presentations/${presentation_id}/export?${params}`
+  },
+
   async updatePresentation(presentation_id, updateData) {
-    const response = await fetch(`${API_BASE_URL}/presentations/${presentation_id}`, {
+    const response = await authFetch(`${API_BASE_URL}/presentations/${presentation_id}`, {
       method: 'PUT',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       },
       body: JSON.stringify(updateData)
     })
@@ -96,11 +183,10 @@ export const presentationApi = {
   },
 
   async deletePresentation(presentation_id) {
-    const response = await fetch(`${API_BASE_URL}/presentations/${presentation_id}`, {
+    const response = await authFetch(`${API_BASE_URL}/presentations/${presentation_id}`, {
       method: 'DELETE',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       }
     })
     return response.json()
@@ -108,11 +194,10 @@ export const presentationApi = {
 
   // Slide endpoints
   async createSlide(presentation_id, slide_number, background_color = '#FFFFFF', background_image_url = null, title = '', background_image_opacity = 1, background_image_fit = 'cover') {
-    const response = await fetch(`${API_BASE_URL}/presentations/${presentation_id}/slides`, {
+    const response = await authFetch(`${API_BASE_URL}/presentations/${presentation_id}/slides`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       },
       body: JSON.stringify({ 
         slide_number, 
@@ -127,11 +212,10 @@ export const presentationApi = {
   },
 
   async updateSlide(slide_id, slide_number, background_color, background_image_url, title, background_image_opacity = 1, background_image_fit = 'cover') {
-    const response = await fetch(`${API_BASE_URL}/slides/${slide_id}`, {
+    const response = await authFetch(`${API_BASE_URL}/slides/${slide_id}`, {
       method: 'PUT',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       },
       body: JSON.stringify({ 
         slide_number, 
@@ -145,12 +229,22 @@ export const presentationApi = {
     return response.json()
   },
 
+  async reorderSlides(presentation_id, slide_ids) {
+    const response = await authFetch(`${API_BASE_URL}/presentations/${presentation_id}/slides/order`, {
+      method: 'PUT',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ slide_ids })
+    })
+    return response.json()
+  },
+
   async deleteSlide(slide_id) {
-    const response = await fetch(`${API_BASE_URL}/slides/${slide_id}`, {
+    const response = await authFetch(`${API_BASE_URL}/slides/${slide_id}`, {
       method: 'DELETE',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       }
     })
     return response.json()
@@ -158,22 +252,20 @@ export const presentationApi = {
 
   // Element endpoints
   async getSlideElements(slide_id) {
-    const response = await fetch(`${API_BASE_URL}/slides/${slide_id}/elements`, {
+    const response = await authFetch(`${API_BASE_URL}/slides/${slide_id}/elements`, {
       method: 'GET',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       }
     })
     return response.json()
   },
 
   async createTextElement(slide_id, elementData) {
-    const response = await fetch(`${API_BASE_URL}/slides/${slide_id}/elements/text`, {
+    const response = await authFetch(`${API_BASE_URL}/slides/${slide_id}/elements/text`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       },
       body: JSON.stringify({
         ...elementData,
@@ -184,36 +276,112 @@ export const presentationApi = {
   },
 
   async updateElement(element_id, elementData) {
-    const response = await fetch(`${API_BASE_URL}/elements/${element_id}`, {
+    const response = await authFetch(`${API_BASE_URL}/elements/${element_id}`, {
       method: 'PUT',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       },
       body: JSON.stringify(elementData)
     })
     return response.json()
   },
 
+  async updateElementGeometry(element_id, geometry) {
+    const response = await authFetch(`${API_BASE_URL}/elements/${element_id}/geometry`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(geometry)
+    })
+    return response.json()
+  },
+
+  async updateElementsGeometry(updates) {
+    const response = await authFetch(`${API_BASE_URL}/elements/geometry`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ updates })
+    })
+    return response.json()
+  },
+
+  async batchElements(slide_id, operations) {
+    const response = await authFetch(`${API_BASE_URL}/slides/${slide_id}/elements/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ operations })
+    })
+    return response.json()
+  },
+
   async deleteElement(element_id) {
-    const response = await fetch(`${API_BASE_URL}/elements/${element_id}`, {
+    const response = await authFetch(`${API_BASE_URL}/elements/${element_id}`, {
       method: 'DELETE',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       }
     })
     return response.json()
   },
 
-  // Image upload endpoint
+  // Image upload endpoints
   async uploadImage(file) {
+    // Upload straight to S3 when the browser can hash the file; otherwise send it through the API
+    if (!window.crypto?.subtle) {
+      return this.uploadImageViaApi(file)
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer())
+    const sha256 = Array.from(new Uint8Array(digest))
+      .map(byte => byte.toString(16).padStart(2, '0'))
+      .join('')
+
+    const presignResponse = await authFetch(`${API_BASE_URL}/upload/image/presign`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ sha256, size: file.size, content_type: file.type, filename: file.name })
+    })
+    const presigned = await presignResponse.json()
+    if (presigned.error) {
+      return presigned
+    }
+    if (presigned.deduplicated) {
+      return { success: true, ...presigned }
+    }
+
+    const formData = new FormData()
+    Object.entries(presigned.upload.fields).forEach(([name, value]) => formData.append(name, value))
+    formData.append('file', file)
+    const uploadResponse = await fetch(presigned.upload.url, {
+      method: 'POST',
+      body: formData
+    })
+    if (!uploadResponse.ok) {
+      return { error: `Upload failed with status ${uploadResponse.status}` }
+    }
+
+    const response = await authFetch(`${API_BASE_URL}/upload/image/complete`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ sha256, filename: file.name })
+    })
+    return response.json()
+  },
+
+  async uploadImageViaApi(file) {
     const formData = new FormData()
     formData.append('file', file)
     
-    const response = await fetch(`${API_BASE_URL}/upload/image`, {
+    const response = await authFetch(`${API_BASE_URL}/upload/image`, {
       method: 'POST',
-      headers: getAuthHeader(),
       body: formData
     })
     return response.json()
@@ -221,11 +389,10 @@ export const presentationApi = {
 
   // Image element endpoints
   async createImageElement(slide_id, elementData) {
-    const response = await fetch(`${API_BASE_URL}/slides/${slide_id}/elements/image`, {
+    const response = await authFetch(`${API_BASE_URL}/slides/${slide_id}/elements/image`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
-        ...getAuthHeader()
+        'Content-Type': 'application/json'
       },
       body: JSON.stringify({
         ...elementData,